@@ -0,0 +1,29 @@
+"""add fridge logs unit
+
+Revision ID: 1e6b93d0c4a7
+Revises: c5d2e8a41b70
+Create Date: 2026-10-18 21:04:51.318027
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1e6b93d0c4a7'
+down_revision: Union[str, Sequence[str], None] = 'c5d2e8a41b70'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing entries keep a NULL unit: their amounts are in whatever unit the item had then
+    op.add_column('fridge_logs', sa.Column('unit', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('fridge_logs', 'unit')
@@ -0,0 +1,46 @@
+"""add fridge log daily unit
+
+Revision ID: 7a3d5f20b9e1
+Revises: 1e6b93d0c4a7
+Create Date: 2026-10-18 21:37:26.045913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a3d5f20b9e1'
+down_revision: Union[str, Sequence[str], None] = '1e6b93d0c4a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Rows rolled up before log entries carried a unit keep ''
+    with op.batch_alter_table('fridge_log_daily') as batch_op:
+        batch_op.add_column(sa.Column('unit', sa.String(), server_default='', nullable=False))
+        batch_op.drop_constraint('uq_fridge_log_daily_user_ingredient_day', type_='unique')
+        batch_op.create_unique_constraint(
+            'uq_fridge_log_daily_user_ingredient_day_unit', ['user_id', 'ingredient_id', 'day', 'unit']
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Keep one row per day; the others cannot fit the old unique constraint
+    op.execute(
+        """
+        DELETE FROM fridge_log_daily
+        WHERE id NOT IN (SELECT MIN(id) FROM fridge_log_daily GROUP BY user_id, ingredient_id, day)
+        """
+    )
+    with op.batch_alter_table('fridge_log_daily') as batch_op:
+        batch_op.drop_constraint('uq_fridge_log_daily_user_ingredient_day_unit', type_='unique')
+        batch_op.create_unique_constraint(
+            'uq_fridge_log_daily_user_ingredient_day', ['user_id', 'ingredient_id', 'day']
+        )
+        batch_op.drop_column('unit')
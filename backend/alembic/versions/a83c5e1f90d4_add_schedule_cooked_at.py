@@ -0,0 +1,28 @@
+"""add schedule cooked_at
+
+Revision ID: a83c5e1f90d4
+Revises: f4b19d7e2c63
+Create Date: 2026-10-18 18:05:44.210937
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a83c5e1f90d4'
+down_revision: Union[str, Sequence[str], None] = 'f4b19d7e2c63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('schedule', sa.Column('cooked_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('schedule', 'cooked_at')
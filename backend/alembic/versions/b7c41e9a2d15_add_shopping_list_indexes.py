@@ -0,0 +1,36 @@
+"""add shopping list indexes
+
+Revision ID: b7c41e9a2d15
+Revises: 63544c60111d
+Create Date: 2026-10-18 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7c41e9a2d15'
+down_revision: Union[str, Sequence[str], None] = '63544c60111d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_schedule_user_id_date', 'schedule', ['user_id', 'date'], unique=False)
+    op.create_index('ix_recipe_ingredients_recipe_id', 'recipe_ingredients', ['recipe_id'], unique=False)
+    op.create_index(
+        'ix_fridge_items_user_id_ingredient_id_unit',
+        'fridge_items',
+        ['user_id', 'ingredient_id', 'unit'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_fridge_items_user_id_ingredient_id_unit', table_name='fridge_items')
+    op.drop_index('ix_recipe_ingredients_recipe_id', table_name='recipe_ingredients')
+    op.drop_index('ix_schedule_user_id_date', table_name='schedule')
@@ -0,0 +1,34 @@
+"""add fridge items expiration index
+
+Revision ID: c5d2e8a41b70
+Revises: a83c5e1f90d4
+Create Date: 2026-10-18 19:32:08.664301
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5d2e8a41b70'
+down_revision: Union[str, Sequence[str], None] = 'a83c5e1f90d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Items without an expiration date never expire, so leave them out
+    op.create_index(
+        'ix_fridge_items_user_id_expiration_date', 'fridge_items', ['user_id', 'expiration_date'],
+        unique=False,
+        postgresql_where=sa.text('expiration_date IS NOT NULL'),
+        sqlite_where=sa.text('expiration_date IS NOT NULL'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_fridge_items_user_id_expiration_date', table_name='fridge_items')
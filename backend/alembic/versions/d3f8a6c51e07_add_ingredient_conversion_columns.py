@@ -0,0 +1,30 @@
+"""add ingredient conversion columns
+
+Revision ID: d3f8a6c51e07
+Revises: b7c41e9a2d15
+Create Date: 2026-10-18 11:02:17.541963
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3f8a6c51e07'
+down_revision: Union[str, Sequence[str], None] = 'b7c41e9a2d15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('ingredients', sa.Column('density_g_per_ml', sa.Float(), nullable=True))
+    op.add_column('ingredients', sa.Column('grams_per_piece', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('ingredients', 'grams_per_piece')
+    op.drop_column('ingredients', 'density_g_per_ml')
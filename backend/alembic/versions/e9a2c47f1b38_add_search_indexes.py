@@ -0,0 +1,61 @@
+"""add search indexes
+
+Revision ID: e9a2c47f1b38
+Revises: d3f8a6c51e07
+Create Date: 2026-10-18 14:21:05.118420
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e9a2c47f1b38'
+down_revision: Union[str, Sequence[str], None] = 'd3f8a6c51e07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Must match the document expressions in app/search.py
+RECIPE_DOCUMENT = (
+    "to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(description, '') "
+    "|| ' ' || coalesce(instructions, ''))"
+)
+INGREDIENT_DOCUMENT = "to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(category, ''))"
+NAME_DOCUMENT = "to_tsvector('simple', coalesce(name, ''))"
+TAG_DOCUMENT = "to_tsvector('simple', tag)"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Other databases search through the in-memory index in app/search.py
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index('ix_recipes_search', 'recipes', [sa.text(RECIPE_DOCUMENT)], postgresql_using='gin')
+    op.create_index('ix_recipes_name_search', 'recipes', [sa.text(NAME_DOCUMENT)], postgresql_using='gin')
+    op.create_index(
+        'ix_recipes_name_trgm', 'recipes', ['name'],
+        postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'},
+    )
+    op.create_index('ix_ingredients_search', 'ingredients', [sa.text(INGREDIENT_DOCUMENT)], postgresql_using='gin')
+    op.create_index('ix_ingredients_name_search', 'ingredients', [sa.text(NAME_DOCUMENT)], postgresql_using='gin')
+    op.create_index(
+        'ix_ingredients_name_trgm', 'ingredients', ['name'],
+        postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'},
+    )
+    op.create_index('ix_recipe_tags_search', 'recipe_tags', [sa.text(TAG_DOCUMENT)], postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('ix_recipe_tags_search', table_name='recipe_tags')
+    op.drop_index('ix_ingredients_name_trgm', table_name='ingredients')
+    op.drop_index('ix_ingredients_name_search', table_name='ingredients')
+    op.drop_index('ix_ingredients_search', table_name='ingredients')
+    op.drop_index('ix_recipes_name_trgm', table_name='recipes')
+    op.drop_index('ix_recipes_name_search', table_name='recipes')
+    op.drop_index('ix_recipes_search', table_name='recipes')
@@ -0,0 +1,56 @@
+"""add fridge log daily rollup
+
+Revision ID: f4b19d7e2c63
+Revises: e9a2c47f1b38
+Create Date: 2026-10-18 16:40:12.503118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4b19d7e2c63'
+down_revision: Union[str, Sequence[str], None] = 'e9a2c47f1b38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('fridge_log_daily',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('ingredient_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('added', sa.Float(), nullable=False),
+    sa.Column('consumed', sa.Float(), nullable=False),
+    sa.Column('wasted', sa.Float(), nullable=False),
+    sa.Column('events', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['ingredient_id'], ['ingredients.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'ingredient_id', 'day', name='uq_fridge_log_daily_user_ingredient_day')
+    )
+    op.create_index('ix_fridge_log_daily_user_id_day', 'fridge_log_daily', ['user_id', 'day'], unique=False)
+    # Roll up what the log already holds
+    op.execute(
+        """
+        INSERT INTO fridge_log_daily (user_id, ingredient_id, day, added, consumed, wasted, events)
+        SELECT user_id, ingredient_id, DATE(timestamp),
+               SUM(CASE WHEN change_amount > 0 AND action_type IN ('add', 'update') THEN change_amount ELSE 0 END),
+               SUM(CASE WHEN change_amount < 0 AND action_type IN ('update', 'remove', 'cook') THEN -change_amount ELSE 0 END),
+               SUM(CASE WHEN action_type = 'waste' THEN ABS(change_amount) ELSE 0 END),
+               COUNT(*)
+        FROM fridge_logs
+        GROUP BY user_id, ingredient_id, DATE(timestamp)
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_fridge_log_daily_user_id_day', table_name='fridge_log_daily')
+    op.drop_table('fridge_log_daily')
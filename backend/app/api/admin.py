@@ -0,0 +1,64 @@
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+
+from ..database import async_engine
+from ..export import EXPORT_BATCH_SIZE, FORMATS, ExportError, export_query, get_table, make_encoder
+from ..users import UserSent, current_superuser
+
+router = APIRouter()
+
+
+@router.get("/admin/export/{table_name}")
+async def export_table(
+    table_name: str,
+    format: Literal["csv", "parquet"] = "csv",
+    after: Optional[int] = None,
+    current_user: UserSent = Depends(current_superuser),
+) -> StreamingResponse:
+    """
+    Stream a whole table as gzip-compressed CSV or Parquet.
+
+    Rows come from a server-side cursor in primary key order, so memory use
+    does not grow with the table. An interrupted download is resumed by
+    passing the last id received as after; resumed CSV has no header row and
+    can be appended to the partial file.
+
+    Parameters:
+        table_name (str): Table to export, e.g. "fridge_logs" (path parameter).
+        format (str): "csv" (default) or "parquet" (query parameter).
+        after (Optional[int]): Only export rows with an id above this (query parameter).
+        current_user (UserSent): The authenticated superuser (provided by dependency injection).
+
+    Returns:
+        StreamingResponse: The encoded table.
+
+    Raises:
+        HTTPException: 403 if the user is not a superuser, 404 if the table
+        does not exist or holds credentials (users), 501 if Parquet is requested without pyarrow installed.
+    """
+    try:
+        table = get_table(table_name, private=False)
+    except ExportError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    try:
+        encoder = make_encoder(format, table, header=after is None)
+    except ExportError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+
+    async def body():
+        async with async_engine.connect() as connection:
+            result = await connection.stream(export_query(table, after, EXPORT_BATCH_SIZE))
+            async for rows in result.partitions():
+                data = encoder.write(rows)
+                if data:
+                    yield data
+        yield encoder.close()
+
+    suffix, media_type = FORMATS[format]
+    return StreamingResponse(
+        body(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{table.name}{suffix}"'},
+    )
@@ -0,0 +1,201 @@
+from datetime import date, timedelta
+from typing import Literal, Optional
+
+import sqlalchemy as sa
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import models, schemas
+from ..database import AsyncSessionLocal
+from ..users import current_active_user
+from ..schemas import User as UserSchema
+
+router = APIRouter()
+
+# Range used when start_date/end_date are not given
+DEFAULT_RANGE_DAYS = 30
+
+
+async def get_db():
+    db = AsyncSessionLocal()
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+def date_range(start_date: Optional[date], end_date: Optional[date]) -> tuple[date, date]:
+    """
+    Fill in a missing end (today) and start (DEFAULT_RANGE_DAYS days before the end).
+
+    Raises:
+        HTTPException: 400 error if start_date is after end_date.
+    """
+    end_date = end_date or date.today()
+    start_date = start_date or end_date - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must not be after end_date")
+    return start_date, end_date
+
+
+def usage_query(user_id: int, start_date: date, end_date: date) -> sa.Select:
+    """
+    Sum a user's daily fridge rollups per ingredient and unit over a date range.
+
+    Returns:
+        sa.Select: One row per ingredient and unit with ingredient_id, name,
+        unit, added, consumed and wasted.
+    """
+    daily = models.FridgeLogDaily
+    return (
+        sa.select(
+            daily.ingredient_id,
+            models.Ingredient.name,
+            daily.unit,
+            func.sum(daily.added).label("added"),
+            func.sum(daily.consumed).label("consumed"),
+            func.sum(daily.wasted).label("wasted"),
+        )
+        .join(models.Ingredient, daily.ingredient_id == models.Ingredient.id)
+        .where(daily.user_id == user_id, daily.day >= start_date, daily.day <= end_date)
+        .group_by(daily.ingredient_id, models.Ingredient.name, daily.unit)
+    )
+
+
+def to_usage(row: sa.Row, days: int) -> dict:
+    taken_out = row.consumed + row.wasted
+    return {
+        "ingredient_id": row.ingredient_id,
+        "name": row.name,
+        "unit": row.unit,
+        "added": row.added,
+        "consumed": row.consumed,
+        "wasted": row.wasted,
+        "daily_consumption": row.consumed / days,
+        "waste_rate": row.wasted / taken_out if taken_out else None,
+    }
+
+
+@router.get("/analytics/consumption", response_model=list[schemas.IngredientUsage])
+async def get_consumption(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    limit: int = 50,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserSchema = Depends(current_active_user),
+) -> list[dict]:
+    """
+    Retrieve the user's most consumed ingredients and their consumption rate.
+
+    Computed from the daily fridge log rollups, so the cost depends on the
+    number of days and ingredients, not on the number of fridge changes.
+    Amounts are in base units (g, ml or pcs); an ingredient kept in units
+    of several dimensions gets one row per unit.
+
+    Parameters:
+        start_date (Optional[date]): First day included (query parameter, default 30 days before end_date).
+        end_date (Optional[date]): Last day included (query parameter, default today).
+        limit (int): Maximum number of ingredients to return (query parameter, default 50).
+        db (AsyncSession): SQLAlchemy async database session (provided by dependency injection).
+
+    Returns:
+        list[dict]: Ingredient usage per unit, most consumed first.
+
+    Raises:
+        HTTPException: 400 error if start_date is after end_date.
+    """
+    start_date, end_date = date_range(start_date, end_date)
+    stmt = usage_query(current_user.id, start_date, end_date)
+    stmt = stmt.order_by(
+        sa.desc("consumed"), models.FridgeLogDaily.ingredient_id, models.FridgeLogDaily.unit
+    ).limit(limit)
+    days = (end_date - start_date).days + 1
+    return [to_usage(row, days) for row in await db.execute(stmt)]
+
+
+@router.get("/analytics/waste", response_model=list[schemas.IngredientUsage])
+async def get_waste(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    limit: int = 50,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserSchema = Depends(current_active_user),
+) -> list[dict]:
+    """
+    Retrieve the ingredients the user threw away after they expired.
+
+    Parameters:
+        start_date (Optional[date]): First day included (query parameter, default 30 days before end_date).
+        end_date (Optional[date]): Last day included (query parameter, default today).
+        limit (int): Maximum number of ingredients to return (query parameter, default 50).
+        db (AsyncSession): SQLAlchemy async database session (provided by dependency injection).
+
+    Returns:
+        list[dict]: Usage per unit of ingredients with any waste, most wasted first.
+
+    Raises:
+        HTTPException: 400 error if start_date is after end_date.
+    """
+    start_date, end_date = date_range(start_date, end_date)
+    stmt = usage_query(current_user.id, start_date, end_date)
+    stmt = (
+        stmt.having(func.sum(models.FridgeLogDaily.wasted) > 0)
+        .order_by(sa.desc("wasted"), models.FridgeLogDaily.ingredient_id, models.FridgeLogDaily.unit)
+        .limit(limit)
+    )
+    days = (end_date - start_date).days + 1
+    return [to_usage(row, days) for row in await db.execute(stmt)]
+
+
+@router.get("/analytics/trends/{ingredient_id}", response_model=list[schemas.UsageTrendPoint])
+async def get_usage_trend(
+    ingredient_id: int,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    bucket: Literal["day", "week"] = "day",
+    db: AsyncSession = Depends(get_db),
+    current_user: UserSchema = Depends(current_active_user),
+) -> list[dict]:
+    """
+    Retrieve how much of an ingredient the user added, consumed and wasted per day or week.
+
+    Periods without fridge activity are left out. Weeks start on Monday.
+    A period with amounts in several units gets one point per unit.
+
+    Parameters:
+        ingredient_id (int): The ingredient (path parameter).
+        start_date (Optional[date]): First day included (query parameter, default 30 days before end_date).
+        end_date (Optional[date]): Last day included (query parameter, default today).
+        bucket (str): "day" (default) or "week" (query parameter).
+        db (AsyncSession): SQLAlchemy async database session (provided by dependency injection).
+
+    Returns:
+        list[dict]: One point per period and unit with activity, oldest first.
+
+    Raises:
+        HTTPException: 400 error if start_date is after end_date.
+    """
+    start_date, end_date = date_range(start_date, end_date)
+    daily = models.FridgeLogDaily
+    rows = await db.execute(
+        sa.select(daily.day, daily.unit, daily.added, daily.consumed, daily.wasted)
+        .where(
+            daily.user_id == current_user.id,
+            daily.ingredient_id == ingredient_id,
+            daily.day >= start_date,
+            daily.day <= end_date,
+        )
+        .order_by(daily.day, daily.unit)
+    )
+    points: dict[tuple[date, str], dict] = {}
+    for day, unit, added, consumed, wasted in rows:
+        period_start = day - timedelta(days=day.weekday()) if bucket == "week" else day
+        point = points.setdefault(
+            (period_start, unit),
+            {"period_start": period_start, "unit": unit, "added": 0.0, "consumed": 0.0, "wasted": 0.0},
+        )
+        point["added"] += added
+        point["consumed"] += consumed
+        point["wasted"] += wasted
+    return list(points.values())
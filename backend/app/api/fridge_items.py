@@ -1,25 +1,77 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from datetime import date, timedelta
+from typing import Any, NamedTuple, Optional, Sequence
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import Row, Select, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from .. import models, schemas
-from ..database import SessionLocal
+from ..catalogue import catalogue
+from ..database import AsyncSessionLocal
+from ..expiry import expiring_cache, expiring_query, to_rows
+from ..fridge_log import fridge_log_writer
+from ..pagination import paginate, set_next_cursor
+from ..serialization import FAST_JSON_RESPONSES, fast_json_response
+from ..shopping_list_cache import shopping_list_cache
+from ..streaming import ndjson_response, stream_rows, wants_ndjson
+from ..units import to_base
 from ..users import current_active_user
 from ..schemas import User as UserSchema
 
 router = APIRouter()
 
 
-def get_db():
-    db = SessionLocal()
+async def get_db():
+    db = AsyncSessionLocal()
     try:
         yield db
     finally:
-        db.close()
+        await db.close()
+
+
+# Largest number of operations accepted by POST /fridge_items/batch
+MAX_BATCH_OPERATIONS = 1000
+
+
+class FridgeStock(NamedTuple):
+    """The logged state of a fridge item."""
+
+    ingredient_id: int
+    quantity: float
+    unit: str
+    expiration_date: Optional[date]
+
+
+def fridge_stock(item: Any) -> FridgeStock:
+    """Snapshot a models.FridgeItem before it is changed or expired by a commit."""
+    return FridgeStock(item.ingredient_id, item.quantity, item.unit, item.expiration_date)
+
+
+async def log_add(user_id: int, stock: FridgeStock) -> None:
+    await fridge_log_writer.log(user_id, stock.ingredient_id, stock.quantity, stock.unit, "add")
+
+
+async def log_update(user_id: int, old: FridgeStock, new: FridgeStock) -> None:
+    old_amount, old_unit = to_base(old.quantity, old.unit)
+    new_amount, new_unit = to_base(new.quantity, new.unit)
+    if (new.ingredient_id, new_unit) != (old.ingredient_id, old_unit):
+        # amounts of another dimension or ingredient do not subtract
+        await fridge_log_writer.log(user_id, old.ingredient_id, -old.quantity, old.unit, "remove")
+        await log_add(user_id, new)
+    elif new_amount != old_amount:
+        await fridge_log_writer.log(user_id, new.ingredient_id, new_amount - old_amount, new_unit, "update")
+
+
+async def log_delete(user_id: int, stock: FridgeStock) -> None:
+    expired = stock.expiration_date is not None and stock.expiration_date < date.today()
+    await fridge_log_writer.log(
+        user_id, stock.ingredient_id, -stock.quantity, stock.unit, "waste" if expired else "remove"
+    )
 
 
 @router.post("/fridge_items/", response_model=schemas.FridgeItem)
-def create_fridge_item(
+async def create_fridge_item(
     item: schemas.FridgeItemCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: UserSchema = Depends(current_active_user),
 ):
     """
@@ -27,7 +79,7 @@ def create_fridge_item(
 
     Parameters:
         fridge_item (schemas.FridgeItemCreate): The fridge item data to create (request body).
-        db (Session): SQLAlchemy database session (provided by dependency injection).
+        db (AsyncSession): SQLAlchemy async database session (provided by dependency injection).
 
     Returns:
         models.FridgeItem: The created fridge item.
@@ -36,63 +88,121 @@ def create_fridge_item(
     data["user_id"] = current_user.id
     db_item = models.FridgeItem(**data)
     db.add(db_item)
-    db.commit()
-    db.refresh(db_item)
+    await db.commit()
+    await db.refresh(db_item)
+    shopping_list_cache.invalidate_user(current_user.id)
+    expiring_cache.invalidate_user(current_user.id)
+    await log_add(current_user.id, fridge_stock(db_item))
     return db_item
 
 
+# FridgeItem columns of a list row; name comes from the catalogue
+FRIDGE_LIST_FIELDS = [field for field in schemas.FridgeNamedItem.model_fields if field != "name"]
+
+
+def fridge_list_query(user_id: int) -> Select:
+    """
+    Select a user's fridge items as plain rows of the FridgeNamedItem columns,
+    without hydrating FridgeItem entities into the session.
+    """
+    return select(*(getattr(models.FridgeItem, field) for field in FRIDGE_LIST_FIELDS)).where(
+        models.FridgeItem.user_id == user_id
+    )
+
+
+async def name_fridge_rows(db: AsyncSession, rows: Sequence[Row]) -> list[dict]:
+    """
+    Turn fridge_list_query rows into FridgeNamedItem dicts, naming ingredients from the catalogue.
+    """
+    ingredients = (await catalogue.get(db, ingredient_ids={row.ingredient_id for row in rows})).ingredients
+    return [
+        {**row._asdict(), "name": ingredients[row.ingredient_id].name}
+        for row in rows
+        # as with the former inner join, items of a deleted ingredient are left out
+        if row.ingredient_id in ingredients
+    ]
+
+
 @router.get("/fridge_items/", response_model=list[schemas.FridgeNamedItem])
-def list_fridge_items(
+async def list_fridge_items(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
     current_user: UserSchema = Depends(current_active_user),
 ):
     """
-    Retrieve a list of fridge items, paginated by skip and limit.
+    Retrieve a list of fridge items ordered by ID, paginated by cursor or by skip and limit.
+
+    Ingredient names come from the in-memory catalogue rather than a join.
+    With FAST_JSON_RESPONSES the rows are encoded with orjson instead of being
+    validated against the response model. With "Accept: application/x-ndjson"
+    every item from the cursor or skip position on is streamed, one JSON
+    object per line, and limit is ignored.
 
     Parameters:
         skip (int): Number of records to skip for pagination (query parameter, default 0).
         limit (int): Maximum number of records to return (query parameter, default 100).
-        db (Session): SQLAlchemy database session (provided by dependency injection).
+        cursor (Optional[str]): Opaque cursor from the X-Next-Cursor header of the previous page; when given, skip is ignored (query parameter).
+        db (AsyncSession): SQLAlchemy async database session (provided by dependency injection).
 
     Returns:
-        list[models.FridgeItem]: List of fridge items.
+        list[models.FridgeItem]: List of fridge items, or a streamed NDJSON response.
     """
-    results = (
-        db.query(
-            models.FridgeItem,
-            models.Ingredient.name.label("name"),
-        )
-        .join(models.Ingredient, models.FridgeItem.ingredient_id == models.Ingredient.id)
-        .filter(models.FridgeItem.user_id == current_user.id)
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
+    if wants_ndjson(request):
+        stmt = paginate(fridge_list_query(current_user.id), [models.FridgeItem.id], [int], cursor, skip, None)
+        return ndjson_response(stream_rows(stmt, name_fridge_rows))
+    stmt = paginate(fridge_list_query(current_user.id), [models.FridgeItem.id], [int], cursor, skip, limit)
+    results = (await db.execute(stmt)).all()
+    set_next_cursor(response, results, lambda row: (row.id,), limit)
+    items = await name_fridge_rows(db, results)
+    if FAST_JSON_RESPONSES:
+        # the rows are already plain dicts of the schema's fields
+        return fast_json_response(schemas.FridgeNamedItem, items, response.headers)
+    return items
 
-    response = [
-        {
-            **{
-                field: getattr(fridge_item, field)
-                for field in schemas.FridgeNamedItem.model_fields
-                if field != "name"
-            },
-            "name": name,
-        }
-        for fridge_item, name in results
-    ]
-    return response
+
+@router.get("/fridge_items/expiring", response_model=list[schemas.FridgeNamedItem])
+async def list_expiring_fridge_items(
+    days: int = Query(3, ge=0, le=365),
+    include_expired: bool = False,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserSchema = Depends(current_active_user),
+) -> list[dict]:
+    """
+    Retrieve the user's fridge items expiring within the next days, soonest first.
+
+    Served from the expiry scanner's cache when it has a scan from today
+    covering the range, otherwise through the partial index on
+    (user_id, expiration_date).
+
+    Parameters:
+        days (int): Include items expiring up to this many days from today (query parameter, default 3).
+        include_expired (bool): Also include items already past their expiration date (query parameter, default false).
+        db (AsyncSession): SQLAlchemy async database session (provided by dependency injection).
+
+    Returns:
+        list[dict]: Expiring fridge items with ingredient names.
+    """
+    today = date.today()
+    until = today + timedelta(days=days)
+    rows = expiring_cache.get(current_user.id, until, include_expired)
+    if rows is None:
+        stmt = expiring_query(until, None if include_expired else today, current_user.id)
+        rows = to_rows(await db.execute(stmt), list(schemas.FridgeNamedItem.model_fields))
+    return rows
 
 
 @router.get("/fridge_items/{item_id}", response_model=schemas.FridgeItem)
-def get_fridge_item(item_id: int, db: Session = Depends(get_db)):
+async def get_fridge_item(item_id: int, db: AsyncSession = Depends(get_db)):
     """
     Retrieve a single fridge item by its ID.
 
     Parameters:
         fridge_item_id (int): The ID of the fridge item to retrieve (path parameter).
-        db (Session): SQLAlchemy database session (provided by dependency injection).
+        db (AsyncSession): SQLAlchemy async database session (provided by dependency injection).
 
     Returns:
         models.FridgeItem: The fridge item with all fields.
@@ -100,24 +210,24 @@ def get_fridge_item(item_id: int, db: Session = Depends(get_db)):
     Raises:
         HTTPException: 404 error if the fridge item is not found.
     """
-    item = db.query(models.FridgeItem).filter(models.FridgeItem.id == item_id).first()
+    item = await db.get(models.FridgeItem, item_id)
     if not item:
         raise HTTPException(status_code=404, detail="Fridge item not found")
     return item
 
 
 @router.delete("/fridge_items/{fridge_item_id}", response_model=schemas.FridgeItem)
-def delete_fridge_item(
+async def delete_fridge_item(
     fridge_item_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: UserSchema = Depends(current_active_user),
 ) -> models.FridgeItem:
     """
-    Delete a fridge item by its ID.
+    Delete a fridge item by its ID. Items past their expiration date are logged as waste.
 
     Parameters:
         fridge_item_id (int): The ID of the fridge item to delete (path parameter).
-        db (Session): SQLAlchemy database session (provided by dependency injection).
+        db (AsyncSession): SQLAlchemy async database session (provided by dependency injection).
 
     Returns:
         models.FridgeItem: The deleted fridge item.
@@ -125,27 +235,26 @@ def delete_fridge_item(
     Raises:
         HTTPException: 404 error if the fridge item is not found.
     """
-    fridge_item = (
-        db.query(models.FridgeItem)
-        .filter(models.FridgeItem.id == fridge_item_id)
-        .first()
-    )
+    fridge_item = await db.get(models.FridgeItem, fridge_item_id)
     if not fridge_item:
         raise HTTPException(status_code=404, detail="Fridge item not found")
     # Ensure ownership
     owner_id = getattr(fridge_item, 'user_id')
     if owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to delete this item")
-    db.delete(fridge_item)
-    db.commit()
+    await db.delete(fridge_item)
+    await db.commit()
+    shopping_list_cache.invalidate_user(current_user.id)
+    expiring_cache.invalidate_user(current_user.id)
+    await log_delete(current_user.id, fridge_stock(fridge_item))
     return fridge_item
 
 
 @router.put("/fridge_items/{fridge_item_id}", response_model=schemas.FridgeItem)
-def update_fridge_item(
+async def update_fridge_item(
     fridge_item_id: int,
     fridge_item: schemas.FridgeItemCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: UserSchema = Depends(current_active_user),
 ) -> models.FridgeItem:
     """
@@ -154,7 +263,7 @@ def update_fridge_item(
     Parameters:
         fridge_item_id (int): The ID of the fridge item to update (path parameter).
         fridge_item (schemas.FridgeItemCreate): The new fridge item data (request body).
-        db (Session): SQLAlchemy database session (provided by dependency injection).
+        db (AsyncSession): SQLAlchemy async database session (provided by dependency injection).
 
     Returns:
         models.FridgeItem: The updated fridge item.
@@ -162,20 +271,110 @@ def update_fridge_item(
     Raises:
         HTTPException: 404 error if the fridge item is not found.
     """
-    db_fridge_item = (
-        db.query(models.FridgeItem)
-        .filter(models.FridgeItem.id == fridge_item_id)
-        .first()
-    )
+    db_fridge_item = await db.get(models.FridgeItem, fridge_item_id)
     if not db_fridge_item:
         raise HTTPException(status_code=404, detail="Fridge item not found")
     owner_id = getattr(db_fridge_item, 'user_id')
     if owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to update this item")
+    old = fridge_stock(db_fridge_item)
     # Update the fridge item fields
     for key, value in fridge_item.model_dump().items():
         setattr(db_fridge_item, key, value)
 
-    db.commit()
-    db.refresh(db_fridge_item)
+    await db.commit()
+    await db.refresh(db_fridge_item)
+    shopping_list_cache.invalidate_user(current_user.id)
+    expiring_cache.invalidate_user(current_user.id)
+    await log_update(current_user.id, old, fridge_stock(db_fridge_item))
     return db_fridge_item
+
+
+@router.post("/fridge_items/batch", response_model=list[schemas.FridgeItemOperationResult])
+async def batch_fridge_items(
+    operations: list[schemas.FridgeItemOperation],
+    db: AsyncSession = Depends(get_db),
+    current_user: UserSchema = Depends(current_active_user),
+) -> list[dict]:
+    """
+    Create, update and delete several fridge items in one transaction.
+
+    The items to update or delete are loaded and ownership-checked with a
+    single query, and all creates go in one multi-row INSERT. Operations
+    that cannot be applied (unknown or foreign item, missing id or item
+    data) are skipped and reported with their status; the rest are
+    applied in order and committed together.
+
+    Parameters:
+        operations (list[schemas.FridgeItemOperation]): Operations to apply, in order (request body).
+        db (AsyncSession): SQLAlchemy async database session (provided by dependency injection).
+
+    Returns:
+        list[dict]: One result per operation, in request order.
+
+    Raises:
+        HTTPException: 413 error if more than MAX_BATCH_OPERATIONS operations are sent.
+    """
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_OPERATIONS} operations per request")
+
+    ids = {operation.id for operation in operations if operation.op != "create" and operation.id is not None}
+    existing = {
+        item.id: item
+        for item in (await db.scalars(select(models.FridgeItem).where(models.FridgeItem.id.in_(ids)))).all()
+    }
+
+    results: list[dict] = []
+    creates: list[tuple[int, dict]] = []
+    updates: list[tuple[models.FridgeItem, FridgeStock]] = []
+    deletes: list[FridgeStock] = []
+    for operation in operations:
+        result: dict = {"op": operation.op, "status": 200, "item": None, "detail": None}
+        results.append(result)
+        if operation.op != "delete" and operation.item is None:
+            result.update(status=422, detail="item is required")
+            continue
+        data = operation.item.model_dump() if operation.item is not None else {}
+        if operation.op == "create":
+            creates.append((len(results) - 1, {**data, "user_id": current_user.id}))
+            continue
+        if operation.id is None:
+            result.update(status=422, detail="id is required")
+            continue
+        item = existing.get(operation.id)
+        if item is None:
+            result.update(status=404, detail="Fridge item not found")
+            continue
+        if item.user_id != current_user.id:
+            result.update(status=403, detail=f"Not authorized to {operation.op} this item")
+            continue
+        if operation.op == "update":
+            updates.append((item, fridge_stock(item)))
+            for key, value in data.items():
+                setattr(item, key, value)
+        else:
+            # later operations on the same id see it gone
+            del existing[item.id]
+            deletes.append(fridge_stock(item))
+            await db.delete(item)
+        result["item"] = item
+
+    if creates:
+        created = await db.scalars(
+            insert(models.FridgeItem).returning(models.FridgeItem, sort_by_parameter_order=True),
+            [data for _, data in creates],
+        )
+        for (index, _), item in zip(creates, created.all()):
+            results[index]["item"] = item
+    await db.commit()
+
+    if creates or updates or deletes:
+        shopping_list_cache.invalidate_user(current_user.id)
+        expiring_cache.invalidate_user(current_user.id)
+    for index, _ in creates:
+        await log_add(current_user.id, fridge_stock(results[index]["item"]))
+    for item, old in updates:
+        await log_update(current_user.id, old, fridge_stock(item))
+    for stock in deletes:
+        await log_delete(current_user.id, stock)
+    return results
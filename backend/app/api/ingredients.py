@@ -1,58 +1,93 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from .. import models, schemas
-from ..database import SessionLocal
+from ..catalogue import catalogue
+from ..database import AsyncSessionLocal
+from ..http_cache import conditional, make_etag, table_state
+from ..pagination import paginate, set_next_cursor
+from ..shopping_list_cache import shopping_list_cache
+from ..streaming import ndjson_response, row_dicts, stream_rows, wants_ndjson
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
+async def get_db():
+    db = AsyncSessionLocal()
     try:
         yield db
     finally:
-        db.close()
+        await db.close()
 
 @router.post("/ingredients/", response_model=schemas.Ingredient)
-def create_ingredient(ingredient: schemas.IngredientCreate, db: Session = Depends(get_db)) -> models.Ingredient:
+async def create_ingredient(ingredient: schemas.IngredientCreate, db: AsyncSession = Depends(get_db)) -> models.Ingredient:
     """
     Create a new ingredient with the provided data.
 
     Parameters:
         ingredient (schemas.IngredientCreate): The ingredient data to create (request body).
-        db (Session): SQLAlchemy database session (provided by dependency injection).
+        db (AsyncSession): SQLAlchemy async database session (provided by dependency injection).
 
     Returns:
         models.Ingredient: The created ingredient including all fields.
     """
     db_ingredient = models.Ingredient(**ingredient.model_dump())
     db.add(db_ingredient)
-    db.commit()
-    db.refresh(db_ingredient)
+    await db.commit()
+    await db.refresh(db_ingredient)
+    await catalogue.changed(db)
     return db_ingredient
 
 @router.get("/ingredients/", response_model=list[schemas.Ingredient])
-def list_ingredients(skip: int = 0, limit: int = 200, db: Session = Depends(get_db)) -> list[models.Ingredient]:
+async def list_ingredients(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 200,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+) -> list[models.Ingredient] | Response:
     """
-    Retrieve a list of ingredients, paginated by skip and limit.
+    Retrieve a list of ingredients ordered by ID, paginated by cursor or by skip and limit.
+
+    Supports conditional GET: the ETag is derived from the ingredient count and
+    latest updated_at, so a client sending it back in If-None-Match gets a 304
+    without the page being queried or serialized. With
+    "Accept: application/x-ndjson" every ingredient from the cursor or skip
+    position on is streamed, one JSON object per line, and limit is ignored.
 
     Parameters:
         skip (int): Number of records to skip for pagination (query parameter, default 0).
-        limit (int): Maximum number of records to return (query parameter, default 100).
-        db (Session): SQLAlchemy database session (provided by dependency injection).
+        limit (int): Maximum number of records to return (query parameter, default 200).
+        cursor (Optional[str]): Opaque cursor from the X-Next-Cursor header of the previous page; when given, skip is ignored (query parameter).
+        db (AsyncSession): SQLAlchemy async database session (provided by dependency injection).
 
     Returns:
-        list[models.Ingredient]: List of ingredients.
+        list[models.Ingredient]: List of ingredients, an empty 304 response, or a streamed NDJSON response.
     """
-    return db.query(models.Ingredient).offset(skip).limit(limit).all()
+    if wants_ndjson(request):
+        columns = [getattr(models.Ingredient, field) for field in schemas.Ingredient.model_fields]
+        stmt = paginate(select(*columns), [models.Ingredient.id], [int], cursor, skip, None)
+        return ndjson_response(stream_rows(stmt, row_dicts))
+    count, last_modified = (await db.execute(table_state(models.Ingredient.updated_at))).one()
+    etag = make_etag(request, count, last_modified)
+    not_modified = conditional(request, response, etag, last_modified)
+    if not_modified is not None:
+        return not_modified
+    stmt = paginate(select(models.Ingredient), [models.Ingredient.id], [int], cursor, skip, limit)
+    ingredients = list((await db.scalars(stmt)).all())
+    set_next_cursor(response, ingredients, lambda i: (i.id,), limit)
+    return ingredients
 
 @router.get("/ingredients/{ingredient_id}", response_model=schemas.Ingredient)
-def get_ingredient(ingredient_id: int, db: Session = Depends(get_db)) -> models.Ingredient:
+async def get_ingredient(ingredient_id: int, db: AsyncSession = Depends(get_db)) -> models.Ingredient:
     """
     Retrieve a single ingredient by its ID.
 
     Parameters:
         ingredient_id (int): The ID of the ingredient to retrieve (path parameter).
-        db (Session): SQLAlchemy database session (provided by dependency injection).
+        db (AsyncSession): SQLAlchemy async database session (provided by dependency injection).
 
     Returns:
         models.Ingredient: The ingredient with all fields.
@@ -60,19 +95,19 @@ def get_ingredient(ingredient_id: int, db: Session = Depends(get_db)) -> models.
     Raises:
         HTTPException: 404 error if the ingredient is not found.
     """
-    ingredient = db.query(models.Ingredient).filter(models.Ingredient.id == ingredient_id).first()
+    ingredient = await db.get(models.Ingredient, ingredient_id)
     if not ingredient:
         raise HTTPException(status_code=404, detail="Ingredient not found")
     return ingredient
 
 @router.delete("/ingredients/{ingredient_id}", response_model=schemas.Ingredient)
-def delete_ingredient(ingredient_id: int, db: Session = Depends(get_db)) -> models.Ingredient:
+async def delete_ingredient(ingredient_id: int, db: AsyncSession = Depends(get_db)) -> models.Ingredient:
     """
     Delete an ingredient by its ID.
 
     Parameters:
         ingredient_id (int): The ID of the ingredient to delete (path parameter).
-        db (Session): SQLAlchemy database session (provided by dependency injection).
+        db (AsyncSession): SQLAlchemy async database session (provided by dependency injection).
 
     Returns:
         models.Ingredient: The deleted ingredient.
@@ -80,9 +115,11 @@ def delete_ingredient(ingredient_id: int, db: Session = Depends(get_db)) -> mode
     Raises:
         HTTPException: 404 error if the ingredient is not found.
     """
-    ingredient = db.query(models.Ingredient).filter(models.Ingredient.id == ingredient_id).first()
+    ingredient = await db.get(models.Ingredient, ingredient_id)
     if not ingredient:
         raise HTTPException(status_code=404, detail="Ingredient not found")
-    db.delete(ingredient)
-    db.commit()
+    await db.delete(ingredient)
+    await db.commit()
+    shopping_list_cache.invalidate_all()
+    await catalogue.changed(db)
     return ingredient
\ No newline at end of file
@@ -1,58 +1,83 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from .. import models, schemas
-from ..database import SessionLocal
+from ..catalogue import catalogue
+from ..database import AsyncSessionLocal
+from ..http_cache import conditional, make_etag
+from ..pagination import paginate, set_next_cursor
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
+async def get_db():
+    db = AsyncSessionLocal()
     try:
         yield db
     finally:
-        db.close()
+        await db.close()
 
 @router.post("/meal_types/", response_model=schemas.MealType)
-def create_meal_type(meal_type: schemas.MealTypeCreate, db: Session = Depends(get_db)) -> models.MealType:
+async def create_meal_type(meal_type: schemas.MealTypeCreate, db: AsyncSession = Depends(get_db)) -> models.MealType:
     """
     Create a new meal type with the provided data.
 
     Parameters:
         meal_type (schemas.MealTypeCreate): The meal type data to create (request body).
-        db (Session): SQLAlchemy database session (provided by dependency injection).
+        db (AsyncSession): SQLAlchemy async database session (provided by dependency injection).
 
     Returns:
         models.MealType: The created meal type.
     """
     db_meal_type = models.MealType(**meal_type.model_dump())
     db.add(db_meal_type)
-    db.commit()
-    db.refresh(db_meal_type)
+    await db.commit()
+    await db.refresh(db_meal_type)
+    await catalogue.changed(db)
     return db_meal_type
 
 @router.get("/meal_types/", response_model=list[schemas.MealType])
-def list_meal_types(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)) -> list[models.MealType]:
+async def list_meal_types(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+) -> list[models.MealType] | Response:
     """
-    Retrieve a list of meal types, paginated by skip and limit.
+    Retrieve a list of meal types ordered by ID, paginated by cursor or by skip and limit.
+
+    Supports conditional GET. Meal types have no updated_at, so the ETag is a
+    hash of the (small) table's ids and names; a 304 skips serialization.
 
     Parameters:
         skip (int): Number of records to skip for pagination (query parameter, default 0).
         limit (int): Maximum number of records to return (query parameter, default 100).
-        db (Session): SQLAlchemy database session (provided by dependency injection).
+        cursor (Optional[str]): Opaque cursor from the X-Next-Cursor header of the previous page; when given, skip is ignored (query parameter).
+        db (AsyncSession): SQLAlchemy async database session (provided by dependency injection).
 
     Returns:
-        list[models.MealType]: List of meal types.
+        list[models.MealType]: List of meal types, or an empty 304 response.
     """
-    return db.query(models.MealType).offset(skip).limit(limit).all()
+    rows = (await db.execute(select(models.MealType.id, models.MealType.name).order_by(models.MealType.id))).all()
+    not_modified = conditional(request, response, make_etag(request, [tuple(row) for row in rows]))
+    if not_modified is not None:
+        return not_modified
+    stmt = paginate(select(models.MealType), [models.MealType.id], [int], cursor, skip, limit)
+    meal_types = list((await db.scalars(stmt)).all())
+    set_next_cursor(response, meal_types, lambda m: (m.id,), limit)
+    return meal_types
 
 @router.get("/meal_types/{meal_type_id}", response_model=schemas.MealType)
-def get_meal_type(meal_type_id: int, db: Session = Depends(get_db)) -> models.MealType:
+async def get_meal_type(meal_type_id: int, db: AsyncSession = Depends(get_db)) -> models.MealType:
     """
     Retrieve a single meal type by its ID.
 
     Parameters:
         meal_type_id (int): The ID of the meal type to retrieve (path parameter).
-        db (Session): SQLAlchemy database session (provided by dependency injection).
+        db (AsyncSession): SQLAlchemy async database session (provided by dependency injection).
 
     Returns:
         models.MealType: The meal type with all fields.
@@ -60,20 +85,20 @@ def get_meal_type(meal_type_id: int, db: Session = Depends(get_db)) -> models.Me
     Raises:
         HTTPException: 404 error if the meal type is not found.
     """
-    meal_type = db.query(models.MealType).filter(models.MealType.id == meal_type_id).first()
+    meal_type = await db.get(models.MealType, meal_type_id)
     if not meal_type:
         raise HTTPException(status_code=404, detail="Meal type not found")
     return meal_type
 
 @router.put("/meal_types/{meal_type_id}", response_model=schemas.MealType)
-def update_meal_type(meal_type_id: int, meal_type: schemas.MealTypeCreate, db: Session = Depends(get_db)) -> models.MealType:
+async def update_meal_type(meal_type_id: int, meal_type: schemas.MealTypeCreate, db: AsyncSession = Depends(get_db)) -> models.MealType:
     """
     Update an existing meal type by its ID.
 
     Parameters:
         meal_type_id (int): The ID of the meal type to update (path parameter).
         meal_type (schemas.MealTypeCreate): The new meal type data (request body).
-        db (Session): SQLAlchemy database session (provided by dependency injection).
+        db (AsyncSession): SQLAlchemy async database session (provided by dependency injection).
 
     Returns:
         models.MealType: The updated meal type.
@@ -81,23 +106,24 @@ def update_meal_type(meal_type_id: int, meal_type: schemas.MealTypeCreate, db: S
     Raises:
         HTTPException: 404 error if the meal type is not found.
     """
-    db_meal_type = db.query(models.MealType).filter(models.MealType.id == meal_type_id).first()
+    db_meal_type = await db.get(models.MealType, meal_type_id)
     if not db_meal_type:
         raise HTTPException(status_code=404, detail="Meal type not found")
     for key, value in meal_type.model_dump().items():
         setattr(db_meal_type, key, value)
-    db.commit()
-    db.refresh(db_meal_type)
+    await db.commit()
+    await db.refresh(db_meal_type)
+    await catalogue.changed(db)
     return db_meal_type
 
 @router.delete("/meal_types/{meal_type_id}", response_model=schemas.MealType)
-def delete_meal_type(meal_type_id: int, db: Session = Depends(get_db)) -> models.MealType:
+async def delete_meal_type(meal_type_id: int, db: AsyncSession = Depends(get_db)) -> models.MealType:
     """
     Delete a meal type by its ID.
 
     Parameters:
         meal_type_id (int): The ID of the meal type to delete (path parameter).
-        db (Session): SQLAlchemy database session (provided by dependency injection).
+        db (AsyncSession): SQLAlchemy async database session (provided by dependency injection).
 
     Returns:
         models.MealType: The deleted meal type.
@@ -105,9 +131,10 @@ def delete_meal_type(meal_type_id: int, db: Session = Depends(get_db)) -> models
     Raises:
         HTTPException: 404 error if the meal type is not found.
     """
-    db_meal_type = db.query(models.MealType).filter(models.MealType.id == meal_type_id).first()
+    db_meal_type = await db.get(models.MealType, meal_type_id)
     if not db_meal_type:
         raise HTTPException(status_code=404, detail="Meal type not found")
-    db.delete(db_meal_type)
-    db.commit()
+    await db.delete(db_meal_type)
+    await db.commit()
+    await catalogue.changed(db)
     return db_meal_type
\ No newline at end of file
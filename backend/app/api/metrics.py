@@ -0,0 +1,83 @@
+from fastapi import APIRouter, Depends
+
+from ..catalogue import catalogue
+from ..database import pool_stats
+from ..expiry import expiry_scanner
+from ..fridge_log import fridge_log_writer
+from ..passwords import password_hasher
+from ..shopping_list_cache import shopping_list_cache
+from ..users import current_superuser
+
+# pool, cache and queue internals are for operators only
+router = APIRouter(dependencies=[Depends(current_superuser)])
+
+
+@router.get("/metrics/pool")
+async def get_pool_metrics() -> dict:
+    """
+    Report connection pool usage for sizing pools per replica.
+
+    Returns:
+        dict: Pool configuration and, for the sync and async engines, the
+        checked-out/overflow counts and the checkout wait time histogram.
+    """
+    return pool_stats()
+
+
+@router.get("/metrics/password_hashing")
+async def get_password_hashing_metrics() -> dict:
+    """
+    Report load on the password hashing worker pool.
+
+    Returns:
+        dict: Worker and queue limits, in-flight and queued calls, rejected
+        calls and the hashing latency histogram.
+    """
+    return password_hasher.stats()
+
+
+@router.get("/metrics/shopping_list_cache")
+async def get_shopping_list_cache_metrics() -> dict:
+    """
+    Report shopping list cache usage.
+
+    Returns:
+        dict: Number of cached users and hit/miss counters.
+    """
+    return shopping_list_cache.stats()
+
+
+@router.get("/metrics/fridge_log")
+async def get_fridge_log_metrics() -> dict:
+    """
+    Report the fridge log write-behind buffer.
+
+    Returns:
+        dict: Batch and queue limits, queue depth, written/dropped/failed
+        event counters and the batch write time histogram.
+    """
+    return fridge_log_writer.stats()
+
+
+@router.get("/metrics/expiry_scanner")
+async def get_expiry_scanner_metrics() -> dict:
+    """
+    Report the expiry scanner and its cache.
+
+    Returns:
+        dict: Scan interval, number and duration of scans, the day and
+        horizon of the cached scan, cached users and hit/miss counters.
+    """
+    return expiry_scanner.stats()
+
+
+@router.get("/metrics/catalogue")
+async def get_catalogue_metrics() -> dict:
+    """
+    Report the ingredient and meal type catalogue cache.
+
+    Returns:
+        dict: Catalogue version and size, snapshot age, whether changes from
+        other processes are being listened for, and hit/load/invalidation counters.
+    """
+    return catalogue.stats()
@@ -1,79 +1,376 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, joinedload
+from datetime import date
+from typing import Optional, Sequence
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import Select, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, load_only, selectinload
 from .. import models, schemas
-from ..database import SessionLocal
+from ..catalogue import catalogue
+from ..cookable import Stock, cookable_index
+from ..database import AsyncSessionLocal
+from ..http_cache import conditional, make_etag, table_state
+from ..pagination import paginate, set_next_cursor
+from ..serialization import FAST_JSON_RESPONSES, fast_json_response, row_encoder
+from ..shopping_list_cache import shopping_list_cache
+from ..streaming import RowMapper, ndjson_response, row_dicts, stream_rows, wants_ndjson
+from ..units import normalize_unit
+from ..users import current_active_user
+from ..schemas import User as UserSchema
 
 router = APIRouter()
 
 
-def get_db():
-    db = SessionLocal()
+async def get_db():
+    db = AsyncSessionLocal()
     try:
         yield db
     finally:
-        db.close()
+        await db.close()
+
+
+# Largest batch accepted by POST /recipes/bulk
+MAX_BULK_RECIPES = 1000
+
+
+async def persist_recipes(db: AsyncSession, recipes: list[schemas.RecipeCreate]) -> list[models.Recipe]:
+    """
+    Create recipes together with their ingredient lines in the current transaction.
+
+    Ingredient names are resolved to Ingredient rows in one query, matching
+    case-insensitively and preferring the oldest row; names not found are created
+    with the recipe's unit as their default unit. All rows are flushed at once, so
+    each table gets a single multi-row INSERT, and ORM events still fire.
+
+    Parameters:
+        db (AsyncSession): SQLAlchemy async database session.
+        recipes (list[schemas.RecipeCreate]): The recipes to create.
+
+    Returns:
+        list[models.Recipe]: The created recipes, in input order, with their
+        ingredient lines and ingredients loaded.
+    """
+    wanted = {ing.name.strip().lower() for recipe in recipes for ing in recipe.ingredients}
+    ingredients: dict[str, models.Ingredient] = {}
+    if wanted:
+        found = await db.scalars(
+            select(models.Ingredient)
+            .where(func.lower(models.Ingredient.name).in_(wanted))
+            .order_by(models.Ingredient.id)
+        )
+        for ingredient in found.all():
+            ingredients.setdefault(ingredient.name.lower(), ingredient)
+
+    db_recipes = []
+    for recipe in recipes:
+        lines = []
+        for ing in recipe.ingredients:
+            name = ing.name.strip()
+            ingredient = ingredients.get(name.lower())
+            if ingredient is None:
+                ingredient = ingredients[name.lower()] = models.Ingredient(
+                    name=name, default_unit=normalize_unit(ing.unit) or ing.unit
+                )
+            lines.append(models.RecipeIngredient(ingredient=ingredient, quantity=ing.quantity, unit=ing.unit))
+        db_recipes.append(models.Recipe(**recipe.model_dump(exclude={"ingredients"}), recipe_ingredients=lines))
+    db.add_all(db_recipes)
+    await db.flush()
+    return db_recipes
 
 
 @router.post("/recipes/", response_model=schemas.Recipe)
-def create_recipe(recipe: schemas.RecipeCreate, db: Session = Depends(get_db)) -> models.Recipe:
+async def create_recipe(recipe: schemas.RecipeCreate, db: AsyncSession = Depends(get_db)) -> models.Recipe:
     """
-    Create a new recipe with the provided data.
+    Create a new recipe with the provided data, including its ingredients.
+
+    Ingredients are matched to existing ones by name (case-insensitive); unknown
+    names are created.
 
     Parameters:
         recipe (schemas.RecipeCreate): The recipe data to create (request body).
-        db (Session): SQLAlchemy database session (provided by dependency injection).
+        db (AsyncSession): SQLAlchemy async database session (provided by dependency injection).
 
     Returns:
         models.Recipe: The created recipe including all fields and relationships.
     """
-    recipe_dict = recipe.model_dump()
-    # TODO: Handle adding ingredients to ingredient-recipe table
-    ingredients = recipe_dict.pop("ingredients", None)
-    ingredients = [
-        schemas.IngredientInRecipe(**ing) for ing in ingredients
-    ]
-    db_recipe = models.Recipe(**recipe_dict)
-    db.add(db_recipe)
-    db.commit()
-    db.refresh(db_recipe)
+    db_recipe, = await persist_recipes(db, [recipe])
+    await db.commit()
+    # unknown ingredient names were created; other processes find new ids on lookup
+    catalogue.invalidate()
     return db_recipe
 
 
+@router.post("/recipes/bulk", response_model=list[schemas.Recipe])
+async def create_recipes_bulk(recipes: list[schemas.RecipeCreate], db: AsyncSession = Depends(get_db)) -> list[models.Recipe]:
+    """
+    Create many recipes, with their ingredients, in one transaction.
+
+    Parameters:
+        recipes (list[schemas.RecipeCreate]): The recipes to create (request body).
+        db (AsyncSession): SQLAlchemy async database session (provided by dependency injection).
+
+    Returns:
+        list[models.Recipe]: The created recipes, in request order.
+
+    Raises:
+        HTTPException: 413 error if more than MAX_BULK_RECIPES recipes are sent.
+    """
+    if len(recipes) > MAX_BULK_RECIPES:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_RECIPES} recipes per request")
+    if not recipes:
+        return []
+    db_recipes = await persist_recipes(db, recipes)
+    await db.commit()
+    catalogue.invalidate()
+    return db_recipes
+
+
+# Fields a sparse recipe listing may request; recipe_ingredients is the only relationship
+RECIPE_FIELDS = list(schemas.Recipe.model_fields)
+
+
+def parse_fields(fields: Optional[str]) -> Optional[list[str]]:
+    """
+    Parse a comma-separated sparse fieldset into schema field names.
+
+    Parameters:
+        fields (Optional[str]): Comma-separated field names, e.g. "id,name".
+
+    Returns:
+        Optional[list[str]]: The requested fields in schema order, always including id
+        (needed for the next-page cursor), or None when no fieldset was given.
+
+    Raises:
+        HTTPException: 400 error if a field is not part of the recipe schema.
+    """
+    if fields is None:
+        return None
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - set(RECIPE_FIELDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return [field for field in RECIPE_FIELDS if field in requested or field == "id"]
+
+
+def recipe_list_query(selected: Optional[list[str]] = None) -> Select:
+    """
+    Build the recipe listing query for a sparse fieldset.
+
+    Ingredients are fetched with selectinload, one extra IN query per page, so
+    paging applies to recipe rows rather than recipes x ingredients join rows.
+    Without recipe_ingredients only the selected columns are queried.
+
+    Parameters:
+        selected (Optional[list[str]]): Fields from parse_fields, or None for full recipes.
+
+    Returns:
+        Select: Statement yielding Recipe entities, or plain rows of the selected columns.
+    """
+    if selected is not None and "recipe_ingredients" not in selected:
+        return select(*(getattr(models.Recipe, field) for field in selected))
+    stmt = select(models.Recipe).options(
+        selectinload(models.Recipe.recipe_ingredients).joinedload(
+            models.RecipeIngredient.ingredient
+        )
+    )
+    if selected is not None:
+        columns = [getattr(models.Recipe, field) for field in selected if field != "recipe_ingredients"]
+        stmt = stmt.options(load_only(*columns))
+    return stmt
+
+
+def recipe_dicts(selected: Optional[list[str]] = None) -> RowMapper:
+    """
+    Build a row mapper turning Recipe entities from recipe_list_query into
+    dicts of the selected fields (all fields when None), for streaming.
+    """
+    fields = selected or RECIPE_FIELDS
+    encode_line = row_encoder(schemas.RecipeIngredient)
+
+    async def map_rows(db: AsyncSession, recipes: Sequence[models.Recipe]) -> list[dict]:
+        return [
+            {
+                field: (
+                    [encode_line(line) for line in recipe.recipe_ingredients]
+                    if field == "recipe_ingredients"
+                    else getattr(recipe, field)
+                )
+                for field in fields
+            }
+            for recipe in recipes
+        ]
+
+    return map_rows
+
+
 @router.get("/recipes/", response_model=list[schemas.Recipe])
-def list_recipes(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)) -> list[models.Recipe]:
+async def list_recipes(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+):
     """
-    Retrieve a list of recipes, paginated by skip and limit.
+    Retrieve a list of recipes ordered by ID, paginated by cursor or by skip and limit.
+
+    Supports conditional GET: the ETag is derived from the count and latest
+    change of recipes, recipe ingredient lines and ingredients (whose names are
+    embedded), so a client sending it back in If-None-Match gets a 304 without
+    the page being queried or serialized. With FAST_JSON_RESPONSES, full
+    recipes are encoded with orjson instead of being validated against the
+    response model. With "Accept: application/x-ndjson" every recipe from the
+    cursor or skip position on is streamed from a server-side cursor, one JSON
+    object per line, and limit is ignored.
 
     Parameters:
         skip (int): Number of records to skip for pagination (query parameter, default 0).
         limit (int): Maximum number of records to return (query parameter, default 100).
-        db (Session): SQLAlchemy database session (provided by dependency injection).
+        cursor (Optional[str]): Opaque cursor from the X-Next-Cursor header of the previous page; when given, skip is ignored (query parameter).
+        fields (Optional[str]): Comma-separated sparse fieldset, e.g. "id,name"; ingredients are only loaded when recipe_ingredients is listed (query parameter).
+        db (AsyncSession): SQLAlchemy async database session (provided by dependency injection).
 
     Returns:
-        list[models.Recipe]: List of recipes, each including related ingredients (name, quantity, unit).
+        list[models.Recipe] | JSONResponse: List of recipes, each including related ingredients
+        (name, quantity, unit), or only the requested fields when a fieldset is given;
+        an empty 304 response if the client's copy is current, or a streamed NDJSON response.
+
+    Raises:
+        HTTPException: 400 error if the cursor or a requested field is invalid.
     """
-    recipes = (
-        db.query(models.Recipe)
-        .options(
-            joinedload(models.Recipe.recipe_ingredients).joinedload(
-                models.RecipeIngredient.ingredient
+    selected = parse_fields(fields)
+    if wants_ndjson(request):
+        stmt = paginate(recipe_list_query(selected), [models.Recipe.id], [int], cursor, skip, None)
+        if selected is not None and "recipe_ingredients" not in selected:
+            return ndjson_response(stream_rows(stmt, row_dicts))
+        return ndjson_response(stream_rows(stmt, recipe_dicts(selected), scalars=True))
+    # recipe lines are never edited in place, so their count and max id track changes
+    state = (
+        await db.execute(
+            table_state(models.Recipe.updated_at, models.RecipeIngredient.id, models.Ingredient.updated_at)
+        )
+    ).one()
+    last_modified = max((value for value in (state[1], state[5]) if value is not None), default=None)
+    not_modified = conditional(request, response, make_etag(request, *state), last_modified)
+    if not_modified is not None:
+        return not_modified
+    stmt = paginate(recipe_list_query(selected), [models.Recipe.id], [int], cursor, skip, limit)
+    if selected is None:
+        recipes = list((await db.scalars(stmt)).all())
+        set_next_cursor(response, recipes, lambda r: (r.id,), limit)
+        if FAST_JSON_RESPONSES:
+            return fast_json_response(schemas.Recipe, recipes, response.headers)
+        return recipes
+
+    if "recipe_ingredients" in selected:
+        items = [
+            {
+                field: (
+                    [schemas.RecipeIngredient.model_validate(ri, from_attributes=True) for ri in recipe.recipe_ingredients]
+                    if field == "recipe_ingredients"
+                    else getattr(recipe, field)
+                )
+                for field in selected
+            }
+            for recipe in (await db.scalars(stmt)).all()
+        ]
+    else:
+        items = [row._asdict() for row in (await db.execute(stmt)).all()]
+    sparse = JSONResponse(jsonable_encoder(items), headers=dict(response.headers))
+    set_next_cursor(sparse, items, lambda r: (r["id"],), limit)
+    return sparse
+
+
+@router.get("/recipes/cookable", response_model=list[schemas.CookableRecipe])
+async def list_cookable_recipes(
+    limit: int = 10,
+    min_coverage: float = 0.0,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserSchema = Depends(current_active_user),
+) -> list[schemas.CookableRecipe]:
+    """
+    Rank recipes by how well the current user's fridge covers them.
+
+    Recipe ingredient sets come from a precomputed bitset index; only recipes that
+    can still reach the top results are checked against fridge quantities.
+    Expired fridge items are ignored.
+
+    Parameters:
+        limit (int): Maximum number of recipes to return (query parameter, default 10).
+        min_coverage (float): Minimum share of required ingredients covered, 0-1 (query parameter, default 0).
+        db (AsyncSession): SQLAlchemy async database session (provided by dependency injection).
+        current_user (UserSchema): The authenticated user (provided by dependency injection).
+
+    Returns:
+        list[schemas.CookableRecipe]: Recipes ordered by coverage, then by fewest missing ingredients,
+        each with the quantities still missing.
+    """
+    if cookable_index.stale:
+        recipes = await db.execute(select(models.Recipe.id, models.Recipe.name))
+        lines = await db.execute(
+            select(
+                models.RecipeIngredient.id,
+                models.RecipeIngredient.recipe_id,
+                models.RecipeIngredient.ingredient_id,
+                models.RecipeIngredient.quantity,
+                models.RecipeIngredient.unit,
+                models.RecipeIngredient.optional,
             )
         )
-        .offset(skip)
-        .limit(limit)
-        .all()
+        # building takes about a second per 500k ingredient lines; keep it off the event loop
+        await run_in_threadpool(cookable_index.rebuild, recipes.tuples().all(), lines.all())
+
+    fridge = await db.execute(
+        select(
+            models.FridgeItem.ingredient_id,
+            models.FridgeItem.quantity,
+            models.FridgeItem.unit,
+            models.Ingredient.default_unit,
+            models.Ingredient.density_g_per_ml,
+            models.Ingredient.grams_per_piece,
+        )
+        .join(models.Ingredient, models.FridgeItem.ingredient_id == models.Ingredient.id)
+        .where(models.FridgeItem.user_id == current_user.id)
+        .where(or_(models.FridgeItem.expiration_date.is_(None), models.FridgeItem.expiration_date >= date.today()))
     )
-    return recipes
+    ranked = cookable_index.rank(Stock(fridge.all()), limit, min_coverage)
+
+    missing_ids = {item["ingredient_id"] for recipe in ranked for item in recipe.missing}
+    names = {}
+    if missing_ids:
+        names = dict(
+            (await db.execute(
+                select(models.Ingredient.id, models.Ingredient.name).where(models.Ingredient.id.in_(missing_ids))
+            )).tuples().all()
+        )
+    return [
+        schemas.CookableRecipe(
+            id=recipe.id,
+            name=recipe.name,
+            coverage=recipe.coverage,
+            required=recipe.required,
+            missing=[
+                schemas.MissingIngredient(name=names.get(item["ingredient_id"], ""), **item)
+                for item in recipe.missing
+            ],
+        )
+        for recipe in ranked
+    ]
 
 
 @router.get("/recipes/{recipe_id}/", response_model=schemas.Recipe)
-def get_recipe(recipe_id: int, db: Session = Depends(get_db)) -> models.Recipe:
+async def get_recipe(recipe_id: int, db: AsyncSession = Depends(get_db)) -> models.Recipe:
     """
     Retrieve a single recipe by its ID.
 
     Parameters:
         recipe_id (int): The ID of the recipe to retrieve (path parameter).
-        db (Session): SQLAlchemy database session (provided by dependency injection).
+        db (AsyncSession): SQLAlchemy async database session (provided by dependency injection).
 
     Returns:
         models.Recipe: The recipe with all fields and related ingredients (name, quantity, unit).
@@ -81,29 +378,28 @@ def get_recipe(recipe_id: int, db: Session = Depends(get_db)) -> models.Recipe:
     Raises:
         HTTPException: 404 error if the recipe is not found.
     """
-    recipe = (
-        db.query(models.Recipe)
-        .options(
+    recipe = await db.get(
+        models.Recipe,
+        recipe_id,
+        options=[
             joinedload(models.Recipe.recipe_ingredients).joinedload(
                 models.RecipeIngredient.ingredient
             )
-        )
-        .filter(models.Recipe.id == recipe_id)
-        .first()
+        ],
     )
     if not recipe:
         raise HTTPException(status_code=404, detail="Recipe not found")
     return recipe
 
 @router.put("/recipes/{recipe_id}/", response_model=schemas.Recipe)
-def update_recipe(recipe_id: int, recipe: schemas.RecipeCreate, db: Session = Depends(get_db)) -> models.Recipe:
+async def update_recipe(recipe_id: int, recipe: schemas.RecipeCreate, db: AsyncSession = Depends(get_db)) -> models.Recipe:
     """
     Update an existing recipe by its ID.
 
     Parameters:
         recipe_id (int): The ID of the recipe to update (path parameter).
         recipe (schemas.RecipeCreate): The new recipe data (request body).
-        db (Session): SQLAlchemy database session (provided by dependency injection).
+        db (AsyncSession): SQLAlchemy async database session (provided by dependency injection).
 
     Returns:
         models.Recipe: The updated recipe including all fields and relationships.
@@ -111,7 +407,15 @@ def update_recipe(recipe_id: int, recipe: schemas.RecipeCreate, db: Session = De
     Raises:
         HTTPException: 404 error if the recipe is not found.
     """
-    db_recipe = db.query(models.Recipe).filter(models.Recipe.id == recipe_id).first()
+    db_recipe = await db.get(
+        models.Recipe,
+        recipe_id,
+        options=[
+            joinedload(models.Recipe.recipe_ingredients).joinedload(
+                models.RecipeIngredient.ingredient
+            )
+        ],
+    )
     if not db_recipe:
         raise HTTPException(status_code=404, detail="Recipe not found")
     
@@ -119,18 +423,18 @@ def update_recipe(recipe_id: int, recipe: schemas.RecipeCreate, db: Session = De
     for key, value in recipe.model_dump().items():
         setattr(db_recipe, key, value)
     
-    db.commit()
-    db.refresh(db_recipe)
+    await db.commit()
+    shopping_list_cache.invalidate_all()
     return db_recipe
 
 @router.delete("/recipes/{recipe_id}/", response_model=schemas.Recipe)
-def delete_recipe(recipe_id: int, db: Session = Depends(get_db)) -> models.Recipe:
+async def delete_recipe(recipe_id: int, db: AsyncSession = Depends(get_db)) -> models.Recipe:
     """
     Delete a recipe by its ID.
 
     Parameters:
         recipe_id (int): The ID of the recipe to delete (path parameter).
-        db (Session): SQLAlchemy database session (provided by dependency injection).
+        db (AsyncSession): SQLAlchemy async database session (provided by dependency injection).
 
     Returns:
         models.Recipe: The deleted recipe.
@@ -138,10 +442,19 @@ def delete_recipe(recipe_id: int, db: Session = Depends(get_db)) -> models.Recip
     Raises:
         HTTPException: 404 error if the recipe is not found.
     """
-    db_recipe = db.query(models.Recipe).filter(models.Recipe.id == recipe_id).first()
+    db_recipe = await db.get(
+        models.Recipe,
+        recipe_id,
+        options=[
+            joinedload(models.Recipe.recipe_ingredients).joinedload(
+                models.RecipeIngredient.ingredient
+            )
+        ],
+    )
     if not db_recipe:
         raise HTTPException(status_code=404, detail="Recipe not found")
     
-    db.delete(db_recipe)
-    db.commit()
+    await db.delete(db_recipe)
+    await db.commit()
+    shopping_list_cache.invalidate_all()
     return db_recipe
\ No newline at end of file
@@ -1,25 +1,45 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from collections import defaultdict
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import Select, case, delete, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from .. import models, schemas
-from ..database import SessionLocal
+from ..catalogue import catalogue
+from ..database import AsyncSessionLocal
+from ..expiry import expiring_cache
+from ..fridge_log import log_event, write_events
+from ..helpers import time_now
+from ..pagination import paginate, set_next_cursor
+from ..shopping_list_cache import shopping_list_cache
+from ..streaming import ndjson_response, row_dicts, stream_rows, wants_ndjson
+from ..units import Conversion, convert
 from ..users import current_active_user
 from ..schemas import User as UserSchema
-from typing import Optional
-from datetime import date
+from typing import Any, Iterable, Optional
+from datetime import date, timedelta
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
+# Limits of POST /schedule/bulk
+MAX_BULK_SCHEDULE = 1000
+MAX_PLAN_DAYS = 366
+
+async def get_db():
+    db = AsyncSessionLocal()
     try:
         yield db
     finally:
-        db.close()
+        await db.close()
+
+def schedule_slot(schedule: Any) -> tuple[int, date]:
+    """
+    The owner and date of a models.Schedule entry, which key its cached shopping lists.
+    """
+    return schedule.user_id, schedule.date
 
 @router.post("/schedule/", response_model=schemas.Schedule)
-def create_schedule(
+async def create_schedule(
     schedule: schemas.ScheduleCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: UserSchema = Depends(current_active_user),
 ) -> models.Schedule:
     """
@@ -27,7 +47,7 @@ def create_schedule(
 
     Parameters:
         schedule (schemas.ScheduleCreate): The schedule data to create (request body).
-        db (Session): SQLAlchemy database session (provided by dependency injection).
+        db (AsyncSession): SQLAlchemy async database session (provided by dependency injection).
 
     Returns:
         models.Schedule: The created schedule entry.
@@ -36,57 +56,94 @@ def create_schedule(
     data["user_id"] = current_user.id
     db_schedule = models.Schedule(**data)
     db.add(db_schedule)
-    db.commit()
-    db.refresh(db_schedule)
+    await db.commit()
+    await db.refresh(db_schedule)
+    shopping_list_cache.invalidate_dates(*schedule_slot(db_schedule))
     return db_schedule
 
+# Schedule columns of a list row; recipe_name comes from the joined recipe
+SCHEDULE_LIST_FIELDS = [field for field in schemas.ScheduleGet.model_fields if field != "recipe_name"]
+
+
+def schedule_list_query(user_id: int, start_date: Optional[date] = None, end_date: Optional[date] = None) -> Select:
+    """
+    Select a user's schedule entries as plain rows of the ScheduleGet fields.
+
+    Only the needed columns are queried, so rows are not hydrated into
+    Schedule entities or tracked by the session.
+
+    Parameters:
+        user_id (int): Owner of the entries.
+        start_date (Optional[date]): First date included.
+        end_date (Optional[date]): Last date included.
+
+    Returns:
+        Select: Rows with the Schedule columns of SCHEDULE_LIST_FIELDS and recipe_name.
+    """
+    query = select(
+        *(getattr(models.Schedule, field) for field in SCHEDULE_LIST_FIELDS),
+        models.Recipe.name.label("recipe_name"),
+    ).join(models.Recipe, models.Schedule.recipe_id == models.Recipe.id)
+    query = query.where(models.Schedule.user_id == user_id)
+    if start_date:
+        query = query.where(models.Schedule.date >= start_date)
+    if end_date:
+        query = query.where(models.Schedule.date <= end_date)
+    return query
+
+
 @router.get("/schedule/", response_model=list[schemas.ScheduleGet])
-def list_schedule(
+async def list_schedule(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: UserSchema = Depends(current_active_user),
-) -> list[schemas.ScheduleGet]:
+) -> list[dict[str, Any]] | Response:
     """
-    Retrieve a list of schedule entries, optionally filtered by date range, paginated by skip and limit.
+    Retrieve a list of schedule entries ordered by date and ID, optionally filtered by date range,
+    paginated by cursor or by skip and limit.
+
+    With "Accept: application/x-ndjson" every entry from the cursor or skip
+    position on is streamed, one JSON object per line, and limit is ignored.
 
     Parameters:
         skip (int): Number of records to skip for pagination (query parameter, default 0).
         limit (int): Maximum number of records to return (query parameter, default 100).
+        cursor (Optional[str]): Opaque cursor from the X-Next-Cursor header of the previous page; when given, skip is ignored (query parameter).
         start_date (Optional[date]): Filter for schedules on or after this date (query parameter).
         end_date (Optional[date]): Filter for schedules on or before this date (query parameter).
-        db (Session): SQLAlchemy database session (provided by dependency injection).
+        db (AsyncSession): SQLAlchemy async database session (provided by dependency injection).
 
     Returns:
-        list[schemas.ScheduleGet]: List of schedule entries with recipe names.
+        list[dict[str, Any]]: ScheduleGet rows of the entries with recipe names, or a streamed NDJSON response.
     """
-    query = db.query(models.Schedule, models.Recipe.name.label("recipe_name")).join(
-        models.Recipe, models.Schedule.recipe_id == models.Recipe.id
+    query = paginate(
+        schedule_list_query(current_user.id, start_date, end_date),
+        [models.Schedule.date, models.Schedule.id],
+        [date.fromisoformat, int],
+        cursor,
+        skip,
+        None if wants_ndjson(request) else limit,
     )
-    query = query.filter(models.Schedule.user_id == current_user.id)
-    if start_date:
-        query = query.filter(models.Schedule.date >= start_date)
-    if end_date:
-        query = query.filter(models.Schedule.date <= end_date)
-    results = query.offset(skip).limit(limit).all()
-    # Merge recipe_name into the Schedule object for response
-    schedules: list[schemas.ScheduleGet] = []
-    for schedule, recipe_name in results:
-        schedule_dict = schedule.__dict__.copy()
-        schedule_dict["recipe_name"] = recipe_name
-        schedules.append(schedule_dict)
-    return schedules
+    if wants_ndjson(request):
+        return ndjson_response(stream_rows(query, row_dicts))
+    results = (await db.execute(query)).all()
+    set_next_cursor(response, results, lambda row: (row.date, row.id), limit)
+    return [row._asdict() for row in results]
 
 @router.get("/schedule/{schedule_id}", response_model=schemas.Schedule)
-def get_schedule(schedule_id: int, db: Session = Depends(get_db)) -> models.Schedule:
+async def get_schedule(schedule_id: int, db: AsyncSession = Depends(get_db)) -> models.Schedule:
     """
     Retrieve a single schedule entry by its ID.
 
     Parameters:
         schedule_id (int): The ID of the schedule entry to retrieve (path parameter).
-        db (Session): SQLAlchemy database session (provided by dependency injection).
+        db (AsyncSession): SQLAlchemy async database session (provided by dependency injection).
 
     Returns:
         models.Schedule: The schedule entry with all fields.
@@ -94,20 +151,20 @@ def get_schedule(schedule_id: int, db: Session = Depends(get_db)) -> models.Sche
     Raises:
         HTTPException: 404 error if the schedule entry is not found.
     """
-    schedule = db.query(models.Schedule).filter(models.Schedule.id == schedule_id).first()
+    schedule = await db.get(models.Schedule, schedule_id)
     if not schedule:
         raise HTTPException(status_code=404, detail="Schedule not found")
     return schedule
 
 @router.put("/schedule/{schedule_id}", response_model=schemas.Schedule)
-def update_schedule(schedule_id: int, schedule_update: schemas.ScheduleCreate, db: Session = Depends(get_db)) -> models.Schedule:
+async def update_schedule(schedule_id: int, schedule_update: schemas.ScheduleCreate, db: AsyncSession = Depends(get_db)) -> models.Schedule:
     """
     Update an existing schedule entry by its ID.
 
     Parameters:
         schedule_id (int): The ID of the schedule entry to update (path parameter).
         schedule_update (schemas.ScheduleCreate): The new schedule data (request body).
-        db (Session): SQLAlchemy database session (provided by dependency injection).
+        db (AsyncSession): SQLAlchemy async database session (provided by dependency injection).
 
     Returns:
         models.Schedule: The updated schedule entry.
@@ -115,23 +172,25 @@ def update_schedule(schedule_id: int, schedule_update: schemas.ScheduleCreate, d
     Raises:
         HTTPException: 404 error if the schedule entry is not found.
     """
-    schedule = db.query(models.Schedule).filter(models.Schedule.id == schedule_id).first()
+    schedule = await db.get(models.Schedule, schedule_id)
     if not schedule:
         raise HTTPException(status_code=404, detail="Schedule not found")
+    user_id, old_date = schedule_slot(schedule)
     for key, value in schedule_update.model_dump().items():
         setattr(schedule, key, value)
-    db.commit()
-    db.refresh(schedule)
+    await db.commit()
+    await db.refresh(schedule)
+    shopping_list_cache.invalidate_dates(user_id, old_date, schedule_slot(schedule)[1])
     return schedule
 
 @router.delete("/schedule/{schedule_id}", response_model=schemas.Schedule)
-def delete_schedule(schedule_id: int, db: Session = Depends(get_db)) -> models.Schedule:
+async def delete_schedule(schedule_id: int, db: AsyncSession = Depends(get_db)) -> models.Schedule:
     """
     Delete a schedule entry by its ID.
 
     Parameters:
         schedule_id (int): The ID of the schedule entry to delete (path parameter).
-        db (Session): SQLAlchemy database session (provided by dependency injection).
+        db (AsyncSession): SQLAlchemy async database session (provided by dependency injection).
 
     Returns:
         models.Schedule: The deleted schedule entry.
@@ -139,10 +198,293 @@ def delete_schedule(schedule_id: int, db: Session = Depends(get_db)) -> models.S
     Raises:
         HTTPException: 404 error if the schedule entry is not found.
     """
-    schedule = db.query(models.Schedule).filter(models.Schedule.id == schedule_id).first()
+    schedule = await db.get(models.Schedule, schedule_id)
     if not schedule:
         raise HTTPException(status_code=404, detail="Schedule not found")
-    db.delete(schedule)
-    db.commit()
+    await db.delete(schedule)
+    await db.commit()
+    shopping_list_cache.invalidate_dates(*schedule_slot(schedule))
     return schedule
 
+
+
+def plan_deductions(
+    lines: Iterable[Any], items: Iterable[Any]
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    """
+    Take a recipe's quantities from fridge items, first expiring first.
+
+    Parameters:
+        lines: Recipe lines with ingredient_id, name, quantity, unit,
+            default_unit, density_g_per_ml and grams_per_piece.
+        items: Usable fridge items with id, ingredient_id, quantity and unit,
+            in the order they should be used.
+
+    Returns:
+        tuple: Deductions (fridge_item_id, ingredient_id, quantity, unit,
+        remaining) in item order, and the quantities no item could cover
+        (ingredient_id, name, quantity, unit).
+    """
+    stock: dict[int, list[list[Any]]] = defaultdict(list)
+    for item in items:
+        stock[item.ingredient_id].append([item.id, item.quantity, item.unit, item.quantity])
+
+    needed: dict[tuple[int, str], float] = defaultdict(float)
+    details: dict[int, Any] = {}
+    for line in lines:
+        needed[(line.ingredient_id, line.unit)] += line.quantity
+        details[line.ingredient_id] = line
+
+    missing = []
+    for (ingredient_id, unit), quantity in needed.items():
+        line = details[ingredient_id]
+        conversion = Conversion(line.default_unit, line.density_g_per_ml, line.grams_per_piece)
+        for entry in stock.get(ingredient_id, ()):
+            if quantity <= 1e-9:
+                break
+            available = convert(entry[3], entry[2], unit, conversion)
+            if not available:
+                continue
+            taken = min(available, quantity)
+            # scale in the item's own unit rather than converting back
+            entry[3] -= entry[3] * taken / available
+            quantity -= taken
+        if quantity > 1e-9:
+            missing.append({"ingredient_id": ingredient_id, "name": line.name, "quantity": round(quantity, 3), "unit": unit})
+
+    deductions = [
+        {
+            "fridge_item_id": item_id,
+            "ingredient_id": ingredient_id,
+            "quantity": original - remaining,
+            "unit": item_unit,
+            "remaining": remaining if remaining > 1e-9 else 0.0,
+        }
+        for ingredient_id, entries in stock.items()
+        for item_id, original, item_unit, remaining in entries
+        if original - remaining > 1e-9
+    ]
+    return deductions, missing
+
+
+@router.post("/schedule/{schedule_id}/cooked", response_model=schemas.CookedMeal)
+async def mark_cooked(
+    schedule_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserSchema = Depends(current_active_user),
+) -> dict:
+    """
+    Mark a scheduled meal cooked and take its ingredients from the user's fridge.
+
+    Recipe quantities are converted to each fridge item's unit where
+    possible and taken from unexpired items, soonest expiring first (items
+    without an expiration date last). All stock changes are applied in the
+    same transaction as the schedule update, with one UPDATE for the items
+    partly used and one DELETE for those used up, and are written to the
+    fridge log as "cook" entries. Quantities the fridge cannot cover are
+    reported, not treated as an error.
+
+    Parameters:
+        schedule_id (int): The ID of the schedule entry (path parameter).
+        db (AsyncSession): SQLAlchemy async database session (provided by dependency injection).
+
+    Returns:
+        dict: The updated schedule entry, the deductions made and the missing quantities.
+
+    Raises:
+        HTTPException: 404 error if the schedule entry is not found, 403 if it
+        belongs to another user, 409 if it was already marked cooked.
+    """
+    schedule = await db.scalar(
+        select(models.Schedule).where(models.Schedule.id == schedule_id).with_for_update()
+    )
+    if not schedule:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+    if schedule.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized to cook this meal")
+    if schedule.cooked_at is not None:
+        raise HTTPException(status_code=409, detail="Meal already marked cooked")
+
+    lines = (await db.execute(
+        select(
+            models.RecipeIngredient.ingredient_id,
+            models.RecipeIngredient.quantity,
+            models.RecipeIngredient.unit,
+            models.Ingredient.name,
+            models.Ingredient.default_unit,
+            models.Ingredient.density_g_per_ml,
+            models.Ingredient.grams_per_piece,
+        )
+        .join(models.Ingredient, models.RecipeIngredient.ingredient_id == models.Ingredient.id)
+        .where(models.RecipeIngredient.recipe_id == schedule.recipe_id)
+    )).all()
+    items = (await db.execute(
+        select(models.FridgeItem.id, models.FridgeItem.ingredient_id, models.FridgeItem.quantity, models.FridgeItem.unit)
+        .where(
+            models.FridgeItem.user_id == current_user.id,
+            models.FridgeItem.ingredient_id.in_({line.ingredient_id for line in lines}),
+            or_(models.FridgeItem.expiration_date.is_(None), models.FridgeItem.expiration_date >= date.today()),
+        )
+        .order_by(
+            models.FridgeItem.expiration_date.is_(None),
+            models.FridgeItem.expiration_date,
+            models.FridgeItem.id,
+        )
+        .with_for_update()
+    )).all()
+    deducted, missing = plan_deductions(lines, items)
+
+    remaining = {d["fridge_item_id"]: d["remaining"] for d in deducted if d["remaining"] > 0}
+    used_up = [d["fridge_item_id"] for d in deducted if d["remaining"] == 0]
+    if remaining:
+        await db.execute(
+            update(models.FridgeItem)
+            .where(models.FridgeItem.id.in_(remaining))
+            .values(quantity=case(remaining, value=models.FridgeItem.id), updated_at=time_now())
+            .execution_options(synchronize_session=False)
+        )
+    if used_up:
+        await db.execute(
+            delete(models.FridgeItem)
+            .where(models.FridgeItem.id.in_(used_up))
+            .execution_options(synchronize_session=False)
+        )
+    cooked_at = time_now()
+    schedule.cooked_at = cooked_at
+    if deducted:
+        # logged in the same transaction, so stock never leaves the fridge unrecorded
+        await write_events(await db.connection(), [
+            log_event(current_user.id, d["ingredient_id"], -d["quantity"], d["unit"], "cook", cooked_at)
+            for d in deducted
+        ])
+    await db.commit()
+
+    if deducted:
+        shopping_list_cache.invalidate_user(current_user.id)
+        expiring_cache.invalidate_user(current_user.id)
+    else:
+        # the meal no longer counts as demand
+        shopping_list_cache.invalidate_dates(current_user.id, schedule.date)
+    return {"schedule": schedule, "deducted": deducted, "missing": missing}
+
+
+def plan_entries(plan: schemas.SchedulePlan) -> list[dict[str, Any]]:
+    """
+    Expand a plan into schedule rows: its entries, then its template
+    repeated on every matching weekday of the range, in date order.
+
+    Raises:
+        HTTPException: 400 error if the range is empty or longer than
+        MAX_PLAN_DAYS, or an entry falls outside it; 413 if the plan expands
+        to more than MAX_BULK_SCHEDULE entries.
+    """
+    days = (plan.end_date - plan.start_date).days + 1
+    if days < 1 or days > MAX_PLAN_DAYS:
+        raise HTTPException(status_code=400, detail=f"The plan must cover 1 to {MAX_PLAN_DAYS} days")
+    if any(not plan.start_date <= entry.date <= plan.end_date for entry in plan.entries):
+        raise HTTPException(status_code=400, detail="Entries must fall within start_date and end_date")
+
+    by_weekday: dict[int, list[schemas.ScheduleTemplateEntry]] = defaultdict(list)
+    for meal in plan.template:
+        by_weekday[meal.weekday].append(meal)
+    count = len(plan.entries) + sum(
+        len(by_weekday[(plan.start_date + timedelta(days=offset)).weekday()]) for offset in range(days)
+    )
+    if count > MAX_BULK_SCHEDULE:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_SCHEDULE} entries per plan")
+
+    rows = [entry.model_dump() for entry in plan.entries]
+    for offset in range(days):
+        day = plan.start_date + timedelta(days=offset)
+        rows.extend(
+            {"recipe_id": meal.recipe_id, "date": day, "meal_type": meal.meal_type}
+            for meal in by_weekday[day.weekday()]
+        )
+    rows.sort(key=lambda row: row["date"])
+    return rows
+
+
+@router.post("/schedule/bulk", response_model=list[schemas.Schedule])
+async def create_schedule_bulk(
+    plan: schemas.SchedulePlan,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserSchema = Depends(current_active_user),
+) -> list[models.Schedule]:
+    """
+    Plan the meals of a date range in one request.
+
+    Entries are given per date, or as a template week whose meals are
+    repeated on their weekday across the range, or both. Recipe ids are
+    checked with one query, meal type ids against the in-memory catalogue,
+    and all entries are inserted with one executemany in a single transaction.
+
+    Parameters:
+        plan (schemas.SchedulePlan): The date range, entries and template week (request body).
+        db (AsyncSession): SQLAlchemy async database session (provided by dependency injection).
+
+    Returns:
+        list[models.Schedule]: The created schedule entries, in date order.
+
+    Raises:
+        HTTPException: 400 error for an invalid range, entries outside it or
+        unknown recipe or meal type ids; 413 if the plan has more than
+        MAX_BULK_SCHEDULE entries.
+    """
+    rows = plan_entries(plan)
+    if not rows:
+        return []
+    recipe_ids = {row["recipe_id"] for row in rows}
+    meal_type_ids = {row["meal_type"] for row in rows}
+    found = await db.scalars(select(models.Recipe.id).where(models.Recipe.id.in_(recipe_ids)))
+    unknown_recipes = recipe_ids - set(found.all())
+    meal_types = (await catalogue.get(db, meal_type_ids=meal_type_ids)).meal_types
+    unknown_meal_types = meal_type_ids - meal_types.keys()
+    if unknown_recipes or unknown_meal_types:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown recipe ids {sorted(unknown_recipes)}, meal type ids {sorted(unknown_meal_types)}",
+        )
+
+    for row in rows:
+        row["user_id"] = current_user.id
+    schedules = (await db.scalars(
+        insert(models.Schedule).returning(models.Schedule, sort_by_parameter_order=True), rows
+    )).all()
+    await db.commit()
+    shopping_list_cache.invalidate_dates(current_user.id, *{row["date"] for row in rows})
+    return list(schedules)
+
+
+@router.delete("/schedule/")
+async def delete_schedule_range(
+    start_date: date,
+    end_date: date,
+    meal_type: Optional[int] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserSchema = Depends(current_active_user),
+) -> dict:
+    """
+    Delete the user's schedule entries in a date range with one statement.
+
+    Parameters:
+        start_date (date): Delete entries on or after this date (query parameter).
+        end_date (date): Delete entries on or before this date (query parameter).
+        meal_type (Optional[int]): Only delete entries of this meal type (query parameter).
+        db (AsyncSession): SQLAlchemy async database session (provided by dependency injection).
+
+    Returns:
+        dict: The number of deleted entries.
+    """
+    stmt = delete(models.Schedule).where(
+        models.Schedule.user_id == current_user.id,
+        models.Schedule.date >= start_date,
+        models.Schedule.date <= end_date,
+    )
+    if meal_type is not None:
+        stmt = stmt.where(models.Schedule.meal_type == meal_type)
+    result = await db.execute(stmt.execution_options(synchronize_session=False))
+    await db.commit()
+    if result.rowcount:
+        # cached ranges inside the deleted one contain neither end date
+        shopping_list_cache.invalidate_user(current_user.id)
+    return {"deleted": result.rowcount}
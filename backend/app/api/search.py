@@ -0,0 +1,160 @@
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends
+from sqlalchemy import Select, func, literal_column, or_, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from .. import models, schemas
+from ..database import AsyncSessionLocal
+from ..search import (
+    INGREDIENT,
+    INGREDIENT_DOCUMENT,
+    NAME_DOCUMENT,
+    RECIPE,
+    RECIPE_DOCUMENT,
+    TAG_DOCUMENT,
+    SearchHit,
+    prefix_tsquery,
+    search_index,
+    tokenize,
+)
+
+router = APIRouter()
+
+
+async def get_db():
+    db = AsyncSessionLocal()
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+def postgres_search_query(
+    query: str, limit: int, kind: Optional[str] = None, names_only: bool = False
+) -> Optional[Select]:
+    """
+    Build a Postgres search over recipes and ingredients.
+
+    Tokens are matched as prefixes against the full-text documents (names only
+    for autocomplete), and whole-query trigram similarity on names catches
+    misspellings. Rows are ranked by ts_rank plus name similarity. Every
+    predicate matches an index from the add_search_indexes migration.
+
+    Returns:
+        Optional[Select]: Statement yielding kind, id, name and score rows, or
+        None if the query has no searchable tokens.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return None
+    tsquery = func.to_tsquery(literal_column("'simple'"), prefix_tsquery(tokens))
+    text = " ".join(tokens)
+
+    parts = []
+    if kind in (None, RECIPE):
+        document = literal_column(NAME_DOCUMENT if names_only else RECIPE_DOCUMENT)
+        matches = [document.op("@@")(tsquery), models.Recipe.name.op("%")(text)]
+        if not names_only:
+            tagged = select(models.RecipeTag.recipe_id).where(literal_column(TAG_DOCUMENT).op("@@")(tsquery))
+            matches.append(models.Recipe.id.in_(tagged))
+        parts.append(
+            select(
+                literal_column(f"'{RECIPE}'").label("kind"),
+                models.Recipe.id,
+                models.Recipe.name,
+                (func.ts_rank(document, tsquery) + func.similarity(models.Recipe.name, text)).label("score"),
+            ).where(or_(*matches))
+        )
+    if kind in (None, INGREDIENT):
+        document = literal_column(NAME_DOCUMENT if names_only else INGREDIENT_DOCUMENT)
+        parts.append(
+            select(
+                literal_column(f"'{INGREDIENT}'").label("kind"),
+                models.Ingredient.id,
+                models.Ingredient.name,
+                (func.ts_rank(document, tsquery) + func.similarity(models.Ingredient.name, text)).label("score"),
+            ).where(or_(document.op("@@")(tsquery), models.Ingredient.name.op("%")(text)))
+        )
+    hits = union_all(*parts).subquery() if len(parts) > 1 else parts[0].subquery()
+    return (
+        select(hits.c.kind, hits.c.id, hits.c.name, hits.c.score)
+        .order_by(hits.c.score.desc(), func.length(hits.c.name), hits.c.name, hits.c.id)
+        .limit(limit)
+    )
+
+
+async def run_search(
+    db: AsyncSession, query: str, limit: int, kind: Optional[str] = None, names_only: bool = False
+) -> list[SearchHit]:
+    """
+    Search with Postgres indexes when available, otherwise with the in-memory index.
+    """
+    if db.bind.dialect.name == "postgresql":
+        stmt = postgres_search_query(query, limit, kind, names_only)
+        if stmt is None:
+            return []
+        return [SearchHit(*row) for row in (await db.execute(stmt)).all()]
+
+    if search_index.stale:
+        recipes = await db.execute(
+            select(models.Recipe.id, models.Recipe.name, models.Recipe.description, models.Recipe.instructions)
+        )
+        ingredients = await db.execute(
+            select(models.Ingredient.id, models.Ingredient.name, models.Ingredient.category)
+        )
+        tags = await db.execute(select(models.RecipeTag.recipe_id, models.RecipeTag.tag))
+        # tokenizing every document is CPU-bound; keep it off the event loop
+        await run_in_threadpool(
+            search_index.rebuild, recipes.tuples().all(), ingredients.tuples().all(), tags.tuples().all()
+        )
+    return search_index.search(query, limit, kind, names_only)
+
+
+@router.get("/search/", response_model=list[schemas.SearchResult])
+async def search(
+    q: str,
+    kind: Optional[Literal["recipe", "ingredient"]] = None,
+    limit: int = 20,
+    db: AsyncSession = Depends(get_db),
+) -> list[SearchHit]:
+    """
+    Full-text search over recipe names, descriptions, instructions and tags, and
+    ingredient names and categories.
+
+    Every word of the query must match, as a word prefix; misspelled words fall
+    back to fuzzy matching.
+
+    Parameters:
+        q (str): Search query (query parameter).
+        kind (Optional[str]): Restrict results to "recipe" or "ingredient" (query parameter).
+        limit (int): Maximum number of results to return (query parameter, default 20).
+        db (AsyncSession): SQLAlchemy async database session (provided by dependency injection).
+
+    Returns:
+        list[SearchHit]: Matching recipes and ingredients, best first.
+    """
+    return await run_search(db, q, limit, kind)
+
+
+@router.get("/search/autocomplete", response_model=list[schemas.SearchResult])
+async def autocomplete(
+    q: str,
+    kind: Optional[Literal["recipe", "ingredient"]] = None,
+    limit: int = 10,
+    db: AsyncSession = Depends(get_db),
+) -> list[SearchHit]:
+    """
+    Suggest recipe and ingredient names for a partially typed query.
+
+    Parameters:
+        q (str): Partially typed query; every word must prefix a word of the name (query parameter).
+        kind (Optional[str]): Restrict suggestions to "recipe" or "ingredient" (query parameter).
+        limit (int): Maximum number of suggestions to return (query parameter, default 10).
+        db (AsyncSession): SQLAlchemy async database session (provided by dependency injection).
+
+    Returns:
+        list[SearchHit]: Matching names, best first.
+    """
+    return await run_search(db, q, limit, kind, names_only=True)
@@ -1,89 +1,152 @@
 from datetime import date
-from typing import Optional
 
 import sqlalchemy as sa
 from fastapi import APIRouter, Depends
-from sqlalchemy import and_, func
-from sqlalchemy.orm import Session
+from sqlalchemy import func, or_
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from .. import models, schemas
-from ..database import SessionLocal
+from ..database import AsyncSessionLocal
+from ..shopping_list_cache import shopping_list_cache
+from ..units import net_quantities
 from ..users import current_active_user
 from ..schemas import User as UserSchema
 
 router = APIRouter()
 
 
-def get_db():
-    db = SessionLocal()
+async def get_db():
+    db = AsyncSessionLocal()
     try:
         yield db
     finally:
-        db.close()
+        await db.close()
 
 
-@router.get("/shopping_list/", response_model=list[schemas.ShoppingListItem])
-def list_shopping_list(
-    start_date: date,
-    end_date: date,
-    skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: UserSchema = Depends(current_active_user),
-) -> list[schemas.ShoppingListItem]:
+def shopping_list_query(user_id: int, start_date: date, end_date: date) -> sa.Select:
     """
-    Retrieve a list of shopping list items, optionally filtered by date range, paginated by skip and limit.
+    Build the shopping list query for a user and date range.
+
+    Recipe demand and fridge stock are aggregated separately per
+    (ingredient, unit), so several fridge entries of the same ingredient
+    cannot multiply the demand rows. Netting happens afterwards in
+    units.net_quantities, which converts across units. Meals marked cooked
+    are left out: their ingredients were already taken from the fridge.
 
     Parameters:
-        skip (int): Number of records to skip for pagination (query parameter, default 0).
-        limit (int): Maximum number of records to return (query parameter, default 100).
-        start_date (Optional[date]): Filter for items on or after this date (query parameter).
-        end_date (Optional[date]): Filter for items on or before this date (query parameter).
-        db (Session): SQLAlchemy database session (provided by dependency injection).
+        user_id (int): Owner of the schedule and fridge.
+        start_date (date): First scheduled day included; fridge items expiring
+            on or before it are not counted as stock.
+        end_date (date): Last scheduled day included.
 
     Returns:
-        list[schemas.ShoppingListItem]: List of shopping list items.
+        sa.Select: One row per (ingredient, unit) with id, ingredient_name,
+        unit, demand, stock and the ingredient's default_unit,
+        density_g_per_ml and grams_per_piece.
     """
-
-    # Get all ingredients needed for scheduled recipes in the given period
-    stmt = (
+    demand = (
         sa.select(
-            models.Ingredient.id,
-            models.Ingredient.name.label("ingredient_name"),
-            func.sum(
-                models.RecipeIngredient.quantity
-                - func.coalesce(models.FridgeItem.quantity, 0)
-            ).label("quantity"),
+            models.RecipeIngredient.ingredient_id,
             models.RecipeIngredient.unit,
+            func.sum(models.RecipeIngredient.quantity).label("quantity"),
         )
         .select_from(models.Schedule)
-        .join(models.Recipe, models.Schedule.recipe_id == models.Recipe.id)
         .join(
             models.RecipeIngredient,
-            models.Recipe.id == models.RecipeIngredient.recipe_id,
+            models.Schedule.recipe_id == models.RecipeIngredient.recipe_id,
         )
-        .join(
-            models.Ingredient,
-            models.RecipeIngredient.ingredient_id == models.Ingredient.id,
+        .where(
+            models.Schedule.user_id == user_id,
+            models.Schedule.date >= start_date,
+            models.Schedule.date <= end_date,
+            models.Schedule.cooked_at.is_(None),
+        )
+        .group_by(models.RecipeIngredient.ingredient_id, models.RecipeIngredient.unit)
+        .cte("demand")
+    )
+    stock = (
+        sa.select(
+            models.FridgeItem.ingredient_id,
+            models.FridgeItem.unit,
+            func.sum(models.FridgeItem.quantity).label("quantity"),
         )
-        .outerjoin(
-            models.FridgeItem,
-            and_(
-                models.RecipeIngredient.ingredient_id
-                == models.FridgeItem.ingredient_id,
-                models.RecipeIngredient.unit == models.FridgeItem.unit,
+        .where(
+            models.FridgeItem.user_id == user_id,
+            models.FridgeItem.ingredient_id.in_(sa.select(demand.c.ingredient_id)),
+            or_(
+                models.FridgeItem.expiration_date.is_(None),
                 models.FridgeItem.expiration_date > start_date,
             ),
         )
-        .group_by(
-            models.Ingredient.id, models.Ingredient.name, models.RecipeIngredient.unit
+        .group_by(models.FridgeItem.ingredient_id, models.FridgeItem.unit)
+        .cte("stock")
+    )
+    lines = sa.union_all(
+        sa.select(
+            demand.c.ingredient_id,
+            demand.c.unit,
+            demand.c.quantity.label("demand"),
+            sa.literal(0.0).label("stock"),
+        ),
+        sa.select(
+            stock.c.ingredient_id,
+            stock.c.unit,
+            sa.literal(0.0).label("demand"),
+            stock.c.quantity.label("stock"),
+        ),
+    ).subquery("lines")
+
+    return (
+        sa.select(
+            models.Ingredient.id,
+            models.Ingredient.name.label("ingredient_name"),
+            lines.c.unit,
+            func.sum(lines.c.demand).label("demand"),
+            func.sum(lines.c.stock).label("stock"),
+            models.Ingredient.default_unit,
+            models.Ingredient.density_g_per_ml,
+            models.Ingredient.grams_per_piece,
         )
+        .select_from(lines)
+        .join(models.Ingredient, lines.c.ingredient_id == models.Ingredient.id)
+        .group_by(models.Ingredient.id, lines.c.unit)
     )
-    if start_date:
-        stmt = stmt.where(models.Schedule.date >= start_date)
-    if end_date:
-        stmt = stmt.where(models.Schedule.date <= end_date)
-    # scope to current user
-    stmt = stmt.where(models.Schedule.user_id == current_user.id)
-
-    return db.execute(stmt).all()  # type: ignore
+
+
+@router.get("/shopping_list/", response_model=list[schemas.ShoppingListItem])
+async def list_shopping_list(
+    start_date: date,
+    end_date: date,
+    skip: int = 0,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_db),
+    current_user: UserSchema = Depends(current_active_user),
+) -> list[schemas.ShoppingListItem]:
+    """
+    Retrieve the ingredients still needed for the meals scheduled in a date range,
+    net of what is already in the user's fridge, paginated by skip and limit.
+
+    Quantities are netted across compatible units (e.g. g and kg, or ml and g
+    for ingredients with a density) and rendered in each ingredient's
+    default unit.
+
+    The full list for a date range is cached per user and invalidated by
+    schedule, fridge and recipe changes.
+
+    Parameters:
+        skip (int): Number of records to skip for pagination (query parameter, default 0).
+        limit (int): Maximum number of records to return (query parameter, default 100).
+        start_date (date): Include schedules on or after this date (query parameter).
+        end_date (date): Include schedules on or before this date (query parameter).
+        db (AsyncSession): SQLAlchemy async database session (provided by dependency injection).
+
+    Returns:
+        list[schemas.ShoppingListItem]: List of shopping list items.
+    """
+    rows = shopping_list_cache.get(current_user.id, start_date, end_date)
+    if rows is None:
+        version = shopping_list_cache.version(current_user.id)
+        stmt = shopping_list_query(current_user.id, start_date, end_date)
+        rows = net_quantities(await db.execute(stmt))
+        shopping_list_cache.set(current_user.id, start_date, end_date, rows, version)
+    return rows[skip : skip + limit]  # type: ignore
@@ -0,0 +1,250 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Any, Iterable, NamedTuple, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from . import models
+from .database import async_engine
+
+# Age after which the catalogue is reloaded even without an invalidation
+CATALOGUE_CACHE_TTL_SECONDS = float(os.getenv("CATALOGUE_CACHE_TTL_SECONDS", "300"))
+# Age a snapshot must reach before a lookup of an id it lacks reloads it
+CATALOGUE_MISS_RELOAD_SECONDS = float(os.getenv("CATALOGUE_MISS_RELOAD_SECONDS", "1"))
+# PostgreSQL channel used to tell other processes about catalogue changes; empty disables LISTEN/NOTIFY
+CATALOGUE_NOTIFY_CHANNEL = os.getenv("CATALOGUE_NOTIFY_CHANNEL", "catalogue_changed")
+# Wait before listening again after the listening connection failed
+CATALOGUE_LISTEN_RETRY_SECONDS = float(os.getenv("CATALOGUE_LISTEN_RETRY_SECONDS", "5"))
+
+logger = logging.getLogger(__name__)
+
+
+class IngredientRecord(NamedTuple):
+    id: int
+    name: str
+    category: Optional[str]
+    default_unit: Optional[str]
+    density_g_per_ml: Optional[float]
+    grams_per_piece: Optional[float]
+
+
+class MealTypeRecord(NamedTuple):
+    id: int
+    name: str
+
+
+class CatalogueSnapshot:
+    """
+    Immutable view of the ingredient and meal type tables at one version:
+    id -> record, and lower-cased name -> id (the oldest row for duplicate names).
+    """
+
+    __slots__ = ("version", "loaded_at", "ingredients", "ingredient_ids", "meal_types", "meal_type_ids")
+
+    def __init__(self, version: int, ingredients: Iterable[Any], meal_types: Iterable[Any]):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.ingredients = {row[0]: IngredientRecord(*row) for row in ingredients}
+        self.meal_types = {row[0]: MealTypeRecord(*row) for row in meal_types}
+        self.ingredient_ids: dict[str, int] = {}
+        for record in self.ingredients.values():
+            self.ingredient_ids.setdefault(record.name.lower(), record.id)
+        self.meal_type_ids = {record.name.lower(): record.id for record in self.meal_types.values()}
+
+
+class Catalogue:
+    """
+    Process-local cache of the ingredient and meal type catalogues.
+
+    Both tables are small and change rarely, so they are loaded whole into a
+    CatalogueSnapshot. The ingredient and meal type handlers call changed()
+    after committing, which bumps a version and drops the snapshot; a load
+    that ran concurrently with a change is returned to its caller but not
+    kept.
+
+    On PostgreSQL with asyncpg, changed() also sends a NOTIFY and start()
+    LISTENs for other processes' notifications. Elsewhere, or while the
+    listening connection is down, a lookup for an id the snapshot does not
+    know reloads it, so rows created by another process are found without
+    waiting for the TTL. Such reloads happen at most once per
+    miss_reload_interval, however many unknown ids are asked for; renames
+    and deletes made by other processes are seen once the snapshot reaches
+    the TTL.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine = async_engine,
+        ttl: float = CATALOGUE_CACHE_TTL_SECONDS,
+        channel: str = CATALOGUE_NOTIFY_CHANNEL,
+        miss_reload_interval: float = CATALOGUE_MISS_RELOAD_SECONDS,
+    ):
+        self.engine = engine
+        self.ttl = ttl
+        self.channel = channel
+        self.miss_reload_interval = miss_reload_interval
+        self._lock = threading.Lock()
+        self._version = 0
+        self._snapshot: Optional[CatalogueSnapshot] = None
+        # payload of our own notifications, which are already applied locally
+        self._token = str(os.getpid())
+        self._task: Optional[asyncio.Task] = None
+        self.listening = False
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.invalidations = 0
+        self.notifications = 0
+
+    def _fresh(self) -> Optional[CatalogueSnapshot]:
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.version != self._version or time.monotonic() - snapshot.loaded_at > self.ttl:
+            return None
+        return snapshot
+
+    async def load(self, db: AsyncSession) -> CatalogueSnapshot:
+        """
+        Read both tables and keep the snapshot unless the catalogue changed meanwhile.
+        """
+        version = self._version
+        ingredients = await db.execute(
+            select(
+                models.Ingredient.id,
+                models.Ingredient.name,
+                models.Ingredient.category,
+                models.Ingredient.default_unit,
+                models.Ingredient.density_g_per_ml,
+                models.Ingredient.grams_per_piece,
+            ).order_by(models.Ingredient.id)
+        )
+        meal_types = await db.execute(select(models.MealType.id, models.MealType.name).order_by(models.MealType.id))
+        snapshot = CatalogueSnapshot(version, ingredients.all(), meal_types.all())
+        with self._lock:
+            if version == self._version:
+                self._snapshot = snapshot
+        self.loads += 1
+        return snapshot
+
+    async def get(
+        self, db: AsyncSession, ingredient_ids: Iterable[int] = (), meal_type_ids: Iterable[int] = ()
+    ) -> CatalogueSnapshot:
+        """
+        Return the current snapshot, loading it if missing or stale.
+
+        A snapshot lacking any of the given ids is reloaded only while
+        other processes' changes are not notified, and only once it is
+        miss_reload_interval old.
+
+        Parameters:
+            db (AsyncSession): Session used if the catalogue has to be loaded.
+            ingredient_ids (Iterable[int]): Ingredient ids the caller will look up.
+            meal_type_ids (Iterable[int]): Meal type ids the caller will look up.
+
+        Returns:
+            CatalogueSnapshot: A snapshot; ids still missing from it do not exist.
+        """
+        snapshot = self._fresh()
+        if snapshot is not None:
+            if all(i in snapshot.ingredients for i in ingredient_ids) and all(
+                i in snapshot.meal_types for i in meal_type_ids
+            ):
+                self.hits += 1
+                return snapshot
+            if self.listening or time.monotonic() - snapshot.loaded_at < self.miss_reload_interval:
+                self.misses += 1
+                return snapshot
+            # may have been created by another process since the snapshot was loaded
+            self.invalidate()
+        return await self.load(db)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._version += 1
+            self._snapshot = None
+            self.invalidations += 1
+
+    async def changed(self, db: AsyncSession) -> None:
+        """
+        Drop the catalogue after an ingredient or meal type change was committed,
+        and notify other processes when running on PostgreSQL.
+        """
+        self.invalidate()
+        if not self.channel or db.bind.dialect.name != "postgresql":
+            return
+        try:
+            await db.execute(select(func.pg_notify(self.channel, self._token)))
+            await db.commit()
+        except Exception:
+            # the change is committed; other processes fall back to the TTL
+            logger.exception("Could not notify catalogue change")
+
+    def _notified(self, connection: Any, pid: int, channel: str, payload: str) -> None:
+        if payload != self._token:
+            self.notifications += 1
+            self.invalidate()
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async with self.engine.connect() as connection:
+                    driver = (await connection.get_raw_connection()).driver_connection
+                    if driver is None:
+                        raise RuntimeError("Catalogue listener has no driver connection")
+                    await driver.add_listener(self.channel, self._notified)
+                    # changes made while nobody was listening were missed
+                    self.invalidate()
+                    self.listening = True
+                    try:
+                        while not driver.is_closed():
+                            await asyncio.sleep(CATALOGUE_LISTEN_RETRY_SECONDS)
+                    finally:
+                        self.listening = False
+                        if not driver.is_closed():
+                            await driver.remove_listener(self.channel, self._notified)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Catalogue listener failed")
+            await asyncio.sleep(CATALOGUE_LISTEN_RETRY_SECONDS)
+
+    def start(self) -> None:
+        """
+        Listen for other processes' changes in the background, when the
+        channel is set and the database is PostgreSQL through asyncpg.
+        """
+        dialect = self.engine.dialect
+        if not self.channel or dialect.name != "postgresql" or dialect.driver != "asyncpg":
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "version": self._version,
+            "ingredients": len(snapshot.ingredients) if snapshot else None,
+            "meal_types": len(snapshot.meal_types) if snapshot else None,
+            "age_seconds": time.monotonic() - snapshot.loaded_at if snapshot else None,
+            "listening": self.listening,
+            "hits": self.hits,
+            "misses": self.misses,
+            "loads": self.loads,
+            "invalidations": self.invalidations,
+            "notifications": self.notifications,
+        }
+
+
+catalogue = Catalogue()
@@ -0,0 +1,39 @@
+from typing import Any, Callable
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+# session.info key holding the callbacks queued by the current transaction
+PENDING_KEY = "on_commit"
+
+
+def on_commit(target: Any, callback: Callable[..., None], *args: Any) -> None:
+    """
+    Run callback(*args) once the transaction that flushed target commits.
+
+    Mapper events fire at flush time, before the transaction is known to
+    succeed. Process-wide caches kept current by them queue their changes
+    here instead, so a rolled-back transaction leaves no trace in them.
+    Arguments are evaluated when queued, as attributes may be expired by then.
+
+    Parameters:
+        target: The flushed ORM object; its session holds the queue.
+        callback (Callable): Function applying the change.
+        args: Positional arguments for callback.
+    """
+    session = object_session(target)
+    if session is None:
+        callback(*args)
+        return
+    session.info.setdefault(PENDING_KEY, []).append((callback, args))
+
+
+@event.listens_for(Session, "after_commit")
+def _run_pending(session: Session) -> None:
+    for callback, args in session.info.pop(PENDING_KEY, ()):
+        callback(*args)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending(session: Session) -> None:
+    session.info.pop(PENDING_KEY, None)
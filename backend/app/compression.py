@@ -0,0 +1,190 @@
+import os
+import zlib
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Smallest response body worth compressing, and the gzip level / brotli quality used
+COMPRESSION_MINIMUM_SIZE = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1000"))
+GZIP_COMPRESSLEVEL = int(os.getenv("GZIP_COMPRESSLEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+# Media types (or prefixes) sent as they are: already compressed, or read by clients as they arrive
+UNCOMPRESSED_MEDIA_TYPES = (
+    "application/gzip",
+    "application/x-gzip",
+    "application/zip",
+    "application/zstd",
+    "application/x-bzip2",
+    "application/x-xz",
+    "application/vnd.apache.parquet",
+    "image/",
+    "audio/",
+    "video/",
+    "font/woff",
+    "text/event-stream",
+)
+# Image formats that are text and do compress
+COMPRESSIBLE_IMAGE_TYPES = ("image/svg+xml", "image/bmp")
+
+
+def accepted_encodings(accept_encoding: str) -> set[str]:
+    """
+    Parse an Accept-Encoding header into the codings the client accepts (q > 0).
+    """
+    accepted = set()
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        q = params.strip().removeprefix("q=") if params.strip().startswith("q=") else "1"
+        try:
+            if float(q) > 0:
+                accepted.add(coding.strip().lower())
+        except ValueError:
+            continue
+    return accepted
+
+
+def compressible(content_type: str) -> bool:
+    """
+    Whether a response of this Content-Type is worth compressing.
+    """
+    media_type = content_type.partition(";")[0].strip().lower()
+    return media_type in COMPRESSIBLE_IMAGE_TYPES or not media_type.startswith(UNCOMPRESSED_MEDIA_TYPES)
+
+
+def weaken_etag(headers: MutableHeaders) -> None:
+    """
+    Mark a strong ETag weak: an encoded body is not byte-identical to the
+    identity one the application tagged, so they must not share a strong validator.
+    """
+    etag = headers.get("etag")
+    if etag is not None and not etag.startswith("W/"):
+        headers["ETag"] = f"W/{etag}"
+
+
+class Encoder(ABC):
+    """
+    Compressor for one response body, fed chunk by chunk.
+    """
+
+    coding: str
+
+    @abstractmethod
+    def compress(self, body: bytes, more_body: bool) -> bytes:
+        """
+        Compress the next chunk. Output is flushed after every chunk of a
+        streaming response, so clients get rows as soon as they are produced,
+        and the stream is finished with the last one.
+        """
+
+
+class GZipEncoder(Encoder):
+    coding = "gzip"
+
+    def __init__(self, compresslevel: int):
+        # wbits 16 + 15: deflate with a gzip header and trailer
+        self.compressor = zlib.compressobj(compresslevel, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, body: bytes, more_body: bool) -> bytes:
+        return self.compressor.compress(body) + self.compressor.flush(zlib.Z_SYNC_FLUSH if more_body else zlib.Z_FINISH)
+
+
+class BrotliEncoder(Encoder):
+    coding = "br"
+
+    def __init__(self, quality: int):
+        if brotli is None:
+            raise RuntimeError("brotli is not installed")
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, body: bytes, more_body: bool) -> bytes:
+        body = self.compressor.process(body)
+        return body + (self.compressor.flush() if more_body else self.compressor.finish())
+
+
+class CompressionMiddleware:
+    """
+    Compress responses of at least minimum_size bytes, and streaming
+    responses, with Brotli when the client accepts it and the brotli package
+    is installed, else with gzip. Responses that already have a
+    Content-Encoding, media types that are already compressed (archives,
+    Parquet, most images, audio and video) and server-sent events are left
+    alone. The ETag of a compressed response is made weak, and so is that of
+    a 304 to a client that accepts compression, which may hold the compressed
+    representation.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = COMPRESSION_MINIMUM_SIZE,
+        compresslevel: int = GZIP_COMPRESSLEVEL,
+        quality: int = BROTLI_QUALITY,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compresslevel = compresslevel
+        self.quality = quality
+
+    def encoder(self, accept_encoding: str) -> Optional[Encoder]:
+        accepted = accepted_encodings(accept_encoding)
+        if "br" in accepted and brotli is not None:
+            return BrotliEncoder(self.quality)
+        if "gzip" in accepted:
+            return GZipEncoder(self.compresslevel)
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        encoder = self.encoder(Headers(scope=scope).get("accept-encoding", "")) if scope["type"] == "http" else None
+        if encoder is None:
+            await self.app(scope, receive, send)
+            return
+
+        # the start message is held back until the first body chunk shows whether to compress
+        start: Optional[Message] = None
+        compress = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, compress
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if start is not None:
+                initial, start = start, None
+                if message["type"] == "http.response.body":
+                    headers = MutableHeaders(raw=initial["headers"])
+                    body = message.get("body", b"")
+                    more_body = message.get("more_body", False)
+                    compress = (
+                        "content-encoding" not in headers
+                        and compressible(headers.get("content-type", ""))
+                        and (more_body or len(body) >= self.minimum_size)
+                    )
+                    if compress:
+                        body = encoder.compress(body, more_body)
+                        headers.add_vary_header("Accept-Encoding")
+                        headers["Content-Encoding"] = encoder.coding
+                        weaken_etag(headers)
+                        if more_body:
+                            del headers["Content-Length"]
+                        else:
+                            headers["Content-Length"] = str(len(body))
+                        message = {**message, "body": body}
+                    elif initial["status"] == 304:
+                        weaken_etag(headers)
+                await send(initial)
+                await send(message)
+                return
+            if compress and message["type"] == "http.response.body":
+                body = encoder.compress(message.get("body", b""), message.get("more_body", False))
+                message = {**message, "body": body}
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,292 @@
+import heapq
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Iterable, NamedTuple, Optional
+
+from sqlalchemy import event
+
+from . import models
+from .commit_hooks import on_commit
+from .units import Conversion, convert
+
+COOKABLE_INDEX_TTL_SECONDS = float(os.getenv("COOKABLE_INDEX_TTL_SECONDS", "300"))
+
+
+class Requirement(NamedTuple):
+    ingredient_id: int
+    quantity: float
+    unit: str
+
+
+class _Recipe:
+    """
+    Index entry of one recipe: its name, its required (non-optional)
+    ingredient lines keyed by RecipeIngredient id, and their bitset.
+    """
+
+    __slots__ = ("name", "lines", "mask", "required")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.lines: dict[int, Requirement] = {}
+        self.mask = 0
+        self.required = 0
+
+    def refresh(self, bits: dict[int, int]) -> None:
+        """
+        Rebuild the bitset, giving ingredients not in bits the next free position.
+        """
+        self.mask = 0
+        for line in self.lines.values():
+            self.mask |= 1 << bits.setdefault(line.ingredient_id, len(bits))
+        self.required = self.mask.bit_count()
+
+
+class Stock:
+    """
+    A user's usable fridge stock: per ingredient, its (quantity, unit) rows
+    and conversion data.
+    """
+
+    def __init__(self, rows: Iterable[Any]):
+        self.items: dict[int, list[tuple[float, str]]] = defaultdict(list)
+        self.conversions: dict[int, Conversion] = {}
+        for row in rows:
+            self.items[row.ingredient_id].append((row.quantity, row.unit))
+            self.conversions[row.ingredient_id] = Conversion(row.default_unit, row.density_g_per_ml, row.grams_per_piece)
+
+    def available(self, ingredient_id: int, unit: str) -> float:
+        """
+        Total stock of an ingredient expressed in unit, ignoring rows that cannot be converted.
+        """
+        conversion = self.conversions.get(ingredient_id, Conversion())
+        total = 0.0
+        for quantity, stock_unit in self.items.get(ingredient_id, ()):
+            converted = convert(quantity, stock_unit, unit, conversion)
+            if converted is not None:
+                total += converted
+        return total
+
+
+class CookableRecipe(NamedTuple):
+    id: int
+    name: str
+    coverage: float
+    required: int
+    missing: list[dict[str, Any]]
+
+
+class CookableIndex:
+    """
+    Per-recipe bitsets of required ingredients, used to rank recipes by
+    how much of them a user's fridge covers.
+
+    Every ingredient on a recipe gets a dense bit position when the index
+    first sees it, so bitsets grow with the number of indexed ingredients
+    rather than with their ids. A recipe's bitset has the bits of its
+    required (non-optional) ingredients set, so the ingredients a fridge has
+    for a recipe are one AND and a popcount away. That presence coverage is
+    an upper bound of the quantity-aware coverage, which only needs
+    computing for recipes that can still reach the top k.
+
+    The index is built from the database on first use and kept current by
+    ORM events on Recipe and RecipeIngredient, applied when their transaction
+    commits. It is process-local and
+    writes that bypass the ORM are not seen, so it is rebuilt once it is
+    older than the TTL.
+    """
+
+    def __init__(self, ttl: float = COOKABLE_INDEX_TTL_SECONDS):
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._recipes: dict[int, _Recipe] = {}
+        self._line_recipes: dict[int, int] = {}
+        # ingredient id -> bit position
+        self._bits: dict[int, int] = {}
+        self._built_at: Optional[float] = None
+
+    @property
+    def stale(self) -> bool:
+        built_at = self._built_at
+        return built_at is None or time.monotonic() - built_at > self.ttl
+
+    def invalidate(self) -> None:
+        """
+        Force a rebuild on next use.
+        """
+        self._built_at = None
+
+    def rebuild(self, recipes: Iterable[tuple[int, str]], lines: Iterable[Any]) -> None:
+        """
+        Replace the index contents.
+
+        Parameters:
+            recipes: (id, name) rows.
+            lines: (id, recipe_id, ingredient_id, quantity, unit, optional)
+                RecipeIngredient rows.
+        """
+        entries = {recipe_id: _Recipe(name) for recipe_id, name in recipes}
+        line_recipes: dict[int, int] = {}
+        bits: dict[int, int] = {}
+        for line_id, recipe_id, ingredient_id, quantity, unit, optional in lines:
+            entry = entries.get(recipe_id)
+            if entry is None or optional:
+                continue
+            entry.lines[line_id] = Requirement(ingredient_id, quantity, unit)
+            line_recipes[line_id] = recipe_id
+        for entry in entries.values():
+            entry.refresh(bits)
+        with self._lock:
+            self._recipes = entries
+            self._line_recipes = line_recipes
+            self._bits = bits
+            self._built_at = time.monotonic()
+
+    def upsert_recipe(self, recipe_id: int, name: str) -> None:
+        with self._lock:
+            if self._built_at is None:
+                return
+            entry = self._recipes.get(recipe_id)
+            if entry is None:
+                self._recipes[recipe_id] = _Recipe(name)
+            else:
+                entry.name = name
+
+    def remove_recipe(self, recipe_id: int) -> None:
+        with self._lock:
+            if self._built_at is None:
+                return
+            entry = self._recipes.pop(recipe_id, None)
+            for line_id in entry.lines if entry is not None else ():
+                self._line_recipes.pop(line_id, None)
+
+    def upsert_line(self, line_id: int, recipe_id: int, requirement: Requirement, optional: bool) -> None:
+        with self._lock:
+            if self._built_at is None:
+                return
+            self._remove_line(line_id)
+            entry = self._recipes.get(recipe_id)
+            if entry is None:
+                # recipe flushed earlier in a session we did not see; rebuild next time
+                self._built_at = None
+                return
+            if not optional:
+                entry.lines[line_id] = requirement
+                self._line_recipes[line_id] = recipe_id
+            entry.refresh(self._bits)
+
+    def remove_line(self, line_id: int) -> None:
+        with self._lock:
+            if self._built_at is None:
+                return
+            self._remove_line(line_id)
+
+    def _remove_line(self, line_id: int) -> None:
+        recipe_id = self._line_recipes.pop(line_id, None)
+        entry = self._recipes.get(recipe_id) if recipe_id is not None else None
+        if entry is not None and entry.lines.pop(line_id, None) is not None:
+            entry.refresh(self._bits)
+
+    def rank(self, stock: Stock, limit: int = 10, min_coverage: float = 0.0) -> list[CookableRecipe]:
+        """
+        Return the recipes best covered by the stock.
+
+        A required ingredient counts as covered when the stock holds at least
+        the recipe's quantity (after unit conversion). Recipes are ordered by
+        covered share of required ingredients, then by fewer missing lines,
+        then by name. Recipes sharing no required ingredient with the stock
+        are skipped.
+
+        Parameters:
+            stock (Stock): The user's usable fridge stock.
+            limit (int): Maximum number of recipes.
+            min_coverage (float): Drop recipes covering less than this share.
+
+        Returns:
+            list[CookableRecipe]: Ranked recipes with the quantities still missing.
+        """
+        if limit <= 0:
+            return []
+        with self._lock:
+            # presence coverage is an upper bound of quantity coverage
+            fridge = 0
+            for ingredient_id in stock.items:
+                bit = self._bits.get(ingredient_id)
+                if bit is not None:
+                    fridge |= 1 << bit
+            bounds = [
+                (-present / entry.required, recipe_id)
+                for recipe_id, entry in self._recipes.items()
+                if (present := (entry.mask & fridge).bit_count())
+            ]
+            heapq.heapify(bounds)
+            ranked: list[tuple[tuple[float, int, str, int], CookableRecipe]] = []
+            while bounds:
+                negative_bound, recipe_id = heapq.heappop(bounds)
+                bound = -negative_bound
+                if bound < min_coverage:
+                    break
+                if len(ranked) >= limit and bound < -ranked[limit - 1][0][0]:
+                    break
+                entry = self._recipes[recipe_id]
+                recipe = self._score(recipe_id, entry, stock)
+                if recipe.coverage < min_coverage:
+                    continue
+                ranked.append(((-recipe.coverage, len(recipe.missing), recipe.name, recipe.id), recipe))
+                ranked.sort(key=lambda item: item[0])
+                del ranked[limit:]
+        return [recipe for _, recipe in ranked]
+
+    @staticmethod
+    def _score(recipe_id: int, entry: _Recipe, stock: Stock) -> CookableRecipe:
+        needed: dict[tuple[int, str], float] = defaultdict(float)
+        for line in entry.lines.values():
+            needed[(line.ingredient_id, line.unit)] += line.quantity
+        missing = []
+        short: set[int] = set()
+        for (ingredient_id, unit), quantity in needed.items():
+            lacking = quantity - stock.available(ingredient_id, unit)
+            if lacking > 1e-9:
+                short.add(ingredient_id)
+                missing.append({"ingredient_id": ingredient_id, "quantity": round(lacking, 3), "unit": unit})
+        coverage = (entry.required - len(short)) / entry.required
+        missing.sort(key=lambda item: (item["ingredient_id"], item["unit"]))
+        return CookableRecipe(recipe_id, entry.name, coverage, entry.required, missing)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"recipes": len(self._recipes), "lines": len(self._line_recipes), "ingredients": len(self._bits)}
+
+
+cookable_index = CookableIndex()
+
+
+@event.listens_for(models.Recipe, "after_insert")
+@event.listens_for(models.Recipe, "after_update")
+def _index_recipe(mapper, connection, target: Any) -> None:
+    on_commit(target, cookable_index.upsert_recipe, target.id, target.name)
+
+
+@event.listens_for(models.Recipe, "after_delete")
+def _unindex_recipe(mapper, connection, target: Any) -> None:
+    on_commit(target, cookable_index.remove_recipe, target.id)
+
+
+@event.listens_for(models.RecipeIngredient, "after_insert")
+@event.listens_for(models.RecipeIngredient, "after_update")
+def _index_line(mapper, connection, target: Any) -> None:
+    on_commit(
+        target,
+        cookable_index.upsert_line,
+        target.id,
+        target.recipe_id,
+        Requirement(target.ingredient_id, target.quantity, target.unit),
+        bool(target.optional),
+    )
+
+
+@event.listens_for(models.RecipeIngredient, "after_delete")
+def _unindex_line(mapper, connection, target: Any) -> None:
+    on_commit(target, cookable_index.remove_line, target.id)
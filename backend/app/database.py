@@ -1,17 +1,85 @@
 import os
+import time
 
 import sqlalchemy
+import sqlalchemy.exc
 from dotenv import load_dotenv
-from sqlalchemy import create_engine, engine
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from .metrics import Histogram
 
 load_dotenv()
 
+# Async driver used by the request path for plain PostgreSQL connections.
+# "asyncpg" (default) or "psycopg" (psycopg 3 async mode).
+ASYNC_DRIVER = os.getenv("DB_ASYNC_DRIVER", "asyncpg")
+
+# Connection pool sizing, applied per engine (and therefore per replica).
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # seconds, -1 disables
+POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+
+class _TimedCheckoutMixin:
+    """
+    Records how long each checkout waited for a connection, including
+    checkouts that end in a pool timeout.
+    """
+
+    wait_time_ms: Histogram
+    timeouts: int = 0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()  # ty: ignore[unresolved-attribute]
+        except sqlalchemy.exc.TimeoutError:
+            type(self).timeouts += 1
+            raise
+        finally:
+            self.wait_time_ms.observe((time.perf_counter() - start) * 1000)
+
+
+class TimedQueuePool(_TimedCheckoutMixin, QueuePool):
+    wait_time_ms = Histogram()
+
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    wait_time_ms = Histogram()
+
+
+def pool_options(async_: bool = False) -> dict:
+    """
+    Build the pool keyword arguments shared by every engine.
+
+    Parameters:
+        async_ (bool): Whether the options are for an async engine.
+
+    Returns:
+        dict: Keyword arguments for create_engine / create_async_engine.
+    """
+    return {
+        "poolclass": TimedAsyncAdaptedQueuePool if async_ else TimedQueuePool,
+        "pool_size": POOL_SIZE,
+        "max_overflow": MAX_OVERFLOW,
+        "pool_timeout": POOL_TIMEOUT,
+        "pool_recycle": POOL_RECYCLE,
+        "pool_pre_ping": POOL_PRE_PING,
+    }
+
 
 if "GITHUB_WORKFLOW" in os.environ:
 
     # In GitHub Actions, use a local SQLite database for testing
-    engine = create_engine("sqlite:///./test.db", connect_args={"check_same_thread": False})
+    engine = create_engine(
+        "sqlite:///./test.db", connect_args={"check_same_thread": False}, **pool_options()
+    )
+    async_engine = create_async_engine("sqlite+aiosqlite:///./test.db", **pool_options(async_=True))
 
 elif (os.getenv("ENV") == "development") or (os.getenv("ENV") is None):
 
@@ -21,20 +89,24 @@ elif (os.getenv("ENV") == "development") or (os.getenv("ENV") is None):
     db_name = os.environ["DB_NAME"]
     db_port = int(os.environ["DB_PORT"])
 
-    engine = create_engine(
-        sqlalchemy.engine.url.URL.create( # type: ignore
-            drivername="postgresql+psycopg2",
+    def _url(drivername: str) -> sqlalchemy.engine.URL:
+        return sqlalchemy.engine.url.URL.create( # type: ignore
+            drivername=drivername,
             username=db_user,
             password=db_pass,
             host=db_host,
             port=db_port,
             database=db_name,
-        ),
+        )
+
+    engine = create_engine(_url("postgresql+psycopg2"), **pool_options())
+    async_engine = create_async_engine(
+        _url(f"postgresql+{ASYNC_DRIVER}"), **pool_options(async_=True)
     )
 
 else:
     
-    from google.cloud.sql.connector import Connector, IPTypes
+    from google.cloud.sql.connector import Connector, IPTypes, create_async_connector
     import pg8000
 
     instance_connection_name = os.environ[
@@ -65,8 +137,69 @@ else:
     engine = sqlalchemy.create_engine(
         "postgresql+pg8000://",
         creator=getconn,
-        # ...
+        **pool_options(),
     )
 
+    # The async connector must be created inside the running event loop,
+    # so it is initialized lazily on the first connection attempt.
+    async_connector = None
+
+    async def getconn_async():
+        global async_connector
+        if async_connector is None:
+            async_connector = await create_async_connector(refresh_strategy="LAZY")
+        return await async_connector.connect_async(
+            instance_connection_name,
+            "asyncpg",
+            user=db_user,
+            password=db_pass,
+            db=db_name,
+            ip_type=ip_type,
+        )
+
+    async_engine = create_async_engine(
+        "postgresql+asyncpg://",
+        async_creator=getconn_async,
+        **pool_options(async_=True),
+    )
+
+# Sync sessions are used by migrations, scripts and notebooks; the API request
+# path uses AsyncSessionLocal so handlers never block the event loop on I/O.
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
\ No newline at end of file
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+Base = declarative_base()
+
+
+def _pool_status(pool) -> dict:
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "timeouts": type(pool).timeouts,
+        "wait_time_ms": pool.wait_time_ms.snapshot(),
+    }
+
+
+def pool_stats() -> dict:
+    """
+    Collect connection pool statistics for the sync and async engines.
+
+    Returns:
+        dict: Configured limits plus, per engine, current size, checked-in
+        and checked-out connections, overflow, timeout count and a
+        histogram of checkout wait times in milliseconds.
+    """
+    return {
+        "config": {
+            "pool_size": POOL_SIZE,
+            "max_overflow": MAX_OVERFLOW,
+            "pool_timeout": POOL_TIMEOUT,
+            "pool_recycle": POOL_RECYCLE,
+            "pool_pre_ping": POOL_PRE_PING,
+        },
+        "sync": _pool_status(engine.pool),
+        "async": _pool_status(async_engine.pool),
+    }
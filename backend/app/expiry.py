@@ -0,0 +1,204 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from datetime import date, timedelta
+from typing import Any, Optional
+
+import sqlalchemy as sa
+
+from . import models, schemas
+from .database import AsyncSessionLocal
+
+# How often the scanner runs (<= 0 disables it) and how many days ahead it looks
+EXPIRY_SCAN_INTERVAL_SECONDS = float(os.getenv("EXPIRY_SCAN_INTERVAL_SECONDS", "0"))
+EXPIRY_SCAN_DAYS = int(os.getenv("EXPIRY_SCAN_DAYS", "7"))
+
+logger = logging.getLogger(__name__)
+
+Rows = list[dict[str, Any]]
+
+
+def expiring_query(until: date, since: Optional[date] = None, user_id: Optional[int] = None) -> sa.Select:
+    """
+    Select fridge items expiring on or before until, with their ingredient name.
+
+    Parameters:
+        until (date): Last expiration date included.
+        since (Optional[date]): First expiration date included; None includes expired items.
+        user_id (Optional[int]): Restrict to one user's fridge.
+
+    Returns:
+        sa.Select: FridgeItem rows plus name, soonest expiring first.
+    """
+    stmt = (
+        sa.select(models.FridgeItem, models.Ingredient.name.label("name"))
+        .join(models.Ingredient, models.FridgeItem.ingredient_id == models.Ingredient.id)
+        # the partial index only covers rows with an expiration date
+        .where(models.FridgeItem.expiration_date.is_not(None), models.FridgeItem.expiration_date <= until)
+        .order_by(models.FridgeItem.expiration_date, models.FridgeItem.id)
+    )
+    if since is not None:
+        stmt = stmt.where(models.FridgeItem.expiration_date >= since)
+    if user_id is not None:
+        stmt = stmt.where(models.FridgeItem.user_id == user_id)
+    return stmt
+
+
+def to_rows(results: Any, fields: list[str]) -> Rows:
+    return [
+        {**{field: getattr(item, field) for field in fields if field != "name"}, "name": name}
+        for item, name in results
+    ]
+
+
+class ExpiringCache:
+    """
+    Per-user fridge items expiring within a horizon, as computed by the
+    expiry scanner on a given day.
+
+    A fridge change drops the user's entry and bumps a version, so a scan
+    that ran concurrently with the change never stores a stale set; the
+    user is served from the database until the next scan.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._items: dict[int, Rows] = {}
+        self._versions: dict[int, int] = {}
+        # users changed since the last scan, answered from the database until the next one
+        self._stale: set[int] = set()
+        self.scanned_on: Optional[date] = None
+        self.horizon = 0
+        self.hits = 0
+        self.misses = 0
+
+    def versions(self) -> dict[int, int]:
+        with self._lock:
+            return dict(self._versions)
+
+    def get(self, user_id: int, until: date, include_expired: bool) -> Optional[Rows]:
+        """
+        Return the user's items expiring on or before until, or None if the
+        cache cannot answer (no scan today, horizon too short, or the user's
+        fridge changed since the scan).
+        """
+        today = date.today()
+        with self._lock:
+            fresh = self.scanned_on == today and until <= today + timedelta(days=self.horizon)
+            rows = self._items.get(user_id, []) if fresh and user_id not in self._stale else None
+        if rows is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return [
+            row for row in rows
+            if row["expiration_date"] <= until and (include_expired or row["expiration_date"] >= today)
+        ]
+
+    def store(self, scanned_on: date, horizon: int, items: dict[int, Rows], versions: dict[int, int]) -> None:
+        """
+        Replace the cache with a scan, except for users changed since versions() was taken.
+        """
+        with self._lock:
+            self._stale = {
+                user_id for user_id, version in self._versions.items() if versions.get(user_id, 0) != version
+            }
+            self._items = {user_id: rows for user_id, rows in items.items() if user_id not in self._stale}
+            self.scanned_on = scanned_on
+            self.horizon = horizon
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+            self._items.pop(user_id, None)
+            self._stale.add(user_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items = {}
+            self._stale = set()
+            self.scanned_on = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "scanned_on": self.scanned_on.isoformat() if self.scanned_on else None,
+                "horizon_days": self.horizon,
+                "users": len(self._items),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+class ExpiryScanner:
+    """
+    Periodically loads every user's fridge items expiring within the next
+    days (expired ones included) with one query over the expiration index,
+    and stores them in an ExpiringCache.
+    """
+
+    def __init__(
+        self,
+        cache: ExpiringCache,
+        interval: float = EXPIRY_SCAN_INTERVAL_SECONDS,
+        days: int = EXPIRY_SCAN_DAYS,
+    ):
+        self.cache = cache
+        self.interval = interval
+        self.days = days
+        self.scans = 0
+        self.last_scan_ms: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def scan(self) -> None:
+        start = time.perf_counter()
+        today = date.today()
+        versions = self.cache.versions()
+        async with AsyncSessionLocal() as db:
+            results = await db.execute(expiring_query(today + timedelta(days=self.days)))
+            items: dict[int, Rows] = {}
+            fields = list(schemas.FridgeNamedItem.model_fields)
+            for row in to_rows(results, fields):
+                items.setdefault(row["user_id"], []).append(row)
+        self.cache.store(today, self.days, items, versions)
+        self.scans += 1
+        self.last_scan_ms = (time.perf_counter() - start) * 1000
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.scan()
+            except Exception:
+                logger.exception("Expiry scan failed")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """
+        Start scanning in the background, unless disabled by a non-positive interval.
+        """
+        if self.interval <= 0 or (self._task is not None and not self._task.done()):
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "interval_seconds": self.interval,
+            "scans": self.scans,
+            "last_scan_ms": self.last_scan_ms,
+            **self.cache.stats(),
+        }
+
+
+expiring_cache = ExpiringCache()
+expiry_scanner = ExpiryScanner(expiring_cache)
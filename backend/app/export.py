@@ -0,0 +1,223 @@
+import csv
+import io
+import os
+import zlib
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Optional, Sequence
+
+from sqlalchemy import Connection, Select, Table, select
+
+from . import models
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "10000"))
+
+# file suffix and media type per export format
+FORMATS = {
+    "csv": (".csv.gz", "application/gzip"),
+    "parquet": (".parquet", "application/vnd.apache.parquet"),
+}
+
+# tables with password hashes, left out of exports served over HTTP
+PRIVATE_TABLES = frozenset({models.User.__tablename__})
+
+
+class ExportError(Exception):
+    """
+    Raised when an export cannot be started, e.g. for an unknown table or
+    when Parquet output is requested without pyarrow installed.
+    """
+
+
+def export_tables() -> dict[str, Table]:
+    """
+    Tables of every model in app/models.py, parents before children.
+    """
+    return {table.name: table for table in models.Base.metadata.sorted_tables}
+
+
+def get_table(name: str, private: bool = True) -> Table:
+    """
+    Look up an exportable table by name.
+
+    Parameters:
+        name (str): Table name.
+        private (bool): Whether tables holding credentials (PRIVATE_TABLES)
+            may be returned; full backups need them, the HTTP export does not.
+
+    Raises:
+        ExportError: If there is no such table, or it is private and private is False.
+    """
+    table = export_tables().get(name)
+    if table is None or (not private and name in PRIVATE_TABLES):
+        raise ExportError(f"Unknown table: {name}")
+    return table
+
+
+def export_query(table: Table, after: Optional[int] = None, batch_size: int = EXPORT_BATCH_SIZE) -> Select:
+    """
+    Select a table's rows in primary key order, streamed in batches.
+
+    Parameters:
+        table (Table): Table to export.
+        after (Optional[int]): Only rows with a primary key above this, to resume an export.
+        batch_size (int): Rows fetched per round trip from a server-side cursor.
+
+    Returns:
+        Select: The statement, with stream_results and yield_per set.
+    """
+    (key,) = table.primary_key.columns
+    stmt = select(table).order_by(key)
+    if after is not None:
+        stmt = stmt.where(key > after)
+    return stmt.execution_options(stream_results=True, yield_per=batch_size)
+
+
+class CsvGzipEncoder:
+    """
+    Encode row batches as gzip-compressed CSV.
+
+    Values are written as the db_to_csv notebook wrote them: empty for NULL
+    and str() otherwise. Each encoder writes one gzip member, so
+    the output of a resumed export (without header) can be appended to the
+    partial file.
+    """
+
+    def __init__(self, table: Table, header: bool = True):
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+        if header:
+            self._writer.writerow([column.name for column in table.columns])
+
+    def write(self, rows: Sequence[Sequence[Any]]) -> bytes:
+        self._writer.writerows(rows)
+        data = self._buffer.getvalue().encode()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return self._compressor.compress(data)
+
+    def close(self) -> bytes:
+        return self._compressor.compress(self._buffer.getvalue().encode()) + self._compressor.flush()
+
+
+class _Sink(io.RawIOBase):
+    """
+    Write-only file that hands its bytes back on drain(), while keeping the
+    running position the Parquet writer records offsets with.
+    """
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ParquetEncoder:
+    """
+    Encode row batches as a Parquet file, one row group per batch.
+
+    Needs pyarrow, which is imported on first use. Parquet files always
+    carry their schema, so header is ignored.
+    """
+
+    def __init__(self, table: Table, header: bool = True):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ExportError("Parquet export needs pyarrow: pip install backend[parquet]")
+        self._pa = pa
+        self.schema = pa.schema([(column.name, self._arrow_type(column.type.python_type)) for column in table.columns])
+        self._sink = _Sink()
+        self._writer = pq.ParquetWriter(self._sink, self.schema, compression="zstd")
+
+    def _arrow_type(self, python_type: type):
+        pa = self._pa
+        if python_type is bool:
+            return pa.bool_()
+        if python_type is int:
+            return pa.int64()
+        if python_type is float:
+            return pa.float64()
+        if issubclass(python_type, datetime):
+            return pa.timestamp("us")
+        if issubclass(python_type, date):
+            return pa.date32()
+        return pa.string()
+
+    def write(self, rows: Sequence[Sequence[Any]]) -> bytes:
+        if rows:
+            columns = list(zip(*rows))
+            self._writer.write_batch(self._pa.record_batch(columns, schema=self.schema))
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        self._writer.close()
+        return self._sink.drain()
+
+
+def make_encoder(format: str, table: Table, header: bool = True) -> CsvGzipEncoder | ParquetEncoder:
+    if format == "csv":
+        return CsvGzipEncoder(table, header)
+    if format == "parquet":
+        return ParquetEncoder(table, header)
+    raise ExportError(f"Unknown export format: {format}")
+
+
+def export_path(directory: Path, table: Table, format: str) -> Path:
+    return directory / f"{table.name}{FORMATS[format][0]}"
+
+
+def export_table(
+    connection: Connection,
+    table: Table,
+    path: Path,
+    format: str = "csv",
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> int:
+    """
+    Stream one table into a file with constant memory.
+
+    Rows are read through a server-side cursor batch_size at a time and
+    written to path with a ".part" suffix, which is renamed to path once the
+    table is complete, so an interrupted export never leaves a file that
+    looks finished.
+
+    Parameters:
+        connection (Connection): Sync database connection.
+        table (Table): Table to export.
+        path (Path): Destination file.
+        format (str): "csv" (gzip-compressed) or "parquet".
+        batch_size (int): Rows per fetch and per encoded chunk.
+
+    Returns:
+        int: Number of rows written.
+    """
+    encoder = make_encoder(format, table)
+    partial = path.with_name(path.name + ".part")
+    count = 0
+    with open(partial, "wb") as file:
+        result = connection.execute(export_query(table, batch_size=batch_size))
+        for rows in result.partitions():
+            file.write(encoder.write(rows))
+            count += len(rows)
+        file.write(encoder.close())
+    os.replace(partial, path)
+    return count
+
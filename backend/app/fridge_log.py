@@ -0,0 +1,305 @@
+import asyncio
+import logging
+import os
+import time
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Any, Iterable, NamedTuple, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from . import models
+from .database import async_engine
+from .helpers import time_now
+from .metrics import Histogram
+from .units import to_base
+
+# Rows per INSERT, and how long a partial batch may wait for more events
+FRIDGE_LOG_BATCH_SIZE = int(os.getenv("FRIDGE_LOG_BATCH_SIZE", "500"))
+FRIDGE_LOG_FLUSH_INTERVAL_SECONDS = float(os.getenv("FRIDGE_LOG_FLUSH_INTERVAL_SECONDS", "1"))
+# Events waiting to be written, and how long a request waits for room before dropping its event
+FRIDGE_LOG_MAX_QUEUE = int(os.getenv("FRIDGE_LOG_MAX_QUEUE", "10000"))
+FRIDGE_LOG_ENQUEUE_TIMEOUT_SECONDS = float(os.getenv("FRIDGE_LOG_ENQUEUE_TIMEOUT_SECONDS", "1"))
+# Attempts at writing a batch before it is dropped
+FRIDGE_LOG_MAX_ATTEMPTS = int(os.getenv("FRIDGE_LOG_MAX_ATTEMPTS", "3"))
+
+logger = logging.getLogger(__name__)
+
+
+class FridgeLogEvent(NamedTuple):
+    user_id: int
+    ingredient_id: int
+    change_amount: float
+    unit: str
+    action_type: str
+    timestamp: datetime
+
+
+def rollup_amounts(action_type: str, change_amount: float) -> tuple[float, float, float]:
+    """
+    Split a log entry into the (added, consumed, wasted) amounts of its daily rollup.
+
+    Positive adds and updates are additions, negative updates, removals and
+    cooked meals are consumption, and "waste" entries (items removed after their
+    expiration date) are waste.
+    """
+    if action_type == "waste":
+        return 0.0, 0.0, abs(change_amount)
+    if change_amount > 0 and action_type in ("add", "update"):
+        return change_amount, 0.0, 0.0
+    if change_amount < 0 and action_type in ("update", "remove", "cook"):
+        return 0.0, -change_amount, 0.0
+    return 0.0, 0.0, 0.0
+
+
+def daily_rollups(events: Iterable[FridgeLogEvent]) -> list[dict[str, Any]]:
+    """
+    Sum events into one row per user, ingredient, UTC day and unit.
+    """
+    totals: dict[tuple[int, int, date, str], list[float]] = defaultdict(lambda: [0.0, 0.0, 0.0, 0])
+    for event in events:
+        total = totals[(event.user_id, event.ingredient_id, event.timestamp.date(), event.unit)]
+        for i, amount in enumerate(rollup_amounts(event.action_type, event.change_amount)):
+            total[i] += amount
+        total[3] += 1
+    return [
+        {
+            "user_id": user_id, "ingredient_id": ingredient_id, "day": day, "unit": unit,
+            "added": added, "consumed": consumed, "wasted": wasted, "events": events,
+        }
+        for (user_id, ingredient_id, day, unit), (added, consumed, wasted, events) in totals.items()
+    ]
+
+
+def log_event(
+    user_id: int, ingredient_id: int, change_amount: float, unit: str, action_type: str,
+    timestamp: Optional[datetime] = None,
+) -> FridgeLogEvent:
+    """
+    Build a log entry, with the amount converted to its dimension's base unit
+    (g, ml or pcs) so entries of one ingredient add up whatever unit the item
+    was edited in. Unknown units are kept as they are.
+    """
+    amount, base_unit = to_base(change_amount, unit)
+    return FridgeLogEvent(user_id, ingredient_id, amount, base_unit, action_type, timestamp or time_now())
+
+
+async def upsert_rollups(connection: AsyncConnection, rows: list[dict[str, Any]]) -> None:
+    """
+    Add rollup rows onto the stored ones, creating missing days.
+    """
+    dialect = postgresql if connection.dialect.name == "postgresql" else sqlite
+    table = models.FridgeLogDaily.__table__
+    stmt = dialect.insert(table).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", "ingredient_id", "day", "unit"],
+        set_={
+            column: table.c[column] + stmt.excluded[column]
+            for column in ("added", "consumed", "wasted", "events")
+        },
+    )
+    await connection.execute(stmt)
+
+
+async def write_events(connection: AsyncConnection, events: list[FridgeLogEvent]) -> None:
+    """
+    Insert log entries and add them onto their daily rollups, in the
+    connection's current transaction.
+    """
+    await connection.execute(insert(models.FridgeLog), [event._asdict() for event in events])
+    await upsert_rollups(connection, daily_rollups(events))
+
+
+class FridgeLogWriter:
+    """
+    Write-behind buffer for FridgeLog rows.
+
+    Fridge mutations enqueue events and return; a background task writes
+    them with one multi-row INSERT per batch, once batch_size events are
+    waiting or the oldest has waited flush_interval seconds. The same
+    transaction adds the batch onto the FridgeLogDaily rollups.
+
+    The queue is bounded. When it is full, log() waits up to
+    enqueue_timeout seconds for the writer to catch up, slowing the request
+    down rather than growing memory, and then drops the event. Batches that
+    keep failing are dropped after max_attempts. Both are counted in
+    stats(). Remaining events are written on stop(), which the app calls on
+    shutdown; events still queued when a process is killed are lost.
+    Changes whose log entries must not be lost, like cooked meals, write
+    them with write_events() in their own transaction instead.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine = async_engine,
+        batch_size: int = FRIDGE_LOG_BATCH_SIZE,
+        flush_interval: float = FRIDGE_LOG_FLUSH_INTERVAL_SECONDS,
+        max_queue: int = FRIDGE_LOG_MAX_QUEUE,
+        enqueue_timeout: float = FRIDGE_LOG_ENQUEUE_TIMEOUT_SECONDS,
+        max_attempts: int = FRIDGE_LOG_MAX_ATTEMPTS,
+    ):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.enqueue_timeout = enqueue_timeout
+        self.max_attempts = max_attempts
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self.flush_ms = Histogram()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue[FridgeLogEvent]] = None
+        self._task: Optional[asyncio.Task] = None
+        # set by flush() so a partial batch is written without waiting out the interval
+        self._wake: Optional[asyncio.Event] = None
+
+    def start(self) -> None:
+        """
+        Start the background writer on the running event loop, if not running.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # asyncio primitives belong to one loop; carry queued events over
+            pending = []
+            while self._queue is not None and not self._queue.empty():
+                pending.append(self._queue.get_nowait())
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._wake = asyncio.Event()
+            self._task = None
+            for event in pending:
+                self._queue.put_nowait(event)
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run())
+
+    def _channels(self) -> tuple[asyncio.Queue[FridgeLogEvent], asyncio.Event]:
+        """
+        Return the queue and wake event, which exist once start() has run.
+        """
+        if self._queue is None or self._wake is None:
+            raise RuntimeError("FridgeLogWriter has not been started")
+        return self._queue, self._wake
+
+    async def log(self, user_id: int, ingredient_id: int, change_amount: float, unit: str, action_type: str) -> None:
+        """
+        Enqueue a fridge change to be written in the background, see log_event().
+
+        Parameters:
+            user_id (int): Owner of the fridge item.
+            ingredient_id (int): Ingredient whose stock changed.
+            change_amount (float): Signed change, in unit.
+            unit (str): The fridge item's unit; unknown units are kept as they are.
+            action_type (str): "add", "update", "remove", "waste" or "cook".
+        """
+        self.start()
+        queue, _ = self._channels()
+        event = log_event(user_id, ingredient_id, change_amount, unit, action_type)
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            try:
+                await asyncio.wait_for(queue.put(event), self.enqueue_timeout)
+            except asyncio.TimeoutError:
+                self.dropped += 1
+                logger.warning("Fridge log queue full, dropped %s", event)
+
+    async def _next_batch(self) -> list[FridgeLogEvent]:
+        queue, wake_event = self._channels()
+        batch = [await queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or wake_event.is_set():
+                break
+            get = asyncio.ensure_future(queue.get())
+            wake = asyncio.ensure_future(wake_event.wait())
+            done, _ = await asyncio.wait({get, wake}, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            wake.cancel()
+            if get not in done:
+                get.cancel()
+                break
+            batch.append(get.result())
+        return batch
+
+    async def _write(self, batch: list[FridgeLogEvent]) -> None:
+        queue, _ = self._channels()
+        start = time.perf_counter()
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                async with self.engine.begin() as connection:
+                    await write_events(connection, batch)
+            except Exception:
+                if attempt == self.max_attempts:
+                    self.failed += len(batch)
+                    logger.exception("Dropping %d fridge log events after %d attempts", len(batch), attempt)
+                    break
+                await asyncio.sleep(self.flush_interval * attempt)
+            else:
+                self.written += len(batch)
+                self.batches += 1
+                break
+        self.flush_ms.observe((time.perf_counter() - start) * 1000)
+        for _ in batch:
+            queue.task_done()
+
+    async def _run(self) -> None:
+        while True:
+            await self._write(await self._next_batch())
+
+    async def flush(self) -> None:
+        """
+        Wait until every event enqueued so far has been written (or dropped).
+        """
+        if self._queue is None:
+            return
+        self.start()
+        queue, wake = self._channels()
+        wake.set()
+        try:
+            await queue.join()
+        finally:
+            wake.clear()
+
+    async def stop(self) -> None:
+        """
+        Write the remaining events and stop the background writer.
+        """
+        if self._queue is None:
+            return
+        # a batch in progress keeps its events out of the queue until written
+        await self.flush()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        """
+        Return queue limits and depth, written/dropped/failed counters and a
+        histogram of batch write time in milliseconds.
+        """
+        return {
+            "batch_size": self.batch_size,
+            "max_queue": self.max_queue,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "flush_ms": self.flush_ms.snapshot(),
+        }
+
+
+fridge_log_writer = FridgeLogWriter()
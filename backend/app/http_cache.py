@@ -0,0 +1,96 @@
+import hashlib
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+
+from fastapi import Request, Response
+from sqlalchemy import Select, func, select
+
+# How long browsers and proxies may reuse a catalogue response without revalidating it
+CATALOGUE_MAX_AGE_SECONDS = int(os.getenv("CATALOGUE_MAX_AGE_SECONDS", "0"))
+
+
+def make_etag(request: Request, *state: Any) -> str:
+    """
+    Build a strong ETag from the request's query string and the state of
+    the data behind the response, e.g. row counts and latest updated_at.
+    """
+    digest = hashlib.sha256(repr((request.url.path, request.url.query, state)).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def table_state(*columns: Any) -> Select:
+    """
+    Select the row count and the maximum of each column over the column's table,
+    as a single row of scalar subqueries: (count, max, count, max, ...).
+
+    Parameters:
+        columns: ORM columns that change whenever a row does, e.g. updated_at.
+
+    Returns:
+        Select: One row with two values per column.
+    """
+    values = []
+    for column in columns:
+        values.append(select(func.count()).select_from(column.class_).scalar_subquery())
+        values.append(select(func.max(column)).scalar_subquery())
+    return select(*values)
+
+
+def as_utc(value: datetime) -> datetime:
+    """
+    Treat naive timestamps (as stored by SQLite and timestamp without time zone) as UTC.
+    """
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> bool:
+    """
+    Evaluate If-None-Match, or If-Modified-Since when no ETag was sent.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        # If-None-Match uses weak comparison
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        # HTTP dates have one-second precision
+        return as_utc(last_modified).replace(microsecond=0) <= as_utc(since)
+    return False
+
+
+def cache_headers(etag: str, last_modified: Optional[datetime] = None) -> dict[str, str]:
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={CATALOGUE_MAX_AGE_SECONDS}, must-revalidate",
+    }
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(as_utc(last_modified), usegmt=True)
+    return headers
+
+
+def conditional(
+    request: Request, response: Response, etag: str, last_modified: Optional[datetime] = None
+) -> Optional[Response]:
+    """
+    Answer a conditional GET.
+
+    Returns a 304 response if the client's copy is current; otherwise sets
+    the validators and Cache-Control on response and returns None, and the
+    caller builds the body as usual. Without last_modified (e.g. the
+    table_state maximum of an empty table) no Last-Modified is sent and
+    If-Modified-Since is ignored, so only the ETag validates.
+    """
+    headers = cache_headers(etag, last_modified)
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
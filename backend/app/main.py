@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import os
@@ -5,12 +7,34 @@ import os
 from . import users
 
 from . import models
-from .api import fridge_items, ingredients, meal_types, recipes, schedule, shopping_list
-from .database import engine
+from .api import admin, analytics, fridge_items, ingredients, meal_types, metrics, recipes, schedule, search, shopping_list
+from .catalogue import catalogue
+from .compression import CompressionMiddleware
+from .database import async_engine, engine
+from .expiry import expiry_scanner
+from .fridge_log import fridge_log_writer
+from .pagination import NEXT_CURSOR_HEADER
+from .passwords import password_hasher
 
 models.Base.metadata.create_all(bind=engine)
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    fridge_log_writer.start()
+    expiry_scanner.start()
+    catalogue.start()
+    yield
+    await catalogue.stop()
+    await expiry_scanner.stop()
+    # write buffered fridge log events before the engine goes away
+    await fridge_log_writer.stop()
+    # release pooled async connections and hashing workers on shutdown
+    password_hasher.shutdown()
+    await async_engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(ingredients.router)
 app.include_router(recipes.router)
@@ -18,6 +42,10 @@ app.include_router(fridge_items.router)
 app.include_router(meal_types.router)
 app.include_router(schedule.router)
 app.include_router(shopping_list.router)
+app.include_router(search.router)
+app.include_router(analytics.router)
+app.include_router(metrics.router)
+app.include_router(admin.router)
 
 # FastAPI Users routers (auth, register, users management)
 app.include_router(users.router, prefix="/auth", tags=["auth"])
@@ -29,10 +57,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", "Last-Modified"],
 )
+# compress large and streamed responses (gzip, or brotli when installed)
+app.add_middleware(CompressionMiddleware)
 
 @app.get("/")
-def read_root():
+async def read_root():
     return {"message": "Welcome to CookApp API!"}
 
 if __name__ == "__main__":
@@ -0,0 +1,51 @@
+import threading
+from bisect import bisect_left
+
+# Upper bounds (milliseconds) used by latency histograms unless overridden.
+DEFAULT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class Histogram:
+    """
+    Thread-safe cumulative histogram for latency observations.
+
+    Each observation is counted in the first bucket whose upper bound is
+    greater than or equal to the value; values above the last bound fall
+    into the "+Inf" bucket.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS_MS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """
+        Record a single observation.
+
+        Parameters:
+            value (float): The observed value, in the histogram's unit.
+        """
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def snapshot(self) -> dict:
+        """
+        Return the current state of the histogram.
+
+        Returns:
+            dict: Cumulative bucket counts keyed by upper bound, plus the
+            total count and sum of all observations.
+        """
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        cumulative: dict[str, int] = {}
+        running = 0
+        for bound, count in zip([*map(str, self.buckets), "+Inf"], counts):
+            running += count
+            cumulative[bound] = running
+        return {"buckets": cumulative, "count": running, "sum": total}
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, ForeignKey, Date, CheckConstraint
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, ForeignKey, Date, CheckConstraint, Index, UniqueConstraint, text
 from sqlalchemy.orm import relationship
 from .database import Base, engine
 from .helpers import time_now
@@ -13,6 +13,8 @@ class Ingredient(Base):
         name (str): Name of the ingredient.
         category (str): Category of the ingredient.
         default_unit (str): Default unit of measurement.
+        density_g_per_ml (float): Grams per millilitre, to convert between mass and volume.
+        grams_per_piece (float): Weight of one piece, to convert between count and mass.
         calories_per_unit (float): Calories per unit of the ingredient.
         is_perishable (bool): Indicates if the ingredient is perishable.
         shelf_life_days (int): Shelf life of the ingredient in days.
@@ -29,6 +31,8 @@ class Ingredient(Base):
     name = Column(String, nullable=False)
     category = Column(String)
     default_unit = Column(String)
+    density_g_per_ml: Column[float] = Column(Float) # explicit type needed because of pylance bug
+    grams_per_piece: Column[float] = Column(Float) # explicit type needed because of pylance bug
     calories_per_unit: Column[float] = Column(Float) # explicit type needed because of pylance bug
     is_perishable = Column(Boolean, default=True)
     shelf_life_days = Column(Integer)
@@ -100,6 +104,7 @@ class RecipeIngredient(Base):
     quantity: Column[float] = Column(Float, nullable=False) # explicit type needed because of pylance bug
     __table_args__ = (
         CheckConstraint('quantity > 0', name='check_quantity_positive'),
+        Index("ix_recipe_ingredients_recipe_id", "recipe_id"),
     )
     unit = Column(String, nullable=False)
     optional = Column(Boolean, default=False)
@@ -166,6 +171,14 @@ class FridgeItem(Base):
     """
 
     __tablename__ = "fridge_items"
+    __table_args__ = (
+        Index("ix_fridge_items_user_id_ingredient_id_unit", "user_id", "ingredient_id", "unit"),
+        Index(
+            "ix_fridge_items_user_id_expiration_date", "user_id", "expiration_date",
+            postgresql_where=text("expiration_date IS NOT NULL"),
+            sqlite_where=text("expiration_date IS NOT NULL"),
+        ),
+    )
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     ingredient_id = Column(Integer, ForeignKey("ingredients.id"), nullable=False)
@@ -184,7 +197,9 @@ class FridgeLog(Base):
         id (int): Primary key.
         user_id (int): Foreign key to User.
         ingredient_id (int): Foreign key to Ingredient.
-        change_amount (float): Amount of change in quantity.
+        change_amount (float): Amount of change in quantity, in unit.
+        unit (str): Base unit of change_amount ("g", "ml" or "pcs"), or the
+            fridge item's unit if it cannot be converted.
         action_type (str): Type of action (e.g., "add", "remove").
         timestamp (datetime): Timestamp when the change was made.
     """
@@ -194,10 +209,49 @@ class FridgeLog(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     ingredient_id = Column(Integer, ForeignKey("ingredients.id"), nullable=False)
     change_amount: Column[float] = Column(Float) # explicit type needed because of pylance bug
+    unit = Column(String)
     action_type = Column(String)
     timestamp = Column(DateTime, default=time_now)
 
 
+class FridgeLogDaily(Base):
+    """
+    SQLAlchemy model for the daily rollup of a user's FridgeLog entries per ingredient.
+
+    Maintained by the fridge log writer in the same transaction as the log
+    rows it summarises. There is one row per unit the log holds amounts in,
+    so grams are never added to millilitres or pieces.
+
+    Fields:
+        id (int): Primary key.
+        user_id (int): Foreign key to User.
+        ingredient_id (int): Foreign key to Ingredient.
+        day (date): UTC day of the log entries.
+        unit (str): Unit of the amounts, as logged; "" for entries logged without one.
+        added (float): Amount put into the fridge.
+        consumed (float): Amount used or removed before expiring.
+        wasted (float): Amount thrown away after its expiration date.
+        events (int): Number of log entries summarised.
+    """
+
+    __tablename__ = "fridge_log_daily"
+    __table_args__ = (
+        UniqueConstraint(
+            "user_id", "ingredient_id", "day", "unit", name="uq_fridge_log_daily_user_ingredient_day_unit"
+        ),
+        Index("ix_fridge_log_daily_user_id_day", "user_id", "day"),
+    )
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    ingredient_id = Column(Integer, ForeignKey("ingredients.id"), nullable=False)
+    day = Column(Date, nullable=False)
+    unit = Column(String, nullable=False, default="", server_default="")
+    added: Column[float] = Column(Float, nullable=False, default=0) # explicit type needed because of pylance bug
+    consumed: Column[float] = Column(Float, nullable=False, default=0) # explicit type needed because of pylance bug
+    wasted: Column[float] = Column(Float, nullable=False, default=0) # explicit type needed because of pylance bug
+    events = Column(Integer, nullable=False, default=0)
+
+
 class Schedule(Base):
     """
     SQLAlchemy model for a schedule entry.
@@ -208,6 +262,7 @@ class Schedule(Base):
         user_id (int): Foreign key to User.
         date (date): Date of the scheduled meal.
         meal_type (int): Foreign key to MealType.
+        cooked_at (datetime): When the meal was marked cooked and its ingredients were taken from the fridge.
 
     Relationships:
         meal_type: The associated MealType.
@@ -215,11 +270,15 @@ class Schedule(Base):
     """
 
     __tablename__ = "schedule"
+    __table_args__ = (
+        Index("ix_schedule_user_id_date", "user_id", "date"),
+    )
     id = Column(Integer, primary_key=True)
     recipe_id = Column(Integer, ForeignKey("recipes.id"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     date = Column(Date, nullable=False)
     meal_type = Column(Integer, ForeignKey("meal_types.id"), nullable=False)
+    cooked_at = Column(DateTime)
 
 
 class MealType(Base):
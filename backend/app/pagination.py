@@ -0,0 +1,76 @@
+import base64
+import json
+from datetime import date
+from typing import Any, Callable, Optional, Sequence
+
+from fastapi import HTTPException, Response
+from sqlalchemy import Select, tuple_
+from sqlalchemy.sql.elements import ColumnElement
+
+# Response header carrying the cursor of the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Encode the sort key of the last row of a page into an opaque cursor.
+    """
+    raw = json.dumps([v.isoformat() if isinstance(v, date) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, parsers: Sequence[Callable[[Any], Any]]) -> list[Any]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Parameters:
+        cursor (str): The opaque cursor from a previous page.
+        parsers (Sequence[Callable]): One parser per key column, e.g. int or
+            date.fromisoformat.
+
+    Raises:
+        HTTPException: 400 error if the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(parsers):
+            raise ValueError(cursor)
+        return [parse(value) for parse, value in zip(parsers, values)]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def paginate(
+    stmt: Select,
+    keys: Sequence[ColumnElement],
+    parsers: Sequence[Callable[[Any], Any]],
+    cursor: Optional[str],
+    skip: int,
+    limit: Optional[int],
+) -> Select:
+    """
+    Order a query by its unique sort key and apply keyset or offset paging.
+
+    With a cursor, rows after the cursor's key are returned (skip is
+    ignored); without one, the legacy skip/limit paging is used. A limit
+    of None returns every remaining row, e.g. for streamed responses.
+    """
+    stmt = stmt.order_by(*keys)
+    if cursor is not None:
+        values = decode_cursor(cursor, parsers)
+        if len(keys) == 1:
+            stmt = stmt.where(keys[0] > values[0])
+        else:
+            stmt = stmt.where(tuple_(*keys) > tuple_(*values))
+    else:
+        stmt = stmt.offset(skip)
+    return stmt.limit(limit)
+
+
+def set_next_cursor(response: Response, rows: Sequence[Any], key: Callable[[Any], tuple], limit: int) -> None:
+    """
+    Set the next-page cursor header when the page is full.
+    """
+    if limit > 0 and len(rows) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(*key(rows[-1]))
@@ -0,0 +1,122 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable, Optional
+
+from passlib.context import CryptContext
+
+from .metrics import Histogram
+
+# bcrypt cost factor; hashes with a different cost are rehashed on login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Worker processes doing bcrypt work, and how many calls may wait for one
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "32"))
+
+# Kept free of app imports so spawned worker processes import it cheaply.
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+
+def _verify_and_update(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def _hash(plain_password: str) -> str:
+    return pwd_context.hash(plain_password)
+
+
+class PasswordHasherBusy(Exception):
+    """
+    Raised when the password hashing queue is full.
+    """
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing and verification in a bounded process pool.
+
+    At most max_workers calls run at once; up to max_queue more may wait
+    for a worker, and anything beyond that is rejected with
+    PasswordHasherBusy instead of piling up behind a login storm.
+    """
+
+    def __init__(self, max_workers: int = PASSWORD_HASH_WORKERS, max_queue: int = PASSWORD_HASH_MAX_QUEUE):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.pending = 0
+        self.rejected = 0
+        self.latency_ms = Histogram()
+        self._executor: Optional[Executor] = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            # spawn, not fork: forking a process with a running event loop
+            # and live DB connections is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def _submit(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if self.pending >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise PasswordHasherBusy()
+        self.pending += 1
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self.pending -= 1
+            self.latency_ms.observe((time.perf_counter() - start) * 1000)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+        """
+        Verify a password and report whether its hash needs upgrading.
+
+        Parameters:
+            plain_password (str): Password supplied by the user.
+            hashed_password (str): Stored hash.
+
+        Returns:
+            tuple[bool, Optional[str]]: Whether the password matched, and a
+            replacement hash if the stored one uses an outdated cost factor.
+
+        Raises:
+            PasswordHasherBusy: If the hashing queue is full.
+        """
+        return await self._submit(_verify_and_update, plain_password, hashed_password)
+
+    async def hash(self, plain_password: str) -> str:
+        """
+        Hash a password with the configured cost factor.
+
+        Raises:
+            PasswordHasherBusy: If the hashing queue is full.
+        """
+        return await self._submit(_hash, plain_password)
+
+    def stats(self) -> dict:
+        """
+        Return pool limits, current in-flight and queued calls, rejections
+        and a histogram of call latency in milliseconds.
+        """
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": min(self.pending, self.max_workers),
+            "queue_depth": max(self.pending - self.max_workers, 0),
+            "rejected": self.rejected,
+            "latency_ms": self.latency_ms.snapshot(),
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher()
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Literal, Optional
 from datetime import datetime, date as datatime_date
 
 class IngredientBase(BaseModel):
@@ -9,6 +9,8 @@ class IngredientBase(BaseModel):
     name: str = Field(..., description="Name of the ingredient.")
     category: Optional[str] = Field(None, description="Category of the ingredient.")
     default_unit: Optional[str] = Field(None, description="Default unit of measurement.")
+    density_g_per_ml: Optional[float] = Field(None, description="Grams per millilitre, used to convert between mass and volume.")
+    grams_per_piece: Optional[float] = Field(None, description="Weight of one piece in grams, used to convert between count and mass.")
     calories_per_unit: Optional[float] = Field(None, description="Calories per unit of the ingredient.")
     is_perishable: Optional[bool] = Field(True, description="Indicates if the ingredient is perishable.")
     shelf_life_days: Optional[int] = Field(None, description="Shelf life of the ingredient in days.")
@@ -121,6 +123,59 @@ class Recipe(RecipeBase):
     class Config:
         orm_mode = True
 
+class SearchResult(BaseModel):
+    """
+    Schema for a search or autocomplete hit.
+    """
+    kind: str = Field(..., description="Type of the hit: 'recipe' or 'ingredient'.")
+    id: int = Field(..., description="ID of the recipe or ingredient.")
+    name: str = Field(..., description="Name of the recipe or ingredient.")
+    score: float = Field(..., description="Relevance score, higher is better.")
+    class Config:
+        orm_mode = True
+
+class MissingIngredient(BaseModel):
+    """
+    Schema for an ingredient quantity a recipe needs beyond the fridge stock.
+    """
+    ingredient_id: int = Field(..., description="ID of the ingredient.")
+    name: str = Field(..., description="Name of the ingredient.")
+    quantity: float = Field(..., description="Quantity still missing.")
+    unit: str = Field(..., description="Unit of measurement, as used by the recipe.")
+
+class CookableRecipe(BaseModel):
+    """
+    Schema for a recipe ranked by how well the user's fridge covers it.
+    """
+    id: int = Field(..., description="ID of the recipe.")
+    name: str = Field(..., description="Name of the recipe.")
+    coverage: float = Field(..., description="Share of required ingredients the fridge holds enough of (0-1).")
+    required: int = Field(..., description="Number of required (non-optional) ingredients.")
+    missing: list[MissingIngredient] = Field(..., description="Ingredients and quantities still missing.")
+
+class IngredientUsage(BaseModel):
+    """
+    Schema for a user's fridge activity for one ingredient over a date range.
+    """
+    ingredient_id: int = Field(..., description="ID of the ingredient.")
+    name: str = Field(..., description="Name of the ingredient.")
+    unit: str = Field(..., description="Unit of the amounts: g, ml or pcs, another unit that cannot be converted, or empty for changes logged without a unit.")
+    added: float = Field(..., description="Amount put into the fridge.")
+    consumed: float = Field(..., description="Amount used or removed before expiring.")
+    wasted: float = Field(..., description="Amount thrown away after its expiration date.")
+    daily_consumption: float = Field(..., description="Average amount consumed per day of the range.")
+    waste_rate: Optional[float] = Field(None, description="Share of the amount taken out of the fridge that was wasted (0-1).")
+
+class UsageTrendPoint(BaseModel):
+    """
+    Schema for one day or week of an ingredient's fridge activity.
+    """
+    period_start: datatime_date = Field(..., description="First day of the period.")
+    unit: str = Field(..., description="Unit of the amounts, as in IngredientUsage.")
+    added: float = Field(..., description="Amount put into the fridge.")
+    consumed: float = Field(..., description="Amount used or removed before expiring.")
+    wasted: float = Field(..., description="Amount thrown away after its expiration date.")
+
 class UserBase(BaseModel):
     """
     Base schema for User.
@@ -179,6 +234,23 @@ class FridgeNamedItem(FridgeItem):
     """
     name: str = Field(..., description="Name of the ingredient.")
 
+class FridgeItemOperation(BaseModel):
+    """
+    Schema for one operation of a fridge item batch.
+    """
+    op: Literal["create", "update", "delete"] = Field(..., description="Operation to perform.")
+    id: Optional[int] = Field(None, description="ID of the fridge item to update or delete.")
+    item: Optional[FridgeItemCreate] = Field(None, description="Fridge item data to create or update with.")
+
+class FridgeItemOperationResult(BaseModel):
+    """
+    Schema for the outcome of one operation of a fridge item batch.
+    """
+    op: str = Field(..., description="Operation performed.")
+    status: int = Field(..., description="HTTP status of the operation: 200, or 403, 404 or 422 if it was skipped.")
+    item: Optional[FridgeItem] = Field(None, description="The created, updated or deleted fridge item.")
+    detail: Optional[str] = Field(None, description="Why the operation was skipped.")
+
 class FridgeLogBase(BaseModel):
     """
     Base schema for FridgeLog.
@@ -226,9 +298,10 @@ class ScheduleCreate(BaseModel):
 class Schedule(ScheduleBase):
     """
     Schema for reading a Schedule entry from the database.
-    Inherits all fields from ScheduleBase and adds id.
+    Inherits all fields from ScheduleBase and adds id and cooked_at.
     """
     id: int
+    cooked_at: Optional[datetime] = Field(None, description="When the meal was marked cooked.")
     class Config:
         orm_mode = True
 
@@ -239,6 +312,41 @@ class ScheduleGet(Schedule):
     """
     recipe_name: Optional[str] = None
 
+class ScheduleTemplateEntry(BaseModel):
+    """
+    Schema for a meal of a template week.
+    """
+    weekday: int = Field(..., ge=0, le=6, description="Day of the week, 0 for Monday to 6 for Sunday.")
+    recipe_id: int = Field(..., description="ID of the recipe.")
+    meal_type: int = Field(..., description="ID of the meal type.")
+
+class SchedulePlan(BaseModel):
+    """
+    Schema for planning the meals of a date range at once.
+    """
+    start_date: datatime_date = Field(..., description="First day of the plan.")
+    end_date: datatime_date = Field(..., description="Last day of the plan.")
+    entries: list[ScheduleCreate] = Field([], description="Meals on given dates within the range.")
+    template: list[ScheduleTemplateEntry] = Field([], description="Meals repeated on their weekday across the range.")
+
+class FridgeDeduction(BaseModel):
+    """
+    Schema for an amount taken from a fridge item when a meal was cooked.
+    """
+    fridge_item_id: int = Field(..., description="ID of the fridge item.")
+    ingredient_id: int = Field(..., description="ID of the ingredient.")
+    quantity: float = Field(..., description="Amount taken, in the fridge item's unit.")
+    unit: str = Field(..., description="Unit of the fridge item.")
+    remaining: float = Field(..., description="Amount left; the item is removed when nothing is left.")
+
+class CookedMeal(BaseModel):
+    """
+    Schema for the result of marking a scheduled meal cooked.
+    """
+    schedule: Schedule = Field(..., description="The schedule entry, with cooked_at set.")
+    deducted: list[FridgeDeduction] = Field(..., description="Amounts taken from the fridge, oldest expiration first.")
+    missing: list[MissingIngredient] = Field(..., description="Recipe quantities the fridge could not cover.")
+
 
 class MealTypeBase(BaseModel):
     """
@@ -0,0 +1,371 @@
+import bisect
+import difflib
+import heapq
+import os
+import re
+import threading
+import time
+from typing import Any, Iterable, NamedTuple, Optional
+
+from sqlalchemy import event
+
+from . import models
+from .commit_hooks import on_commit
+
+SEARCH_INDEX_TTL_SECONDS = float(os.getenv("SEARCH_INDEX_TTL_SECONDS", "300"))
+
+RECIPE = "recipe"
+INGREDIENT = "ingredient"
+
+# Field weights: a match in a name outranks a tag or category, which outranks body text
+NAME_WEIGHT = 3.0
+LABEL_WEIGHT = 2.0
+TEXT_WEIGHT = 1.0
+EXACT_BONUS = 0.5
+FUZZY_FACTOR = 0.5
+
+# Prefix and fuzzy expansions considered per query token
+MAX_EXPANSIONS = 256
+FUZZY_CUTOFF = 0.75
+
+# Letters and digits only, so tokens are also safe inside a Postgres tsquery
+TOKEN_RE = re.compile(r"[^\W_]+")
+
+# Full-text documents, kept identical to the expression indexes of the
+# add_search_indexes migration so Postgres can use them
+RECIPE_DOCUMENT = (
+    "to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(description, '') "
+    "|| ' ' || coalesce(instructions, ''))"
+)
+INGREDIENT_DOCUMENT = "to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(category, ''))"
+NAME_DOCUMENT = "to_tsvector('simple', coalesce(name, ''))"
+TAG_DOCUMENT = "to_tsvector('simple', tag)"
+
+Key = tuple[str, int]
+
+
+def tokenize(text: Optional[str]) -> list[str]:
+    """
+    Split text into lowercase letter/digit tokens.
+    """
+    return TOKEN_RE.findall(text.lower()) if text else []
+
+
+def prefix_tsquery(tokens: list[str]) -> str:
+    """
+    Build a Postgres tsquery text matching every token as a prefix.
+    """
+    return " & ".join(f"{token}:*" for token in tokens)
+
+
+class SearchHit(NamedTuple):
+    kind: str
+    id: int
+    name: str
+    score: float
+
+
+class _Document(NamedTuple):
+    name: str
+    texts: tuple[tuple[Optional[str], float], ...]
+
+
+class SearchIndex:
+    """
+    In-memory inverted index over recipe and ingredient text, used when the
+    database has no full-text search (SQLite).
+
+    Every token maps to the documents containing it with the weight of the
+    best field it appears in. A sorted vocabulary gives prefix matches with
+    a binary search, and tokens without any prefix match fall back to close
+    spellings among tokens sharing their first letter.
+
+    The index is built from the database on first use and kept current by
+    ORM events on Recipe, Ingredient and RecipeTag, applied when their
+    transaction commits. It is process-local and
+    writes that bypass the ORM are not seen, so it is rebuilt once it is
+    older than the TTL.
+    """
+
+    def __init__(self, ttl: float = SEARCH_INDEX_TTL_SECONDS):
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._reset()
+        self._built_at: Optional[float] = None
+
+    def _reset(self) -> None:
+        self._postings: dict[str, dict[Key, float]] = {}
+        self._name_postings: dict[str, dict[Key, float]] = {}
+        self._vocab: list[str] = []
+        self._docs: dict[Key, _Document] = {}
+        self._doc_tokens: dict[Key, dict[str, float]] = {}
+        self._tags: dict[int, list[str]] = {}
+
+    @property
+    def stale(self) -> bool:
+        built_at = self._built_at
+        return built_at is None or time.monotonic() - built_at > self.ttl
+
+    def invalidate(self) -> None:
+        """
+        Force a rebuild on next use.
+        """
+        self._built_at = None
+
+    def rebuild(
+        self,
+        recipes: Iterable[tuple[int, str, Optional[str], Optional[str]]],
+        ingredients: Iterable[tuple[int, str, Optional[str]]],
+        tags: Iterable[tuple[int, str]],
+    ) -> None:
+        """
+        Replace the index contents.
+
+        Parameters:
+            recipes: (id, name, description, instructions) rows.
+            ingredients: (id, name, category) rows.
+            tags: (recipe_id, tag) rows.
+        """
+        with self._lock:
+            self._reset()
+            for recipe_id, tag in tags:
+                self._tags.setdefault(recipe_id, []).append(tag)
+            for recipe_id, name, description, instructions in recipes:
+                self._put(
+                    (RECIPE, recipe_id),
+                    _Document(name, ((description, TEXT_WEIGHT), (instructions, TEXT_WEIGHT))),
+                    keep_sorted=False,
+                )
+            for ingredient_id, name, category in ingredients:
+                self._put((INGREDIENT, ingredient_id), _Document(name, ((category, LABEL_WEIGHT),)), keep_sorted=False)
+            self._vocab = sorted(self._postings)
+            self._built_at = time.monotonic()
+
+    def upsert_recipe(self, recipe_id: int, name: str, description: Optional[str], instructions: Optional[str]) -> None:
+        self._update((RECIPE, recipe_id), _Document(name, ((description, TEXT_WEIGHT), (instructions, TEXT_WEIGHT))))
+
+    def upsert_ingredient(self, ingredient_id: int, name: str, category: Optional[str]) -> None:
+        self._update((INGREDIENT, ingredient_id), _Document(name, ((category, LABEL_WEIGHT),)))
+
+    def remove(self, kind: str, item_id: int) -> None:
+        with self._lock:
+            if self._built_at is None:
+                return
+            self._drop((kind, item_id))
+            self._docs.pop((kind, item_id), None)
+            if kind == RECIPE:
+                self._tags.pop(item_id, None)
+
+    def add_tag(self, recipe_id: int, tag: str) -> None:
+        with self._lock:
+            if self._built_at is None:
+                return
+            self._tags.setdefault(recipe_id, []).append(tag)
+            document = self._docs.get((RECIPE, recipe_id))
+            if document is not None:
+                self._put((RECIPE, recipe_id), document)
+
+    def remove_tag(self, recipe_id: int, tag: str) -> None:
+        with self._lock:
+            if self._built_at is None:
+                return
+            tags = self._tags.get(recipe_id, [])
+            if tag in tags:
+                tags.remove(tag)
+            document = self._docs.get((RECIPE, recipe_id))
+            if document is not None:
+                self._put((RECIPE, recipe_id), document)
+
+    def _update(self, key: Key, document: _Document) -> None:
+        with self._lock:
+            # before the first build there is nothing to keep current
+            if self._built_at is not None:
+                self._put(key, document)
+
+    def _put(self, key: Key, document: _Document, keep_sorted: bool = True) -> None:
+        self._drop(key)
+        weights: dict[str, float] = {}
+        fields = [(document.name, NAME_WEIGHT), *document.texts]
+        if key[0] == RECIPE:
+            fields.extend((tag, LABEL_WEIGHT) for tag in self._tags.get(key[1], ()))
+        for text, weight in fields:
+            for token in tokenize(text):
+                if weight > weights.get(token, 0.0):
+                    weights[token] = weight
+        for token, weight in weights.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                if keep_sorted:
+                    bisect.insort(self._vocab, token)
+            postings[key] = weight
+            if weight == NAME_WEIGHT:
+                self._name_postings.setdefault(token, {})[key] = weight
+        self._docs[key] = document
+        self._doc_tokens[key] = weights
+
+    def _drop(self, key: Key) -> None:
+        for token in self._doc_tokens.pop(key, {}):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(key, None)
+            names = self._name_postings.get(token)
+            if names is not None:
+                names.pop(key, None)
+                if not names:
+                    del self._name_postings[token]
+            if not postings:
+                del self._postings[token]
+                position = bisect.bisect_left(self._vocab, token)
+                if position < len(self._vocab) and self._vocab[position] == token:
+                    del self._vocab[position]
+
+    def _expand(self, token: str) -> list[tuple[str, float]]:
+        """
+        Return (vocabulary token, score factor) pairs a query token matches.
+        """
+        start = bisect.bisect_left(self._vocab, token)
+        matches: list[tuple[str, float]] = []
+        for candidate in self._vocab[start:start + MAX_EXPANSIONS]:
+            if not candidate.startswith(token):
+                break
+            matches.append((candidate, 1.0))
+        if matches or len(token) < 3:
+            return matches
+        first = bisect.bisect_left(self._vocab, token[0])
+        last = bisect.bisect_left(self._vocab, chr(ord(token[0]) + 1))
+        close = difflib.get_close_matches(token, self._vocab[first:last], n=3, cutoff=FUZZY_CUTOFF)
+        return [(candidate, FUZZY_FACTOR) for candidate in close]
+
+    def search(self, query: str, limit: int = 20, kind: Optional[str] = None, names_only: bool = False) -> list[SearchHit]:
+        """
+        Return the best documents matching every query token.
+
+        Each token matches vocabulary tokens it prefixes, or close spellings
+        when it prefixes none. A document scores the sum over query tokens of
+        its best field weight for that token, with a bonus for exact tokens.
+
+        Name matches are also kept in a separate, much smaller index. It
+        serves autocomplete, and answers one-word searches on its own when it
+        fills the page, since any other match scores lower.
+
+        Parameters:
+            query (str): Free-text query.
+            limit (int): Maximum number of hits.
+            kind (Optional[str]): Restrict hits to "recipe" or "ingredient".
+            names_only (bool): Only match tokens in names (autocomplete).
+
+        Returns:
+            list[SearchHit]: Hits ordered by score, then shorter names first.
+        """
+        tokens = tokenize(query)
+        if not tokens or limit <= 0:
+            return []
+        with self._lock:
+            expansions = {token: self._expand(token) for token in tokens}
+            if not names_only and len(tokens) == 1:
+                hits = self._search(expansions, limit, kind, self._name_postings)
+                if len(hits) == limit:
+                    return hits
+            return self._search(expansions, limit, kind, self._name_postings if names_only else self._postings)
+
+    def _search(
+        self,
+        expansions: dict[str, list[tuple[str, float]]],
+        limit: int,
+        kind: Optional[str],
+        index: dict[str, dict[Key, float]],
+    ) -> list[SearchHit]:
+        empty: dict[Key, float] = {}
+        matches = {
+            token: [
+                (index.get(candidate, empty), factor, EXACT_BONUS if candidate == token else 0.0)
+                for candidate, factor in candidates
+            ]
+            for token, candidates in expansions.items()
+        }
+        sizes = {token: sum(len(postings) for postings, _, _ in found) for token, found in matches.items()}
+        scores: Optional[dict[Key, float]] = None
+        # most selective token first, so the others only refine a small candidate set
+        for token in sorted(matches, key=sizes.__getitem__):
+            token_scores = self._scan(matches[token], kind, scores)
+            if scores is not None:
+                token_scores = {key: scores[key] + score for key, score in token_scores.items()}
+            scores = token_scores
+            if not scores:
+                return []
+        docs = self._docs
+        best = heapq.nsmallest(
+            limit,
+            (scores or {}).items(),
+            key=lambda item: (-item[1], len(docs[item[0]].name), docs[item[0]].name, item[0][1]),
+        )
+        return [SearchHit(key[0], key[1], docs[key].name, score) for key, score in best]
+
+    @staticmethod
+    def _scan(
+        matches: list[tuple[dict[Key, float], float, float]],
+        kind: Optional[str],
+        candidates: Optional[dict[Key, float]],
+    ) -> dict[Key, float]:
+        """
+        Score a query token over the postings of its matches, restricted to
+        the candidates left by earlier tokens if any.
+        """
+        if candidates is None and kind is None and len(matches) == 1:
+            postings, factor, bonus = matches[0]
+            return {key: (weight + bonus) * factor for key, weight in postings.items()}
+        scores: dict[Key, float] = {}
+        for postings, factor, bonus in matches:
+            if candidates is not None:
+                # dict view intersection walks the smaller side in C
+                keys = candidates.keys() & postings.keys()
+            elif kind is not None:
+                keys = [key for key in postings if key[0] == kind]
+            else:
+                keys = postings.keys()
+            for key in keys:
+                score = (postings[key] + bonus) * factor
+                if score > scores.get(key, 0.0):
+                    scores[key] = score
+        return scores
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"documents": len(self._docs), "tokens": len(self._vocab)}
+
+
+search_index = SearchIndex()
+
+
+@event.listens_for(models.Recipe, "after_insert")
+@event.listens_for(models.Recipe, "after_update")
+def _index_recipe(mapper, connection, target: Any) -> None:
+    on_commit(target, search_index.upsert_recipe, target.id, target.name, target.description, target.instructions)
+
+
+@event.listens_for(models.Ingredient, "after_insert")
+@event.listens_for(models.Ingredient, "after_update")
+def _index_ingredient(mapper, connection, target: Any) -> None:
+    on_commit(target, search_index.upsert_ingredient, target.id, target.name, target.category)
+
+
+@event.listens_for(models.Recipe, "after_delete")
+def _unindex_recipe(mapper, connection, target: Any) -> None:
+    on_commit(target, search_index.remove, RECIPE, target.id)
+
+
+@event.listens_for(models.Ingredient, "after_delete")
+def _unindex_ingredient(mapper, connection, target: Any) -> None:
+    on_commit(target, search_index.remove, INGREDIENT, target.id)
+
+
+@event.listens_for(models.RecipeTag, "after_insert")
+def _index_tag(mapper, connection, target: Any) -> None:
+    on_commit(target, search_index.add_tag, target.recipe_id, target.tag)
+
+
+@event.listens_for(models.RecipeTag, "after_delete")
+def _unindex_tag(mapper, connection, target: Any) -> None:
+    on_commit(target, search_index.remove_tag, target.recipe_id, target.tag)
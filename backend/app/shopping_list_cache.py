@@ -0,0 +1,92 @@
+import os
+import threading
+from datetime import date
+from typing import Any, Optional
+
+from .cache import TTLCache
+
+SHOPPING_LIST_CACHE_TTL_SECONDS = float(os.getenv("SHOPPING_LIST_CACHE_TTL_SECONDS", "60"))
+SHOPPING_LIST_CACHE_MAX_USERS = int(os.getenv("SHOPPING_LIST_CACHE_MAX_USERS", "1024"))
+
+Rows = list[dict[str, Any]]
+
+
+class ShoppingListCache:
+    """
+    Per-user cache of computed shopping lists, keyed by date range.
+
+    Entries are invalidated as narrowly as possible: a schedule change only
+    drops the ranges containing the affected dates, a fridge change drops
+    every range of that user, and a recipe or ingredient change drops
+    everything. Each invalidation bumps a version so a list computed
+    concurrently with a mutation is never stored.
+
+    The cache is process-local; with several workers, other processes only
+    pick up a change once their entries reach the TTL.
+    """
+
+    def __init__(self, max_users: int = SHOPPING_LIST_CACHE_MAX_USERS, ttl: float = SHOPPING_LIST_CACHE_TTL_SECONDS):
+        self._lists = TTLCache(maxsize=max_users, ttl=ttl)
+        self._versions: dict[int, int] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def version(self, user_id: int) -> tuple[int, int]:
+        """
+        Return a token to pass to set() for a list about to be computed.
+        """
+        with self._lock:
+            return self._generation, self._versions.get(user_id, 0)
+
+    def get(self, user_id: int, start_date: date, end_date: date) -> Optional[Rows]:
+        ranges = self._lists.get(user_id)
+        rows = ranges.get((start_date, end_date)) if ranges else None
+        if rows is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return rows
+
+    def set(self, user_id: int, start_date: date, end_date: date, rows: Rows, version: tuple[int, int]) -> None:
+        """
+        Store a computed list unless the user's data changed since version().
+        """
+        with self._lock:
+            if version != (self._generation, self._versions.get(user_id, 0)):
+                return
+            ranges = self._lists.get(user_id)
+            if ranges is None:
+                ranges = {}
+                self._lists.set(user_id, ranges)
+            ranges[(start_date, end_date)] = rows
+
+    def invalidate_dates(self, user_id: int, *dates: date) -> None:
+        """
+        Drop the user's cached ranges that contain any of the given dates.
+        """
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+            ranges = self._lists.get(user_id)
+            if not ranges:
+                return
+            for start_date, end_date in list(ranges):
+                if any(start_date <= d <= end_date for d in dates):
+                    del ranges[(start_date, end_date)]
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+            self._lists.invalidate(user_id)
+
+    def invalidate_all(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._lists.clear()
+
+    def stats(self) -> dict:
+        return {"users": len(self._lists), "hits": self.hits, "misses": self.misses}
+
+
+shopping_list_cache = ShoppingListCache()
@@ -0,0 +1,65 @@
+import os
+from typing import Any, AsyncIterator, Awaitable, Callable, Mapping, Optional, Sequence
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from pydantic_core import to_json
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .database import AsyncSessionLocal
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# Rows fetched from the server-side cursor, encoded and sent per chunk
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "500"))
+
+RowMapper = Callable[[AsyncSession, Sequence[Any]], Awaitable[list[Any]]]
+
+
+def wants_ndjson(request: Request) -> bool:
+    """
+    Whether the client asked for newline-delimited JSON in its Accept header.
+    """
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+async def stream_rows(stmt: Select, map_rows: RowMapper, scalars: bool = False) -> AsyncIterator[list[Any]]:
+    """
+    Run stmt on a server-side cursor and yield its rows in batches of STREAM_BATCH_SIZE.
+
+    The statement runs in its own session, since the request's session is
+    closed before a streaming body is sent. The session only holds weak
+    references to loaded entities, so a mapped batch is freed before the next
+    one is fetched and memory stays flat whatever the result size.
+
+    Parameters:
+        stmt (Select): The query to stream.
+        map_rows (RowMapper): Turns a batch into JSON-serializable values; it
+            may query through the session it is given.
+        scalars (bool): Yield the first column (e.g. ORM entities) instead of rows.
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(stmt.execution_options(yield_per=STREAM_BATCH_SIZE))
+        if scalars:
+            result = result.scalars()
+        async for rows in result.partitions():
+            yield await map_rows(db, rows)
+
+
+def ndjson_response(
+    batches: AsyncIterator[list[Any]], headers: Optional[Mapping[str, str]] = None
+) -> StreamingResponse:
+    """
+    Send batches of values as newline-delimited JSON, one value per line, a chunk per batch.
+    """
+
+    async def body() -> AsyncIterator[bytes]:
+        async for rows in batches:
+            if rows:
+                yield b"".join(to_json(row) + b"\n" for row in rows)
+
+    return StreamingResponse(body(), media_type=NDJSON_MEDIA_TYPE, headers=headers)
+
+
+async def row_dicts(db: AsyncSession, rows: Sequence[Any]) -> list[dict[str, Any]]:
+    return [row._asdict() for row in rows]
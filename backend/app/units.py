@@ -0,0 +1,178 @@
+from collections import defaultdict
+from typing import Any, Iterable, NamedTuple, Optional
+
+MASS = "mass"
+VOLUME = "volume"
+COUNT = "count"
+
+# Canonical unit each dimension is aggregated in
+BASE_UNITS = {MASS: "g", VOLUME: "ml", COUNT: "pcs"}
+
+
+class Unit(NamedTuple):
+    dimension: str
+    factor: float  # multiplier to the dimension's base unit
+
+
+UNITS: dict[str, Unit] = {
+    "mg": Unit(MASS, 0.001),
+    "g": Unit(MASS, 1.0),
+    "kg": Unit(MASS, 1000.0),
+    "oz": Unit(MASS, 28.349523125),
+    "lb": Unit(MASS, 453.59237),
+    "ml": Unit(VOLUME, 1.0),
+    "cl": Unit(VOLUME, 10.0),
+    "dl": Unit(VOLUME, 100.0),
+    "l": Unit(VOLUME, 1000.0),
+    "tsp": Unit(VOLUME, 4.92892159375),
+    "tbsp": Unit(VOLUME, 14.78676478125),
+    "cup": Unit(VOLUME, 240.0),
+    "fl oz": Unit(VOLUME, 29.5735295625),
+    "pcs": Unit(COUNT, 1.0),
+}
+
+ALIASES = {
+    "gram": "g", "grams": "g", "gr": "g",
+    "kilogram": "kg", "kilograms": "kg", "kgs": "kg",
+    "milligram": "mg", "milligrams": "mg",
+    "ounce": "oz", "ounces": "oz",
+    "lbs": "lb", "pound": "lb", "pounds": "lb",
+    "milliliter": "ml", "milliliters": "ml", "millilitre": "ml", "millilitres": "ml",
+    "liter": "l", "liters": "l", "litre": "l", "litres": "l",
+    "teaspoon": "tsp", "teaspoons": "tsp",
+    "tablespoon": "tbsp", "tablespoons": "tbsp",
+    "cups": "cup",
+    "floz": "fl oz", "fluid ounce": "fl oz", "fluid ounces": "fl oz",
+    "pc": "pcs", "piece": "pcs", "pieces": "pcs", "szt": "pcs",
+}
+
+
+def normalize_unit(unit: Optional[str]) -> Optional[str]:
+    """
+    Map a free-text unit to its canonical spelling, or None if it is unknown.
+    """
+    if not unit:
+        return None
+    key = unit.strip().lower().rstrip(".")
+    key = ALIASES.get(key, key)
+    return key if key in UNITS else None
+
+
+class Conversion(NamedTuple):
+    """
+    Per-ingredient data needed to convert between dimensions.
+    """
+    default_unit: Optional[str] = None
+    density_g_per_ml: Optional[float] = None
+    grams_per_piece: Optional[float] = None
+
+    def grams_per_base(self, dimension: str) -> Optional[float]:
+        if dimension == MASS:
+            return 1.0
+        if dimension == VOLUME:
+            return self.density_g_per_ml
+        return self.grams_per_piece
+
+
+def to_base(quantity: float, unit: Optional[str]) -> tuple[float, str]:
+    """
+    Convert a quantity to its dimension's base unit.
+
+    Unknown units are returned unchanged so they still net against
+    identical units.
+    """
+    canonical = normalize_unit(unit)
+    if canonical is None:
+        return quantity, unit or ""
+    spec = UNITS[canonical]
+    return quantity * spec.factor, BASE_UNITS[spec.dimension]
+
+
+def convert(quantity: float, unit: Optional[str], target_unit: str, conversion: Conversion = Conversion()) -> Optional[float]:
+    """
+    Convert a quantity between units, crossing dimensions through the
+    ingredient's density or piece weight when needed.
+
+    Returns:
+        Optional[float]: The converted quantity, or None if the units are
+        unknown or the ingredient lacks the data to cross dimensions.
+    """
+    source, target = normalize_unit(unit), normalize_unit(target_unit)
+    if source is None or target is None:
+        return quantity if unit == target_unit else None
+    src, dst = UNITS[source], UNITS[target]
+    base = quantity * src.factor
+    if src.dimension != dst.dimension:
+        src_grams = conversion.grams_per_base(src.dimension)
+        dst_grams = conversion.grams_per_base(dst.dimension)
+        if not src_grams or not dst_grams:
+            return None
+        base = base * src_grams / dst_grams
+    return base / dst.factor
+
+
+def net_quantities(rows: Iterable[Any]) -> list[dict[str, Any]]:
+    """
+    Net recipe demand against fridge stock across units.
+
+    Rows are pre-aggregated per (ingredient, unit) and carry id,
+    ingredient_name, unit, demand, stock, default_unit, density_g_per_ml and
+    grams_per_piece. Conversion factors are resolved once per distinct unit
+    and ingredient, then every row is folded into its ingredient's target
+    dimension in a single pass: the dimension of the ingredient's
+    default_unit if known, otherwise that of its first demanded unit. Rows
+    that cannot be converted (unknown unit, or no density/piece weight to
+    cross dimensions) are netted only against the same unit.
+
+    Returns:
+        list[dict]: One line per ingredient (and unconvertible unit) with a
+        positive quantity still needed, as id, ingredient_name, quantity
+        and unit. Convertible lines are rendered in the ingredient's
+        default_unit, falling back to the dimension's base unit.
+    """
+    rows = list(rows)
+    canonical = {row.unit: normalize_unit(row.unit) for row in rows}
+
+    targets: dict[int, Optional[str]] = {}
+    for row in rows:
+        if row.id in targets:
+            continue
+        default = normalize_unit(row.default_unit)
+        unit = canonical[row.unit]
+        if default is not None:
+            targets[row.id] = UNITS[default].dimension
+        elif row.demand and unit is not None:
+            targets[row.id] = UNITS[unit].dimension
+
+    totals: dict[tuple[int, str], float] = defaultdict(float)
+    meta: dict[int, tuple[str, Conversion]] = {}
+    for row in rows:
+        conversion = Conversion(row.default_unit, row.density_g_per_ml, row.grams_per_piece)
+        meta[row.id] = (row.ingredient_name, conversion)
+        amount = (row.demand or 0.0) - (row.stock or 0.0)
+        unit, target = canonical[row.unit], targets.get(row.id)
+        if unit is None or target is None:
+            totals[(row.id, row.unit)] += amount
+            continue
+        converted = convert(amount, unit, BASE_UNITS[target], conversion)
+        if converted is None:
+            base, base_unit = to_base(amount, unit)
+            totals[(row.id, base_unit)] += base
+        else:
+            totals[(row.id, BASE_UNITS[target])] += converted
+
+    result = []
+    for (ingredient_id, unit), quantity in totals.items():
+        if quantity <= 1e-9:
+            continue
+        name, conversion = meta[ingredient_id]
+        display_unit = unit
+        default = normalize_unit(conversion.default_unit)
+        if default is not None and unit in BASE_UNITS.values() and UNITS[default].dimension == UNITS[unit].dimension:
+            display_unit = default
+            quantity = quantity / UNITS[default].factor
+        result.append(
+            {"id": ingredient_id, "ingredient_name": name, "quantity": round(quantity, 3), "unit": display_unit}
+        )
+    result.sort(key=lambda item: (item["ingredient_name"], item["unit"]))
+    return result
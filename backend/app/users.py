@@ -1,17 +1,19 @@
 import os
 import secrets
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Any, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from pydantic import BaseModel, EmailStr
-from sqlalchemy.orm import Session
+from sqlalchemy import event, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from . import models
-from .database import SessionLocal
+from .cache import TTLCache
+from .database import AsyncSessionLocal
+from .passwords import PasswordHasherBusy, password_hasher, pwd_context
 
 
 # Use integer IDs for this project
@@ -61,25 +63,31 @@ class TokenPack(BaseModel):
 # Simple HTTP bearer security for decoding JWT from Authorization header
 security = HTTPBearer()
 
-# Utilities for tokens and password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-
-def get_db():
-    db = SessionLocal()
+async def get_db():
+    db = AsyncSessionLocal()
     try:
         yield db
     finally:
-        db.close()
+        await db.close()
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
-def create_access_token(user_id: int) -> str:
+def create_access_token(user: UserSent) -> str:
+    # Carry everything the request path needs so it never has to load the user.
     expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode = {"sub": str(user_id), "exp": expire, "type": "access"}
+    to_encode = {
+        "sub": str(user.id),
+        "exp": expire,
+        "type": "access",
+        "email": user.email,
+        "username": user.username,
+        "is_active": user.is_active,
+        "is_superuser": user.is_superuser,
+    }
     return jwt.encode(to_encode, SECRET, algorithm=ALGORITHM)
 
 
@@ -100,12 +108,49 @@ ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "15"))
 REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
 
+# In-process user cache (TTL <= 0 disables it)
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "1024"))
+user_cache = TTLCache(maxsize=USER_CACHE_MAX_SIZE, ttl=USER_CACHE_TTL_SECONDS)
+
+
+def to_user_sent(user: models.User) -> UserSent:
+    return UserSent(
+        id=user.id,
+        email=user.email,
+        username=user.username,
+        is_active=user.is_active,
+        is_superuser=user.is_superuser,
+    )
+
+
+async def load_user(db: AsyncSession, user_id: int) -> Optional[UserSent]:
+    """Return the user from the cache, falling back to the database."""
+    user = user_cache.get(user_id)
+    if user is not None:
+        return user
+    db_user = await db.get(models.User, user_id)
+    if not db_user:
+        return None
+    user = to_user_sent(db_user)
+    user_cache.set(user_id, user)
+    return user
+
+
+def invalidate_user(user_id: int) -> None:
+    user_cache.invalidate(user_id)
+
 
-def get_current_user(
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target: Any) -> None:
+    invalidate_user(target.id)
+
+
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db),
-):
-    """Decode JWT from Authorization header and return the DB user."""
+) -> UserSent:
+    """Decode JWT from Authorization header and return the user it describes."""
     token = credentials.credentials
     try:
         payload = jwt.decode(token, SECRET, algorithms=[ALGORITHM])
@@ -115,67 +160,88 @@ def get_current_user(
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
-    try:
-        user = db.query(models.User).filter(models.User.id == user_id).first()
-        if not user:
-            raise HTTPException(status_code=401, detail="User not found")
-        return user
-    finally:
-        db.close()
+    if "is_active" in payload:
+        # claims were signed by us, so skip re-validating them
+        return UserSent.model_construct(
+            id=user_id,
+            email=payload.get("email"),
+            username=payload.get("username"),
+            is_active=payload["is_active"],
+            is_superuser=payload.get("is_superuser", False),
+        )
 
+    # tokens issued before claims were added
+    async with AsyncSessionLocal() as db:
+        user = await load_user(db, user_id)
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+    return user
 
-def current_active_user(user=Depends(get_current_user)):
+
+async def current_active_user(user: UserSent = Depends(get_current_user)) -> UserSent:
     if not getattr(user, "is_active", True):
         raise HTTPException(status_code=400, detail="Inactive user")
     return user
 
 
+async def current_superuser(user: UserSent = Depends(current_active_user)) -> UserSent:
+    if not getattr(user, "is_superuser", False):
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    return user
+
+
 router = APIRouter()
 
 
 @router.post("/login")
-def login(
-    payload: LoginRequest, response: Response, db: Session = Depends(get_db)
+async def login(
+    payload: LoginRequest, response: Response, db: AsyncSession = Depends(get_db)
 ) -> TokenPack:
+    user = await db.scalar(
+        select(models.User).where(models.User.email == payload.username)
+    )
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
     try:
-        user = (
-            db.query(models.User).filter(models.User.email == payload.username).first()
+        valid, new_hash = await password_hasher.verify_and_update(
+            payload.password, user.hashed_password
         )
-        if not user:
-            raise HTTPException(status_code=401, detail="Invalid credentials")
-        if not verify_password(payload.password, user.hashed_password):
-            raise HTTPException(status_code=401, detail="Invalid credentials")
-
-        access_token = create_access_token(user.id)
-        refresh_token = create_refresh_token(user.id)
-
-        # set httpOnly refresh cookie
-        response.set_cookie(
-            key="refresh_token",
-            value=refresh_token,
-            httponly=True,
-            samesite="lax",
-            secure=False,  # set True in production over HTTPS
-            max_age=REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60 * 60,
-            path="/",
+    except PasswordHasherBusy:
+        raise HTTPException(
+            status_code=503, detail="Too many login attempts", headers={"Retry-After": "1"}
         )
-
-        return TokenPack(
-            access_token=access_token,
-            user=UserSent(
-                id=user.id,
-                email=user.email,
-                username=user.username,
-                is_active=user.is_active,
-                is_superuser=user.is_superuser,
-            ),
+    if not valid:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    if new_hash:
+        # stored hash uses an outdated cost factor
+        await db.execute(
+            update(models.User).where(models.User.id == user.id).values(hashed_password=new_hash)
         )
-    finally:
-        db.close()
+        await db.commit()
+
+    user_sent = to_user_sent(user)
+    user_cache.set(user.id, user_sent)
+    access_token = create_access_token(user_sent)
+    refresh_token = create_refresh_token(user.id)
+
+    # set httpOnly refresh cookie
+    response.set_cookie(
+        key="refresh_token",
+        value=refresh_token,
+        httponly=True,
+        samesite="lax",
+        secure=False,  # set True in production over HTTPS
+        max_age=REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60 * 60,
+        path="/",
+    )
+
+    return TokenPack(access_token=access_token, user=user_sent)
 
 
 @router.post("/refresh")
-def refresh(request: Request, response: Response):
+async def refresh(
+    request: Request, response: Response, db: AsyncSession = Depends(get_db)
+):
     token = request.cookies.get("refresh_token")
     if not token:
         raise HTTPException(status_code=401, detail="Missing refresh token")
@@ -187,8 +253,15 @@ def refresh(request: Request, response: Response):
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid refresh token")
 
+    # claims may have changed since the last token was issued
+    user = await load_user(db, user_id)
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+    if not user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+
     # issue new tokens
-    access_token = create_access_token(user_id)
+    access_token = create_access_token(user)
     refresh_token = create_refresh_token(user_id)
 
     response.set_cookie(
@@ -204,6 +277,6 @@ def refresh(request: Request, response: Response):
 
 
 @router.post("/logout")
-def logout(response: Response):
+async def logout(response: Response):
     response.delete_cookie("refresh_token", path="/")
     return {"status": "ok"}
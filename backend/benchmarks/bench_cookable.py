@@ -0,0 +1,78 @@
+"""Cookable-recipe ranking latency on a catalogue of 50k recipes.
+
+Builds app.cookable's bitset index from the database and times top-10
+ranking for fridges of different sizes, excluding the fridge query.
+"""
+import random
+import time
+from types import SimpleNamespace
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from app import models
+from app.cookable import CookableIndex, Stock
+
+from .common import bulk_insert, make_engine, parse_args, report, timeit
+
+RECIPES = 50_000
+INGREDIENTS = 2_000
+INGREDIENTS_PER_RECIPE = 10
+FRIDGE_SIZES = [20, 100, 400]
+
+
+def seed(session: Session) -> None:
+    rng = random.Random(42)
+    units = ["g", "ml", "pcs"]
+    bulk_insert(session, models.Ingredient, [
+        {"id": i, "name": f"ingredient {i}", "default_unit": units[i % 3]} for i in range(1, INGREDIENTS + 1)
+    ])
+    bulk_insert(session, models.Recipe, [{"id": i, "name": f"recipe {i}"} for i in range(1, RECIPES + 1)])
+    # popular ingredients appear in many recipes, as in real catalogues
+    weights = [1 / rank for rank in range(1, INGREDIENTS + 1)]
+    rows = []
+    for r in range(1, RECIPES + 1):
+        chosen: set[int] = set()
+        while len(chosen) < INGREDIENTS_PER_RECIPE:
+            chosen.update(rng.choices(range(1, INGREDIENTS + 1), weights, k=INGREDIENTS_PER_RECIPE - len(chosen)))
+        rows.extend(
+            {"recipe_id": r, "ingredient_id": i, "quantity": rng.uniform(1, 500), "unit": units[i % 3]}
+            for i in chosen
+        )
+    bulk_insert(session, models.RecipeIngredient, rows)
+    session.commit()
+
+
+def main() -> None:
+    args = parse_args(__doc__.splitlines()[0])
+    engine = make_engine(args.url)
+    with Session(engine) as session:
+        seed(session)
+        index = CookableIndex()
+        start = time.perf_counter()
+        recipes = session.execute(sa.select(models.Recipe.id, models.Recipe.name)).tuples().all()
+        lines = session.execute(sa.select(
+            models.RecipeIngredient.id, models.RecipeIngredient.recipe_id, models.RecipeIngredient.ingredient_id,
+            models.RecipeIngredient.quantity, models.RecipeIngredient.unit, models.RecipeIngredient.optional,
+        )).all()
+        loaded = time.perf_counter()
+        index.rebuild(recipes, lines)
+        print(
+            f"index load {(loaded - start) * 1000:.0f} ms, build {(time.perf_counter() - loaded) * 1000:.0f} ms, "
+            f"{index.stats()}"
+        )
+        rng = random.Random(7)
+        units = ["g", "ml", "pcs"]
+        for size in FRIDGE_SIZES:
+            stock = Stock(
+                SimpleNamespace(
+                    ingredient_id=i, quantity=rng.uniform(50, 1000), unit=units[i % 3],
+                    default_unit=units[i % 3], density_g_per_ml=None, grams_per_piece=None,
+                )
+                for i in rng.sample(range(1, INGREDIENTS // 2), size)
+            )
+            report(f"top 10 of {RECIPES} recipes, {size} fridge items", timeit(lambda: index.rank(stock, 10), args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Fridge item and schedule list latency for a user with 10k rows of each.
+
+Compares loading full FridgeItem / Schedule entities and copying their
+attributes into response dicts (the previous list_fridge_items and
+list_schedule) with the column projections in app.api.fridge_items and
+app.api.schedule, which map plain row tuples. Ingredient names come from a
+dict in both cases, as the endpoint takes them from the catalogue.
+"""
+import random
+from datetime import date, timedelta
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from app import models
+from app.api.fridge_items import FRIDGE_LIST_FIELDS, fridge_list_query
+from app.api.schedule import schedule_list_query
+from app.pagination import paginate
+
+from .common import bulk_insert, make_engine, parse_args, report, timeit
+
+ROWS = 10_000
+INGREDIENTS = 500
+RECIPES = 200
+PAGES = [100, ROWS]
+
+
+def seed(session: Session) -> None:
+    rng = random.Random(42)
+    units = ["g", "ml", "pcs"]
+    bulk_insert(session, models.User, [
+        {"id": 1, "username": "bench", "email": "bench@example.com", "hashed_password": "x"}
+    ])
+    bulk_insert(session, models.Ingredient, [
+        {"id": i, "name": f"ingredient {i}"} for i in range(1, INGREDIENTS + 1)
+    ])
+    bulk_insert(session, models.Recipe, [{"id": i, "name": f"recipe {i}"} for i in range(1, RECIPES + 1)])
+    bulk_insert(session, models.MealType, [{"id": 1, "name": "lunch"}, {"id": 2, "name": "dinner"}])
+    bulk_insert(session, models.FridgeItem, [
+        {
+            "user_id": 1, "ingredient_id": rng.randint(1, INGREDIENTS), "quantity": rng.uniform(1, 500),
+            "unit": units[i % 3], "expiration_date": date(2030, 1, 1) + timedelta(days=i % 60),
+        }
+        for i in range(ROWS)
+    ])
+    bulk_insert(session, models.Schedule, [
+        {
+            "user_id": 1, "recipe_id": rng.randint(1, RECIPES),
+            "date": date(2030, 1, 1) + timedelta(days=i // 2), "meal_type": i % 2 + 1,
+        }
+        for i in range(ROWS)
+    ])
+    session.commit()
+
+
+def main() -> None:
+    args = parse_args(__doc__.splitlines()[0])
+    engine = make_engine(args.url)
+    with Session(engine) as session:
+        seed(session)
+        names = dict(session.execute(sa.select(models.Ingredient.id, models.Ingredient.name)).tuples().all())
+        schedule_order = ([models.Schedule.date, models.Schedule.id], [date.fromisoformat, int])
+
+        def fridge_entities(limit: int) -> list[dict]:
+            stmt = paginate(
+                sa.select(models.FridgeItem).where(models.FridgeItem.user_id == 1),
+                [models.FridgeItem.id], [int], None, 0, limit,
+            )
+            return [
+                {**{field: getattr(item, field) for field in FRIDGE_LIST_FIELDS}, "name": names[item.ingredient_id]}
+                for item in session.scalars(stmt).all()
+            ]
+
+        def fridge_rows(limit: int) -> list[dict]:
+            stmt = paginate(fridge_list_query(1), [models.FridgeItem.id], [int], None, 0, limit)
+            return [{**row._asdict(), "name": names[row.ingredient_id]} for row in session.execute(stmt).all()]
+
+        def schedule_entities(limit: int) -> list[dict]:
+            stmt = paginate(
+                sa.select(models.Schedule, models.Recipe.name.label("recipe_name"))
+                .join(models.Recipe, models.Schedule.recipe_id == models.Recipe.id)
+                .where(models.Schedule.user_id == 1),
+                *schedule_order, None, 0, limit,
+            )
+            return [
+                {**schedule.__dict__, "recipe_name": recipe_name}
+                for schedule, recipe_name in session.execute(stmt).all()
+            ]
+
+        def schedule_rows(limit: int) -> list[dict]:
+            stmt = paginate(schedule_list_query(1), *schedule_order, None, 0, limit)
+            return [row._asdict() for row in session.execute(stmt).all()]
+
+        cases = [
+            ("fridge entities", fridge_entities),
+            ("fridge row tuples", fridge_rows),
+            ("schedule entities", schedule_entities),
+            ("schedule row tuples", schedule_rows),
+        ]
+        for limit in PAGES:
+            for name, run in cases:
+                def timed(run=run, limit=limit) -> None:
+                    run(limit)
+                    # drop loaded entities so every run pays for hydrating them
+                    session.expunge_all()
+
+                report(f"{name} (limit {limit})", timeit(timed, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Recipe list page latency against a catalogue of 50k recipes.
+
+Compares the previous nested joinedload listing (recipes x ingredients join
+rows under LIMIT, de-duplicated in Python) with the selectinload listing and
+the ?fields=id,name sparse fieldset in app.api.recipes, on the first page and
+on a deep page reached by offset and by cursor.
+"""
+import random
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session, joinedload
+
+from app import models
+from app.api.recipes import parse_fields, recipe_list_query
+from app.pagination import encode_cursor, paginate
+
+from .common import bulk_insert, make_engine, parse_args, report, timeit
+
+RECIPES = 50_000
+INGREDIENTS = 2_000
+INGREDIENTS_PER_RECIPE = 10
+PAGE = 100
+DEEP_OFFSET = 40_000
+
+
+def legacy_recipe_list_query() -> sa.Select:
+    return sa.select(models.Recipe).options(
+        joinedload(models.Recipe.recipe_ingredients).joinedload(models.RecipeIngredient.ingredient)
+    )
+
+
+def seed(session: Session) -> None:
+    rng = random.Random(42)
+    units = ["g", "ml", "pcs"]
+    bulk_insert(session, models.Ingredient, [
+        {"id": i, "name": f"ingredient {i}", "default_unit": units[i % 3]}
+        for i in range(1, INGREDIENTS + 1)
+    ])
+    bulk_insert(session, models.Recipe, [
+        {"id": i, "name": f"recipe {i}", "description": "A recipe. " * 20, "instructions": "Cook it. " * 50}
+        for i in range(1, RECIPES + 1)
+    ])
+    bulk_insert(session, models.RecipeIngredient, [
+        {"recipe_id": r, "ingredient_id": i, "quantity": rng.uniform(1, 500), "unit": units[i % 3]}
+        for r in range(1, RECIPES + 1)
+        for i in rng.sample(range(1, INGREDIENTS + 1), INGREDIENTS_PER_RECIPE)
+    ])
+    session.commit()
+
+
+def main() -> None:
+    args = parse_args(__doc__.splitlines()[0])
+    engine = make_engine(args.url)
+    with Session(engine) as session:
+        seed(session)
+        builders = [
+            ("nested joinedload", legacy_recipe_list_query, True),
+            ("selectinload", lambda: recipe_list_query(None), True),
+            ("fields=id,name", lambda: recipe_list_query(parse_fields("id,name")), False),
+        ]
+        pages = [
+            ("first page", None, 0),
+            (f"offset {DEEP_OFFSET}", None, DEEP_OFFSET),
+            (f"cursor after {DEEP_OFFSET}", encode_cursor(DEEP_OFFSET), 0),
+        ]
+        for label, cursor, skip in pages:
+            for name, build, entities in builders:
+                stmt = paginate(build(), [models.Recipe.id], [int], cursor, skip, PAGE)
+
+                def run(stmt: sa.Select = stmt, entities: bool = entities) -> None:
+                    if entities:
+                        session.scalars(stmt).unique().all()
+                    else:
+                        session.execute(stmt).all()
+                    # drop loaded recipes so every run pays for loading them
+                    session.expunge_all()
+
+                report(f"{name} ({label})", timeit(run, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Search and autocomplete latency of the in-memory index on a large catalogue.
+
+Seeds 50k recipes (with tags) and 5k ingredients, builds app.search's index
+from the database as the SQLite fallback does, and times typical queries:
+short and long prefixes, multi-word queries, misspellings and autocomplete.
+"""
+import random
+import time
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from app import models
+from app.search import SearchIndex
+
+from .common import bulk_insert, make_engine, parse_args, report, timeit
+
+RECIPES = 50_000
+INGREDIENTS = 5_000
+TAGS_PER_RECIPE = 3
+VOCABULARY = 5_000
+TAGS = ["vegetarian", "vegan", "quick", "dessert", "breakfast", "dinner", "spicy", "gluten free"]
+SYLLABLES = ["ba", "ri", "to", "ma", "sol", "ten", "cu", "li", "po", "ran", "che", "gi", "mo", "sa", "vel", "ka"]
+
+
+def seed(session: Session) -> list[str]:
+    """
+    Seed the catalogue from a Zipf-distributed vocabulary, like natural text.
+    """
+    rng = random.Random(42)
+    words = sorted({
+        "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(VOCABULARY * 2)
+    })[:VOCABULARY]
+    rng.shuffle(words)
+    weights = [1 / rank for rank in range(1, len(words) + 1)]
+
+    def phrase(n: int) -> str:
+        return " ".join(rng.choices(words, weights, k=n))
+
+    bulk_insert(session, models.Ingredient, [
+        {"id": i, "name": phrase(2), "category": rng.choice(["Vegetable", "Meat", "Dairy", "Spice"])}
+        for i in range(1, INGREDIENTS + 1)
+    ])
+    bulk_insert(session, models.Recipe, [
+        {"id": i, "name": phrase(3), "description": phrase(12), "instructions": phrase(40)}
+        for i in range(1, RECIPES + 1)
+    ])
+    bulk_insert(session, models.RecipeTag, [
+        {"recipe_id": r, "tag": tag}
+        for r in range(1, RECIPES + 1)
+        for tag in rng.sample(TAGS, TAGS_PER_RECIPE)
+    ])
+    session.commit()
+    return words
+
+
+def main() -> None:
+    args = parse_args(__doc__.splitlines()[0])
+    engine = make_engine(args.url)
+    with Session(engine) as session:
+        words = seed(session)
+        index = SearchIndex()
+        start = time.perf_counter()
+        index.rebuild(
+            session.execute(sa.select(
+                models.Recipe.id, models.Recipe.name, models.Recipe.description, models.Recipe.instructions
+            )).tuples().all(),
+            session.execute(sa.select(models.Ingredient.id, models.Ingredient.name, models.Ingredient.category)).tuples().all(),
+            session.execute(sa.select(models.RecipeTag.recipe_id, models.RecipeTag.tag)).tuples().all(),
+        )
+        print(f"index build: {(time.perf_counter() - start) * 1000:.0f} ms, {index.stats()}")
+        common, rare = words[0], words[-1]
+        cases = [
+            (f"search common word '{common}'", common, False),
+            (f"search prefix '{common[:2]}'", common[:2], False),
+            (f"search rare word '{rare}'", rare, False),
+            (f"search '{words[1]} {words[50][:3]}'", f"{words[1]} {words[50][:3]}", False),
+            (f"search '{common} vegan'", f"{common} vegan", False),
+            (f"search typo '{words[20][:-1]}x'", f"{words[20][:-1]}x", False),
+            (f"autocomplete '{common[:1]}'", common[:1], True),
+            (f"autocomplete '{words[3]} {words[7][:2]}'", f"{words[3]} {words[7][:2]}", True),
+        ]
+        for name, query, names_only in cases:
+            report(name, timeit(lambda: index.search(query, 10, names_only=names_only), args.repeat))
+
+
+if __name__ == "__main__":
+    main()
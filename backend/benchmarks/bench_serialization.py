@@ -0,0 +1,95 @@
+"""Serialization time of large list responses, response_model versus orjson.
+
+Loads full recipe pages (with nested ingredient lines) and fridge item pages
+once, then times turning them into a JSON body: the default path, where
+FastAPI validates every row against the response_model and json.dumps the
+result, and the FAST_JSON_RESPONSES path in app.serialization.
+"""
+import asyncio
+import random
+from datetime import date, timedelta
+from typing import Any, Sequence
+
+import sqlalchemy as sa
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from app import models, schemas
+from app.api.recipes import recipe_list_query
+from app.serialization import fast_json_response, orjson
+
+from .common import bulk_insert, make_engine, parse_args, report, timeit
+
+INGREDIENTS = 500
+INGREDIENTS_PER_RECIPE = 10
+SIZES = [100, 1_000, 5_000]
+
+
+def seed(session: Session, rows: int) -> None:
+    rng = random.Random(42)
+    units = ["g", "ml", "pcs"]
+    bulk_insert(session, models.User, [
+        {"id": 1, "username": "bench", "email": "bench@example.com", "hashed_password": "x"}
+    ])
+    bulk_insert(session, models.Ingredient, [
+        {"id": i, "name": f"ingredient {i}", "default_unit": units[i % 3]}
+        for i in range(1, INGREDIENTS + 1)
+    ])
+    bulk_insert(session, models.Recipe, [
+        {"id": i, "name": f"recipe {i}", "description": "A recipe. " * 20, "instructions": "Cook it. " * 50}
+        for i in range(1, rows + 1)
+    ])
+    bulk_insert(session, models.RecipeIngredient, [
+        {"recipe_id": r, "ingredient_id": i, "quantity": rng.uniform(1, 500), "unit": units[i % 3]}
+        for r in range(1, rows + 1)
+        for i in rng.sample(range(1, INGREDIENTS + 1), INGREDIENTS_PER_RECIPE)
+    ])
+    bulk_insert(session, models.FridgeItem, [
+        {
+            "user_id": 1, "ingredient_id": rng.randint(1, INGREDIENTS), "quantity": rng.uniform(1, 500),
+            "unit": units[i % 3], "expiration_date": date(2030, 1, 1) + timedelta(days=i % 60),
+        }
+        for i in range(rows)
+    ])
+    session.commit()
+
+
+def default_body(schema: type[BaseModel], rows: Sequence[Any]) -> bytes:
+    field = create_model_field(
+        name="Response", type_=list[schema], mode="serialization"  # ty: ignore[invalid-type-form]
+    )
+    content = asyncio.run(serialize_response(field=field, response_content=rows, is_coroutine=True))
+    return bytes(JSONResponse(content).body)
+
+
+def main() -> None:
+    args = parse_args(__doc__.splitlines()[0])
+    if orjson is None:
+        raise SystemExit("orjson is not installed: uv sync --extra fast-json")
+    engine = make_engine(args.url)
+    with Session(engine) as session:
+        seed(session, max(SIZES))
+        for size in SIZES:
+            recipes = session.scalars(recipe_list_query(None).order_by(models.Recipe.id).limit(size)).all()
+            items = session.execute(
+                sa.select(models.FridgeItem, models.Ingredient.name)
+                .join(models.Ingredient)
+                .order_by(models.FridgeItem.id)
+                .limit(size)
+            ).all()
+            fields = [field for field in schemas.FridgeNamedItem.model_fields if field != "name"]
+            fridge_rows = [{**{f: getattr(item, f) for f in fields}, "name": name} for item, name in items]
+            cases = [
+                ("recipes", schemas.Recipe, recipes),
+                ("fridge items", schemas.FridgeNamedItem, fridge_rows),
+            ]
+            for label, schema, rows in cases:
+                report(f"{label} x{size} response_model", timeit(lambda: default_body(schema, rows), args.repeat))
+                report(f"{label} x{size} orjson", timeit(lambda: fast_json_response(schema, rows), args.repeat))
+
+
+if __name__ == "__main__":
+    main()
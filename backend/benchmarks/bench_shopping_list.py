@@ -0,0 +1,116 @@
+"""Shopping list query latency against a user with 10k schedule entries.
+
+Compares the previous single-join query (fridge rows outer-joined per recipe
+ingredient row) with the pre-aggregated CTE query in app.api.shopping_list.
+"""
+import random
+from datetime import date, timedelta
+
+import sqlalchemy as sa
+from sqlalchemy import and_, func
+from sqlalchemy.orm import Session
+
+from app import models
+from app.api.shopping_list import shopping_list_query
+
+from .common import bulk_insert, make_engine, parse_args, report, timeit
+
+SCHEDULE_ENTRIES = 10_000
+INGREDIENTS = 500
+RECIPES = 1_000
+INGREDIENTS_PER_RECIPE = 8
+FRIDGE_ITEMS = 2_000
+OTHER_USERS = 5
+START = date(2020, 1, 1)
+
+
+def legacy_shopping_list_query(user_id: int, start_date: date, end_date: date) -> sa.Select:
+    return (
+        sa.select(
+            models.Ingredient.id,
+            models.Ingredient.name.label("ingredient_name"),
+            func.sum(
+                models.RecipeIngredient.quantity
+                - func.coalesce(models.FridgeItem.quantity, 0)
+            ).label("quantity"),
+            models.RecipeIngredient.unit,
+        )
+        .select_from(models.Schedule)
+        .join(models.Recipe, models.Schedule.recipe_id == models.Recipe.id)
+        .join(models.RecipeIngredient, models.Recipe.id == models.RecipeIngredient.recipe_id)
+        .join(models.Ingredient, models.RecipeIngredient.ingredient_id == models.Ingredient.id)
+        .outerjoin(
+            models.FridgeItem,
+            and_(
+                models.RecipeIngredient.ingredient_id == models.FridgeItem.ingredient_id,
+                models.RecipeIngredient.unit == models.FridgeItem.unit,
+                models.FridgeItem.expiration_date > start_date,
+            ),
+        )
+        .group_by(models.Ingredient.id, models.Ingredient.name, models.RecipeIngredient.unit)
+        .where(models.Schedule.date >= start_date)
+        .where(models.Schedule.date <= end_date)
+        .where(models.Schedule.user_id == user_id)
+    )
+
+
+def seed(session: Session) -> None:
+    rng = random.Random(42)
+    units = ["g", "ml", "pcs"]
+    bulk_insert(session, models.User, [
+        {"id": i, "username": f"user{i}", "email": f"user{i}@example.com", "hashed_password": "x"}
+        for i in range(1, OTHER_USERS + 2)
+    ])
+    bulk_insert(session, models.MealType, [{"id": 1, "name": "Dinner"}])
+    bulk_insert(session, models.Ingredient, [
+        {"id": i, "name": f"ingredient {i}", "default_unit": units[i % 3]}
+        for i in range(1, INGREDIENTS + 1)
+    ])
+    bulk_insert(session, models.Recipe, [{"id": i, "name": f"recipe {i}"} for i in range(1, RECIPES + 1)])
+    bulk_insert(session, models.RecipeIngredient, [
+        {"recipe_id": r, "ingredient_id": i, "quantity": rng.uniform(1, 500), "unit": units[i % 3]}
+        for r in range(1, RECIPES + 1)
+        for i in rng.sample(range(1, INGREDIENTS + 1), INGREDIENTS_PER_RECIPE)
+    ])
+    for user_id in range(1, OTHER_USERS + 2):
+        bulk_insert(session, models.Schedule, [
+            {"recipe_id": rng.randint(1, RECIPES), "user_id": user_id,
+             "date": START + timedelta(days=n // 3), "meal_type": 1}
+            for n in range(SCHEDULE_ENTRIES)
+        ])
+        # several fridge entries per ingredient, as after repeated grocery runs
+        bulk_insert(session, models.FridgeItem, [
+            {"user_id": user_id, "ingredient_id": rng.randint(1, INGREDIENTS), "quantity": rng.uniform(1, 300),
+             "unit": units[n % 3], "expiration_date": START + timedelta(days=rng.randint(0, 4000))}
+            for n in range(FRIDGE_ITEMS)
+        ])
+    session.commit()
+
+
+def main() -> None:
+    args = parse_args(
+        __doc__.splitlines()[0],
+        extra=lambda parser: parser.add_argument(
+            "--full-legacy", action="store_true", help="also time the legacy query over the whole schedule"
+        ),
+    )
+    engine = make_engine(args.url)
+    with Session(engine) as session:
+        seed(session)
+        cases = [
+            ("1 week", START + timedelta(days=100), START + timedelta(days=106)),
+            ("1 month", START + timedelta(days=100), START + timedelta(days=129)),
+            (f"all {SCHEDULE_ENTRIES} entries", START, START + timedelta(days=SCHEDULE_ENTRIES // 3)),
+        ]
+        builders = [("legacy join", legacy_shopping_list_query), ("aggregated CTEs", shopping_list_query)]
+        for label, start, end in cases:
+            for name, build in builders:
+                if name == "legacy join" and start == START and not args.full_legacy:
+                    # over a minute per run on SQLite
+                    continue
+                stmt = build(1, start, end)
+                report(f"{name} ({label})", timeit(lambda: session.execute(stmt).all(), args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Shared helpers for the backend micro-benchmarks.
+
+Run benchmarks from backend/ with the app's database environment loaded, e.g.
+
+    GITHUB_WORKFLOW=1 python -m benchmarks.bench_shopping_list
+
+Each benchmark seeds its own throwaway database (a temporary SQLite file
+unless --url is given), so the configured app database is left untouched.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from typing import Any, Callable
+
+from sqlalchemy import Engine, create_engine, insert
+from sqlalchemy.orm import Session
+
+from app import models
+
+
+def parse_args(
+    description: str, extra: Callable[[argparse.ArgumentParser], Any] | None = None
+) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--url", help="database URL to seed (default: temporary SQLite file)")
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per case")
+    if extra is not None:
+        extra(parser)
+    return parser.parse_args()
+
+
+def make_engine(url: str | None) -> Engine:
+    """
+    Create an engine for the benchmark database and create all tables on it.
+    """
+    if url is None:
+        fd, path = tempfile.mkstemp(suffix=".db", prefix="cookapp-bench-")
+        os.close(fd)
+        url = f"sqlite:///{path}"
+    engine = create_engine(url)
+    models.Base.metadata.drop_all(engine)
+    models.Base.metadata.create_all(engine)
+    return engine
+
+
+def bulk_insert(session: Session, model: type, rows: list[dict[str, Any]]) -> None:
+    if rows:
+        session.execute(insert(model), rows)
+
+
+def timeit(fn: Callable[[], Any], repeat: int) -> dict[str, float]:
+    """
+    Call fn once to warm up, then repeat times, and summarize wall time in ms.
+    """
+    fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+    }
+
+
+def report(name: str, stats: dict[str, float]) -> None:
+    print(
+        f"{name:<48} min {stats['min']:9.2f} ms   "
+        f"median {stats['median']:9.2f} ms   mean {stats['mean']:9.2f} ms"
+    )
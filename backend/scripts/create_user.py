@@ -7,12 +7,10 @@ Usage:
 This script uses the app.database SessionLocal and app.models.User so run it from the repo root where backend is accessible as a package (or run from backend/ with PYTHONPATH set).
 """
 import argparse
-from passlib.context import CryptContext
 
 from app.database import SessionLocal, engine
 from app import models
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.passwords import pwd_context
 
 
 def create_user(email: str, password: str, username: str | None = None):
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Export every table of the database to gzip CSV or Parquet files.
+
+Usage:
+  python scripts/export_db.py exports/2025-09-01
+  python scripts/export_db.py exports/nightly --format parquet --table fridge_logs --table schedule
+
+Each table is streamed through a server-side cursor into <dir>/<table>.csv.gz
+(or .parquet) with constant memory. A table is written to a ".part" file that
+is renamed once complete, so re-running the same command after a failure
+skips the finished tables and redoes only the rest; pass --overwrite to
+export everything again. Tables are exported in separate transactions.
+
+Run from backend/ (or with backend on PYTHONPATH) with the app's database
+environment loaded, or pass --url. Parquet output needs pyarrow (the
+parquet extra).
+"""
+import argparse
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine
+
+from app.export import EXPORT_BATCH_SIZE, FORMATS, ExportError, export_path, export_table, export_tables, get_table
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export database tables to gzip CSV or Parquet.")
+    parser.add_argument("directory", type=Path)
+    parser.add_argument("--format", choices=list(FORMATS), default="csv")
+    parser.add_argument("--table", action="append", dest="tables", help="table to export (repeatable, default: all)")
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE)
+    parser.add_argument("--overwrite", action="store_true", help="export tables that already have a file")
+    parser.add_argument("--url", help="database URL (default: the app's configured database)")
+    args = parser.parse_args()
+
+    if args.url:
+        engine = create_engine(args.url)
+    else:
+        from app.database import engine
+
+    try:
+        tables = [get_table(name) for name in args.tables] if args.tables else list(export_tables().values())
+    except ExportError as e:
+        raise SystemExit(str(e))
+    args.directory.mkdir(parents=True, exist_ok=True)
+    for table in tables:
+        path = export_path(args.directory, table, args.format)
+        if path.exists() and not args.overwrite:
+            print(f"{table.name}: {path.name} exists, skipped")
+            continue
+        start = time.perf_counter()
+        with engine.connect() as connection:
+            count = export_table(connection, table, path, args.format, args.batch_size)
+        elapsed = time.perf_counter() - start
+        print(f"{table.name}: {count} rows in {elapsed:.1f}s ({count / max(elapsed, 1e-9):,.0f} rows/s)", flush=True)
+
+
+if __name__ == "__main__":
+    main()
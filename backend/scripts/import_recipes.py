@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""Bulk-import recipes and their ingredients from CSV or XLSX files.
+
+Usage:
+  python scripts/import_recipes.py "additional/Planner - Recipes (EN).csv"
+  python scripts/import_recipes.py lines.csv --format long --chunk-size 20000
+
+Two layouts are understood (--format, detected from the first cell by default):
+
+  planner  The planner sheet: a "Name" row of recipe names (one per column),
+           optional "YT" and "Recipe" link rows, then an "Ingredients" row
+           followed by cells like "Tofu [g], 180".
+  long     One row per recipe ingredient with a header row containing
+           recipe, ingredient, quantity and unit, and optionally optional,
+           category and any recipe column (description, instructions,
+           instruction_link, servings, prep_time_min, cook_time_min,
+           difficulty, image_url). Recipe columns are read from the first
+           row of each recipe.
+
+Rows are streamed and written in chunks, each chunk in its own transaction.
+Ingredients are matched case-insensitively against existing ones and
+deduplicated in memory; recipes are matched by exact name, and an ingredient
+already on a recipe is not added again. Ingredient rows whose quantity is
+missing, unparsable or not positive are skipped and listed at the end; their
+recipe is still imported. Servings and times that are not a number (e.g.
+"2-3") are stored as NULL and listed too; decimals such as "30.0" are
+rounded. New ingredients and recipes are inserted with
+multi-row INSERT ... RETURNING, and recipe ingredient lines with COPY on
+PostgreSQL (psycopg2 or pg8000) or executemany elsewhere.
+
+Run from backend/ (or with backend on PYTHONPATH) with the app's database
+environment loaded, or pass --url. Reading .xlsx files needs openpyxl (the
+xlsx extra).
+Search and cookable indexes pick the new rows up once their TTL expires.
+"""
+import argparse
+import csv
+import io
+import sys
+import time
+from collections import ChainMap
+from fractions import Fraction
+from pathlib import Path
+from typing import Any, Iterable, Iterator, NamedTuple, Optional
+
+from sqlalchemy import Connection, Engine, create_engine, insert, select
+
+from app import models
+
+CHUNK_SIZE = 10_000
+
+RECIPE_COLUMNS = [
+    "description", "instructions", "instruction_link", "servings",
+    "prep_time_min", "cook_time_min", "difficulty", "image_url",
+]
+INTEGER_COLUMNS = {"servings", "prep_time_min", "cook_time_min"}
+LINE_COLUMNS = ["recipe_id", "ingredient_id", "quantity", "unit", "optional"]
+
+
+class Record(NamedTuple):
+    recipe: str
+    recipe_fields: dict[str, Any]
+    ingredient: Optional[str] = None
+    quantity: Optional[float] = None
+    unit: str = ""
+    optional: bool = False
+    category: Optional[str] = None
+    # (column, value) of recipe cells that could not be parsed
+    unparsed: tuple[tuple[str, str], ...] = ()
+
+
+def read_rows(path: Path) -> Iterator[list[str]]:
+    """
+    Stream the rows of a CSV file or of the first sheet of an XLSX file as lists of strings.
+    """
+    if path.suffix.lower() in (".xlsx", ".xlsm"):
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise SystemExit("Reading .xlsx files needs openpyxl: pip install backend[xlsx]")
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            for row in workbook.worksheets[0].iter_rows(values_only=True):
+                yield ["" if cell is None else str(cell) for cell in row]
+        finally:
+            workbook.close()
+        return
+    with open(path, newline="", encoding="utf-8-sig") as file:
+        yield from csv.reader(file)
+
+
+def parse_quantity(value: Any) -> Optional[float]:
+    """
+    Parse quantities such as "250", "0.25", "1,5" or "1/2".
+    """
+    text = str(value).strip().replace(",", ".")
+    if not text:
+        return None
+    try:
+        return float(Fraction(text))
+    except (ValueError, ZeroDivisionError):
+        return None
+
+
+def parse_integer(value: Any) -> Optional[int]:
+    """
+    Parse whole numbers such as "4", "30.0" (as read back from Excel) or "1,5", rounded.
+    """
+    text = str(value).strip().replace(",", ".")
+    try:
+        return round(float(text))
+    except (ValueError, OverflowError):
+        return None
+
+
+def parse_planner_cell(cell: str) -> tuple[Optional[str], str, Optional[float]]:
+    """
+    Split a planner cell like "Tofu [g], 180" into name, unit and quantity.
+    """
+    name_unit, _, quantity = cell.partition(",")
+    if not quantity.strip():
+        return None, "", None
+    name, _, unit = name_unit.partition("[")
+    return name.strip() or None, unit.replace("]", "").strip(), parse_quantity(quantity)
+
+
+def planner_records(rows: Iterator[list[str]]) -> Iterator[Record]:
+    header = next(rows, [])
+    recipes = [name.strip() for name in header[1:]]
+    links: dict[str, list[str]] = {}
+    label, row = "", []
+    for row in rows:
+        label = row[0].strip() if row else ""
+        if label in ("YT", "Recipe"):
+            links[label] = row[1:]
+            continue
+        if label == "Ingredients":
+            break
+    fields = []
+    for column, recipe in enumerate(recipes):
+        # prefer the recipe link, fall back to the video link
+        link = next(
+            (cells[column].strip() for cells in (links.get("Recipe", []), links.get("YT", []))
+             if column < len(cells) and cells[column].strip().startswith("http")),
+            None,
+        )
+        fields.append({"instruction_link": link})
+    for column, recipe in enumerate(recipes):
+        if recipe:
+            yield Record(recipe, fields[column])
+
+    def cells(row: list[str]) -> Iterator[Record]:
+        for column, cell in enumerate(row[1:len(recipes) + 1]):
+            if not recipes[column] or not cell.strip():
+                continue
+            name, unit, quantity = parse_planner_cell(cell)
+            if name:
+                yield Record(recipes[column], fields[column], name, quantity, unit)
+
+    # the "Ingredients" row itself already holds the first ingredient of every recipe
+    if label == "Ingredients":
+        yield from cells(row)
+    for row in rows:
+        yield from cells(row)
+
+
+def long_records(rows: Iterator[list[str]]) -> Iterator[Record]:
+    header = [column.strip().lower() for column in next(rows, [])]
+    missing = {"recipe", "ingredient", "quantity", "unit"} - set(header)
+    if missing:
+        raise SystemExit(f"Missing columns: {', '.join(sorted(missing))}")
+    index = {column: position for position, column in enumerate(header)}
+    recipe_columns = [column for column in RECIPE_COLUMNS if column in index]
+
+    def get(row: list[str], column: str) -> str:
+        position = index.get(column)
+        return row[position].strip() if position is not None and position < len(row) else ""
+
+    for row in rows:
+        recipe = get(row, "recipe")
+        if not recipe:
+            continue
+        fields: dict[str, Any] = {}
+        unparsed = []
+        for column in recipe_columns:
+            value = get(row, column) or None
+            if value is not None and column in INTEGER_COLUMNS:
+                fields[column] = parse_integer(value)
+                if fields[column] is None:
+                    unparsed.append((column, value))
+            else:
+                fields[column] = value
+        yield Record(
+            recipe,
+            fields,
+            get(row, "ingredient") or None,
+            parse_quantity(get(row, "quantity")),
+            get(row, "unit"),
+            get(row, "optional").lower() in ("1", "true", "yes", "y"),
+            get(row, "category") or None,
+            tuple(unparsed),
+        )
+
+
+def has_quantity(record: Record) -> bool:
+    """
+    Whether the record's quantity can be stored (recipe_ingredients requires quantity > 0).
+    """
+    return record.quantity is not None and record.quantity > 0
+
+
+def chunked(records: Iterable[Record], size: int) -> Iterator[list[Record]]:
+    chunk: list[Record] = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def copy_rows(connection: Connection, table: str, columns: list[str], rows: list[dict[str, Any]]) -> None:
+    """
+    Insert rows with COPY when the driver supports it, otherwise with executemany.
+    """
+    if connection.dialect.name == "postgresql" and connection.dialect.driver in ("psycopg2", "pg8000"):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow(["\\N" if row[column] is None else row[column] for column in columns])
+        buffer.seek(0)
+        sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+        driver_connection = connection.connection.driver_connection
+        assert driver_connection is not None
+        cursor = driver_connection.cursor()
+        try:
+            if connection.dialect.driver == "psycopg2":
+                cursor.copy_expert(sql, buffer)
+            else:
+                cursor.execute(sql, stream=buffer)
+        finally:
+            cursor.close()
+        return
+    connection.execute(insert(models.Base.metadata.tables[table]), rows)
+
+
+class Importer:
+    """
+    Writes chunks of records, remembering ingredients, recipes and recipe
+    ingredient pairs seen so far so every chunk costs a fixed number of
+    statements. What a chunk adds is only remembered once its transaction
+    commits, so a failed chunk leaves no ids behind that are not in the database.
+
+    Ingredient records without a positive quantity are not written and are
+    collected in skipped instead. Recipe cells stored as NULL because they
+    could not be parsed are collected in unparsed as (recipe, column, value).
+    """
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.ingredients: dict[str, int] = {}
+        self.recipes: dict[str, int] = {}
+        self.pairs: set[tuple[int, int]] = set()
+        self._existing_recipes: set[int] = set()
+        self.skipped: list[Record] = []
+        self.unparsed: list[tuple[str, str, str]] = []
+        self.counts = {"rows": 0, "ingredients": 0, "recipes": 0, "lines": 0, "skipped": 0, "unparsed": 0}
+        with engine.connect() as connection:
+            for ingredient_id, name in connection.execute(
+                select(models.Ingredient.id, models.Ingredient.name).order_by(models.Ingredient.id.desc())
+            ):
+                # descending, so the oldest duplicate wins
+                self.ingredients[name.lower()] = ingredient_id
+            for recipe_id, name in connection.execute(
+                select(models.Recipe.id, models.Recipe.name).order_by(models.Recipe.id.desc())
+            ):
+                self.recipes[name] = recipe_id
+        self._existing_recipes = set(self.recipes.values())
+
+    def write(self, chunk: list[Record]) -> None:
+        skipped = [record for record in chunk if record.ingredient and not has_quantity(record)]
+        with self.engine.begin() as connection:
+            new_ingredients: dict[str, dict[str, Any]] = {}
+            new_recipes: dict[str, dict[str, Any]] = {}
+            unparsed: list[tuple[str, str, str]] = []
+            for record in chunk:
+                if record.recipe not in self.recipes and record.recipe not in new_recipes:
+                    new_recipes[record.recipe] = {"name": record.recipe, **record.recipe_fields}
+                    unparsed.extend((record.recipe, column, value) for column, value in record.unparsed)
+                if record.ingredient and has_quantity(record):
+                    key = record.ingredient.lower()
+                    if key not in self.ingredients and key not in new_ingredients:
+                        new_ingredients[key] = {
+                            "name": record.ingredient,
+                            "default_unit": record.unit or None,
+                            "category": record.category,
+                        }
+            added_ingredients: dict[str, int] = {}
+            added_recipes: dict[str, int] = {}
+            if new_ingredients:
+                inserted = connection.execute(
+                    insert(models.Ingredient).returning(models.Ingredient.id, models.Ingredient.name),
+                    list(new_ingredients.values()),
+                )
+                added_ingredients.update((name.lower(), ingredient_id) for ingredient_id, name in inserted)
+            if new_recipes:
+                columns = {column for fields in new_recipes.values() for column in fields}
+                inserted = connection.execute(
+                    insert(models.Recipe).returning(models.Recipe.id, models.Recipe.name),
+                    [{column: fields.get(column) for column in columns} for fields in new_recipes.values()],
+                )
+                added_recipes.update((name, recipe_id) for recipe_id, name in inserted)
+            ingredients = ChainMap(added_ingredients, self.ingredients)
+            recipes = ChainMap(added_recipes, self.recipes)
+
+            # lines already on recipes that existed before the import
+            touched = {recipes[record.recipe] for record in chunk} & self._existing_recipes
+            added_pairs: set[tuple[int, int]] = set()
+            if touched:
+                added_pairs.update(connection.execute(
+                    select(models.RecipeIngredient.recipe_id, models.RecipeIngredient.ingredient_id)
+                    .where(models.RecipeIngredient.recipe_id.in_(touched))
+                ).tuples())
+
+            lines = []
+            for record in chunk:
+                if not record.ingredient or not has_quantity(record):
+                    continue
+                pair = (recipes[record.recipe], ingredients[record.ingredient.lower()])
+                if pair in self.pairs or pair in added_pairs:
+                    continue
+                added_pairs.add(pair)
+                lines.append({
+                    "recipe_id": pair[0], "ingredient_id": pair[1], "quantity": record.quantity,
+                    "unit": record.unit, "optional": record.optional,
+                })
+            if lines:
+                copy_rows(connection, models.RecipeIngredient.__tablename__, LINE_COLUMNS, lines)
+
+        self.ingredients.update(added_ingredients)
+        self.recipes.update(added_recipes)
+        self.pairs |= added_pairs
+        self._existing_recipes -= touched
+        self.skipped.extend(skipped)
+        self.unparsed.extend(unparsed)
+        self.counts["rows"] += len(chunk)
+        self.counts["ingredients"] += len(new_ingredients)
+        self.counts["recipes"] += len(new_recipes)
+        self.counts["lines"] += len(lines)
+        self.counts["skipped"] += len(skipped)
+        self.counts["unparsed"] += len(unparsed)
+
+
+def detect_format(path: Path) -> str:
+    first = next(read_rows(path), [""])
+    return "planner" if first and first[0].strip() == "Name" else "long"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk-import recipes from CSV or XLSX files.")
+    parser.add_argument("paths", nargs="+", type=Path)
+    parser.add_argument("--format", choices=["auto", "planner", "long"], default="auto")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--url", help="database URL (default: the app's configured database)")
+    args = parser.parse_args()
+
+    if args.url:
+        engine = create_engine(args.url)
+    else:
+        from app.database import engine
+
+    start = time.perf_counter()
+    importer = Importer(engine)
+    for path in args.paths:
+        layout = detect_format(path) if args.format == "auto" else args.format
+        parse = planner_records if layout == "planner" else long_records
+        for chunk in chunked(parse(read_rows(path)), args.chunk_size):
+            importer.write(chunk)
+            elapsed = time.perf_counter() - start
+            print(
+                f"{path.name}: {importer.counts['rows']} rows, {importer.counts['recipes']} recipes, "
+                f"{importer.counts['ingredients']} ingredients, {importer.counts['lines']} lines, "
+                f"{importer.counts['skipped']} skipped, {importer.counts['unparsed']} unparsable cells "
+                f"({importer.counts['rows'] / elapsed:,.0f} rows/s)",
+                flush=True,
+            )
+    for record in importer.skipped:
+        print(
+            f"Skipped {record.ingredient!r} in {record.recipe!r}: quantity must be a positive number",
+            file=sys.stderr,
+        )
+    for recipe, column, value in importer.unparsed:
+        print(f"Stored {column} of {recipe!r} as NULL: {value!r} is not a number", file=sys.stderr)
+    elapsed = time.perf_counter() - start
+    print(f"Imported {importer.counts['rows']} rows in {elapsed:.1f}s ({importer.counts['rows'] / elapsed:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
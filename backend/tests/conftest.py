@@ -45,7 +45,9 @@ def clear_tables():
 
 @pytest.fixture(scope="session", autouse=True)
 def cleanup_db():
-    # run before tests
+    # run before tests; rebuild the schema so model changes reach test.db
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
     clear_tables()
     yield
     # run after tests
@@ -87,3 +89,16 @@ def auth_headers(client: TestClient, db_session: Session):
         raise RuntimeError("No access_token returned from login in fixture")
 
     yield {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture(scope="module")
+def admin_headers(client: TestClient, db_session: Session):
+    """Create a superuser and log in, yielding Authorization headers with Bearer token."""
+    email = "admin@example.com"
+    if not db_session.query(models.User).filter(models.User.email == email).first():
+        db_session.add(models.User(
+            email=email, username="admin", hashed_password=pwd_context.hash("secret"), is_superuser=True
+        ))
+        db_session.commit()
+    res = client.post("/auth/login", json={"username": email, "password": "secret"})
+    yield {"Authorization": f"Bearer {res.json()['access_token']}"}
@@ -0,0 +1,88 @@
+from datetime import date, datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from app.fridge_log import FridgeLogEvent, daily_rollups, fridge_log_writer
+
+
+def _range() -> dict[str, str]:
+    today = date.today()
+    return {"start_date": str(today - timedelta(days=1)), "end_date": str(today + timedelta(days=1))}
+
+
+def _usage(res, ingredient_id: int) -> dict:
+    assert res.status_code == 200
+    return next(row for row in res.json() if row["ingredient_id"] == ingredient_id)
+
+
+def _flush(client: TestClient) -> None:
+    assert client.portal is not None
+    client.portal.call(fridge_log_writer.flush)
+
+
+def test_daily_rollups_split_amounts_per_day():
+    day = datetime(2025, 9, 1, 10)
+    rows = daily_rollups([
+        FridgeLogEvent(1, 2, 5.0, "g", "add", day),
+        FridgeLogEvent(1, 2, -2.0, "g", "update", day),
+        FridgeLogEvent(1, 2, -1.0, "g", "waste", day + timedelta(hours=1)),
+        FridgeLogEvent(1, 2, -3.0, "g", "remove", day + timedelta(days=1)),
+        FridgeLogEvent(1, 2, 250.0, "ml", "add", day + timedelta(days=1)),
+    ])
+    assert sorted(rows, key=lambda row: (row["day"], row["unit"])) == [
+        {"user_id": 1, "ingredient_id": 2, "day": date(2025, 9, 1), "unit": "g", "added": 5.0, "consumed": 2.0, "wasted": 1.0, "events": 3},
+        {"user_id": 1, "ingredient_id": 2, "day": date(2025, 9, 2), "unit": "g", "added": 0.0, "consumed": 3.0, "wasted": 0.0, "events": 1},
+        {"user_id": 1, "ingredient_id": 2, "day": date(2025, 9, 2), "unit": "ml", "added": 250.0, "consumed": 0.0, "wasted": 0.0, "events": 1},
+    ]
+
+
+def test_consumption_waste_and_trends(client: TestClient, auth_headers: dict[str, str]):
+    milk = client.post("/ingredients/", json={"name": "Analytics Milk"}).json()["id"]
+    rice = client.post("/ingredients/", json={"name": "Analytics Rice"}).json()["id"]
+    expired = str(date.today() - timedelta(days=3))
+
+    milk_item = {"ingredient_id": milk, "quantity": 1000.0, "unit": "ml", "expiration_date": expired}
+    milk_id = client.post("/fridge_items/", json=milk_item, headers=auth_headers).json()["id"]
+    client.put(f"/fridge_items/{milk_id}", json={**milk_item, "quantity": 400.0}, headers=auth_headers)
+    client.delete(f"/fridge_items/{milk_id}", headers=auth_headers)
+    rice_item = {"ingredient_id": rice, "quantity": 500.0, "unit": "g"}
+    rice_id = client.post("/fridge_items/", json=rice_item, headers=auth_headers).json()["id"]
+    client.delete(f"/fridge_items/{rice_id}", headers=auth_headers)
+    _flush(client)
+
+    consumption = client.get("/analytics/consumption", params=_range(), headers=auth_headers)
+    milk_usage = _usage(consumption, milk)
+    assert milk_usage["unit"] == "ml"
+    assert (milk_usage["added"], milk_usage["consumed"], milk_usage["wasted"]) == (1000.0, 600.0, 400.0)
+    assert milk_usage["daily_consumption"] == 200.0
+    assert milk_usage["waste_rate"] == 0.4
+    assert _usage(consumption, rice)["waste_rate"] == 0.0
+
+    waste_ids = [row["ingredient_id"] for row in client.get("/analytics/waste", params=_range(), headers=auth_headers).json()]
+    assert milk in waste_ids and rice not in waste_ids
+
+    for bucket in ("day", "week"):
+        trend = client.get(f"/analytics/trends/{milk}", params={**_range(), "bucket": bucket}, headers=auth_headers)
+        assert trend.status_code == 200
+        assert [(p["unit"], p["added"], p["consumed"], p["wasted"]) for p in trend.json()] == [("ml", 1000.0, 600.0, 400.0)]
+
+
+def test_usage_is_split_by_unit(client: TestClient, auth_headers: dict[str, str]):
+    butter = client.post("/ingredients/", json={"name": "Analytics Butter"}).json()["id"]
+    for quantity, unit in ((0.25, "kg"), (100.0, "g"), (2.0, "pcs")):
+        item = {"ingredient_id": butter, "quantity": quantity, "unit": unit}
+        item_id = client.post("/fridge_items/", json=item, headers=auth_headers).json()["id"]
+        client.delete(f"/fridge_items/{item_id}", headers=auth_headers)
+    _flush(client)
+
+    consumption = client.get("/analytics/consumption", params=_range(), headers=auth_headers).json()
+    usage = {row["unit"]: (row["added"], row["consumed"]) for row in consumption if row["ingredient_id"] == butter}
+    assert usage == {"g": (350.0, 350.0), "pcs": (2.0, 2.0)}
+    trend = client.get(f"/analytics/trends/{butter}", params=_range(), headers=auth_headers).json()
+    assert sorted((p["unit"], p["added"]) for p in trend) == [("g", 350.0), ("pcs", 2.0)]
+
+
+def test_analytics_validates_range(client: TestClient, auth_headers: dict[str, str]):
+    params = {"start_date": "2025-09-02", "end_date": "2025-09-01"}
+    assert client.get("/analytics/consumption", params=params, headers=auth_headers).status_code == 400
+    assert client.get("/analytics/waste").status_code in (401, 403)
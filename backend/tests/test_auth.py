@@ -7,3 +7,45 @@ client = TestClient(app)
 def test_fridge_items_unauthenticated():
     res = client.get('/fridge_items/')
     assert res.status_code == 401 or res.status_code == 403
+
+
+def test_access_token_carries_user_claims(auth_headers: dict[str, str]):
+    from app.users import ALGORITHM, SECRET
+    from jose import jwt
+
+    token = auth_headers["Authorization"].split(" ", 1)[1]
+    payload = jwt.decode(token, SECRET, algorithms=[ALGORITHM])
+    assert payload["email"] == "testuser@example.com"
+    assert payload["is_active"] is True
+    assert payload["is_superuser"] is False
+
+
+def test_user_cache_invalidated_on_user_update(db_session):
+    from app import models
+    from app.users import to_user_sent, user_cache
+
+    user = db_session.query(models.User).filter(models.User.email == "testuser@example.com").first()
+    user_cache.set(user.id, to_user_sent(user))
+    user.username = "renamed"
+    db_session.commit()
+    assert user_cache.get(user.id) is None
+
+
+def test_login_rehashes_outdated_password_hash(client, db_session):
+    from app import models
+    from app.passwords import BCRYPT_ROUNDS, pwd_context
+
+    user = models.User(
+        email="rehash@example.com",
+        username="rehash",
+        hashed_password=pwd_context.copy(bcrypt__rounds=4).hash("secret"),
+        is_active=True,
+    )
+    db_session.add(user)
+    db_session.commit()
+
+    res = client.post("/auth/login", json={"username": "rehash@example.com", "password": "secret"})
+    assert res.status_code == 200
+    db_session.refresh(user)
+    assert not pwd_context.needs_update(user.hashed_password)
+    assert f"${BCRYPT_ROUNDS:02d}$" in user.hashed_password
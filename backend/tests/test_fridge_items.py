@@ -1,7 +1,17 @@
-from typing import Any
+import json
+from datetime import date, timedelta
+from typing import Any, Optional
 
+import pytest
+from app import models, schemas
+from app.api import fridge_items
+from app.api.fridge_items import MAX_BATCH_OPERATIONS
+from app.catalogue import catalogue
+from app.expiry import expiring_cache, expiry_scanner
 from app.main import app  # ty: ignore
+from app.users import pwd_context
 from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
 
 Json = dict[str, Any]
 client = TestClient(app)
@@ -38,6 +48,79 @@ def test_list_fridge_items_returns_list(client: TestClient, auth_headers: dict[s
     assert isinstance(res.json(), list)
 
 
+def test_list_fridge_items_names_ingredient_created_elsewhere(
+    client: TestClient, auth_headers: dict[str, str], db_session: Session, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(catalogue, "miss_reload_interval", 0)
+    client.get("/fridge_items/", headers=auth_headers)
+    # written by another process: the catalogue is not told, but reloads on the unknown id
+    ingredient = models.Ingredient(name="Elsewhere Kale")
+    db_session.add(ingredient)
+    db_session.commit()
+    payload: Json = {"ingredient_id": ingredient.id, "quantity": 1.0, "unit": "pcs"}
+    client.post("/fridge_items/", json=payload, headers=auth_headers)
+    items = client.get("/fridge_items/", params={"limit": 1000}, headers=auth_headers).json()
+    assert {"Elsewhere Kale"} == {i["name"] for i in items if i["ingredient_id"] == ingredient.id}
+
+
+def test_list_fridge_items_matches_orm_payload(client: TestClient, auth_headers: dict[str, str], db_session: Session):
+    kept = _create_ingredient(client, "Payload Parsley")
+    dropped = _create_ingredient(client, "Payload Purslane")
+    for item in (
+        {"ingredient_id": kept, "quantity": 2.5, "unit": "g", "expiration_date": "2031-02-03"},
+        {"ingredient_id": kept, "quantity": 1.0, "unit": "pcs"},
+        {"ingredient_id": dropped, "quantity": 4.0, "unit": "pcs"},
+    ):
+        client.post("/fridge_items/", json=item, headers=auth_headers)
+    # leaves an item whose ingredient the catalogue no longer has
+    client.delete(f"/ingredients/{dropped}")
+
+    db_session.expire_all()
+    user = db_session.query(models.User).filter(models.User.email == "testuser@example.com").one()
+    # the list as built from FridgeItem entities joined to their ingredient
+    fields = [field for field in schemas.FridgeNamedItem.model_fields if field != "name"]
+    expected = [
+        schemas.FridgeNamedItem.model_validate(
+            {**{field: getattr(item, field) for field in fields}, "name": name}
+        ).model_dump(mode="json")
+        for item, name in db_session.query(models.FridgeItem, models.Ingredient.name)
+        .join(models.Ingredient, models.FridgeItem.ingredient_id == models.Ingredient.id)
+        .filter(models.FridgeItem.user_id == user.id)
+        .order_by(models.FridgeItem.id)
+    ]
+    items = client.get("/fridge_items/", params={"limit": 100000}, headers=auth_headers).json()
+    assert [item["id"] for item in items] == [item["id"] for item in expected]
+    for item, old in zip(items, expected):
+        assert list(item) == list(old)
+        for field, value in old.items():
+            assert item[field] == value, (item["id"], field)
+    assert db_session.query(models.FridgeItem).filter(models.FridgeItem.ingredient_id == dropped).count() == 1
+    assert dropped not in {item["ingredient_id"] for item in items}
+    assert [item["name"] for item in items if item["ingredient_id"] == kept] == ["Payload Parsley"] * 2
+
+
+def test_fast_json_fridge_list_matches_response_model(
+    client: TestClient, auth_headers: dict[str, str], monkeypatch: pytest.MonkeyPatch
+):
+    pytest.importorskip("orjson")
+    ing_id = _create_ingredient(client, "Fast Json Leek")
+    payload: Json = {"ingredient_id": ing_id, "quantity": 3.0, "unit": "pcs", "expiration_date": "2031-01-01"}
+    client.post("/fridge_items/", json=payload, headers=auth_headers)
+    expected = client.get("/fridge_items/", params={"limit": 2}, headers=auth_headers)
+    monkeypatch.setattr(fridge_items, "FAST_JSON_RESPONSES", True)
+    fast = client.get("/fridge_items/", params={"limit": 2}, headers=auth_headers)
+    assert fast.json() == expected.json()
+    assert fast.headers["X-Next-Cursor"] == expected.headers["X-Next-Cursor"]
+
+
+def test_list_fridge_items_ndjson(client: TestClient, auth_headers: dict[str, str]):
+    ing_id = _create_ingredient(client, "Streamed Fennel")
+    client.post("/fridge_items/", json={"ingredient_id": ing_id, "quantity": 2.0, "unit": "pcs"}, headers=auth_headers)
+    expected = client.get("/fridge_items/", params={"limit": 100000}, headers=auth_headers).json()
+    res = client.get("/fridge_items/", headers={**auth_headers, "Accept": "application/x-ndjson"})
+    assert [json.loads(line) for line in res.text.splitlines()] == expected
+
+
 def test_update_and_delete_fridge_item(client: TestClient, auth_headers: dict[str, str]):
     ing_id = _create_ingredient(client)
     payload: Json = {"ingredient_id": ing_id, "quantity": 1.0, "unit": "pcs"}
@@ -56,3 +139,77 @@ def test_update_and_delete_fridge_item(client: TestClient, auth_headers: dict[st
     assert res3.status_code == 200
     res4 = client.get(f"/fridge_items/{item_id}")
     assert res4.status_code == 404
+
+
+def test_batch_fridge_items(client: TestClient, auth_headers: dict[str, str], db_session: Session):
+    ing_id = _create_ingredient(client, "Batch Beans")
+    existing = [
+        client.post("/fridge_items/", json={"ingredient_id": ing_id, "quantity": q, "unit": "g"}, headers=auth_headers).json()["id"]
+        for q in (100.0, 200.0)
+    ]
+    other = models.User(email="batch-other@example.com", username="batch-other", hashed_password=pwd_context.hash("x"))
+    db_session.add(other)
+    db_session.commit()
+    foreign = models.FridgeItem(user_id=other.id, ingredient_id=ing_id, quantity=1.0, unit="g")
+    db_session.add(foreign)
+    db_session.commit()
+
+    operations: list[Json] = [
+        {"op": "create", "item": {"ingredient_id": ing_id, "quantity": 1.0, "unit": "g"}},
+        {"op": "update", "id": existing[0], "item": {"ingredient_id": ing_id, "quantity": 50.0, "unit": "g"}},
+        {"op": "delete", "id": existing[1]},
+        {"op": "create", "item": {"ingredient_id": ing_id, "quantity": 2.0, "unit": "g"}},
+        {"op": "delete", "id": foreign.id},
+        {"op": "delete", "id": existing[1]},
+        {"op": "update", "id": existing[0]},
+    ]
+    res = client.post("/fridge_items/batch", json=operations, headers=auth_headers)
+    assert res.status_code == 200
+    results = res.json()
+    assert [r["status"] for r in results] == [200, 200, 200, 200, 403, 404, 422]
+    assert [results[i]["item"]["quantity"] for i in (0, 1, 3)] == [1.0, 50.0, 2.0]
+    created = [results[0]["item"]["id"], results[3]["item"]["id"]]
+
+    items = {item["id"]: item["quantity"] for item in client.get("/fridge_items/", params={"limit": 1000}, headers=auth_headers).json()}
+    assert items[existing[0]] == 50.0 and existing[1] not in items
+    assert all(item_id in items for item_id in created)
+    assert client.get(f"/fridge_items/{foreign.id}").status_code == 200
+
+
+def test_batch_fridge_items_limits(client: TestClient, auth_headers: dict[str, str]):
+    assert client.post("/fridge_items/batch", json=[]).status_code in (401, 403)
+    too_many = [{"op": "delete", "id": 1}] * (MAX_BATCH_OPERATIONS + 1)
+    assert client.post("/fridge_items/batch", json=too_many, headers=auth_headers).status_code == 413
+
+
+def test_expiring_fridge_items(client: TestClient, auth_headers: dict[str, str]):
+    ing_id = _create_ingredient(client, "Expiring Yoghurt")
+    today = date.today()
+
+    def stock(days: Optional[int]) -> int:
+        item: Json = {"ingredient_id": ing_id, "quantity": 1.0, "unit": "pcs"}
+        if days is not None:
+            item["expiration_date"] = str(today + timedelta(days=days))
+        return client.post("/fridge_items/", json=item, headers=auth_headers).json()["id"]
+
+    expired, soon, later, never = stock(-1), stock(2), stock(10), stock(None)
+
+    def expiring(**params: Any) -> list[int]:
+        res = client.get("/fridge_items/expiring", params=params, headers=auth_headers)
+        assert res.status_code == 200
+        return [item["id"] for item in res.json() if item["ingredient_id"] == ing_id]
+
+    assert expiring() == [soon]
+    assert expiring(days=10, include_expired=True) == [expired, soon, later]
+
+    assert client.portal is not None
+    client.portal.call(expiry_scanner.scan)
+    hits = expiring_cache.hits
+    assert expiring(days=7, include_expired=True) == [expired, soon]
+    assert expiring_cache.hits == hits + 1
+    # a fridge change is not served from the scan
+    client.delete(f"/fridge_items/{soon}", headers=auth_headers)
+    assert expiring(days=7) == []
+    assert expiring_cache.hits == hits + 1
+    assert never not in expiring(days=365, include_expired=True)
+    assert client.get("/fridge_items/expiring", params={"days": -1}, headers=auth_headers).status_code == 422
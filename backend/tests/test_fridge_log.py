@@ -0,0 +1,93 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import Session
+
+from app import models
+from app.fridge_log import FridgeLogWriter, fridge_log_writer
+
+
+def test_fridge_changes_are_logged(
+    client: TestClient, auth_headers: dict[str, str], admin_headers: dict[str, str], db_session: Session
+):
+    ing_id = client.post("/ingredients/", json={"name": "Logged Leek"}).json()["id"]
+    other_id = client.post("/ingredients/", json={"name": "Logged Lentils"}).json()["id"]
+    item = {"ingredient_id": ing_id, "quantity": 2.0, "unit": "pcs"}
+    item_id = client.post("/fridge_items/", json=item, headers=auth_headers).json()["id"]
+    client.put(f"/fridge_items/{item_id}", json={**item, "quantity": 3.5}, headers=auth_headers)
+    client.put(f"/fridge_items/{item_id}", json={**item, "quantity": 3.5}, headers=auth_headers)
+    client.put(f"/fridge_items/{item_id}", json={**item, "ingredient_id": other_id, "quantity": 1.0}, headers=auth_headers)
+    client.delete(f"/fridge_items/{item_id}", headers=auth_headers)
+
+    logs = _logs(client, db_session, ing_id, other_id)
+    assert [(log.ingredient_id, log.change_amount, log.unit, log.action_type) for log in logs] == [
+        (ing_id, 2.0, "pcs", "add"),
+        (ing_id, 1.5, "pcs", "update"),
+        (ing_id, -3.5, "pcs", "remove"),
+        (other_id, 1.0, "pcs", "add"),
+        (other_id, -1.0, "pcs", "remove"),
+    ]
+    assert client.get("/metrics/fridge_log", headers=admin_headers).json()["written"] >= 5
+
+
+def test_fridge_log_amounts_are_in_base_units(client: TestClient, auth_headers: dict[str, str], db_session: Session):
+    ing_id = client.post("/ingredients/", json={"name": "Logged Lard"}).json()["id"]
+    item = {"ingredient_id": ing_id, "quantity": 500.0, "unit": "g"}
+    item_id = client.post("/fridge_items/", json=item, headers=auth_headers).json()["id"]
+    client.put(f"/fridge_items/{item_id}", json={**item, "quantity": 0.75, "unit": "kg"}, headers=auth_headers)
+    # same amount, another unit
+    client.put(f"/fridge_items/{item_id}", json={**item, "quantity": 750.0}, headers=auth_headers)
+    client.put(f"/fridge_items/{item_id}", json={**item, "quantity": 1.0, "unit": "l"}, headers=auth_headers)
+    client.delete(f"/fridge_items/{item_id}", headers=auth_headers)
+
+    assert [(log.change_amount, log.unit, log.action_type) for log in _logs(client, db_session, ing_id)] == [
+        (500.0, "g", "add"),
+        (250.0, "g", "update"),
+        (-750.0, "g", "remove"),
+        (1000.0, "ml", "add"),
+        (-1000.0, "ml", "remove"),
+    ]
+
+
+def _logs(client: TestClient, db_session: Session, *ingredient_ids: int) -> list[models.FridgeLog]:
+    assert client.portal is not None
+    client.portal.call(fridge_log_writer.flush)
+    return (
+        db_session.query(models.FridgeLog)
+        .filter(models.FridgeLog.ingredient_id.in_(ingredient_ids))
+        .order_by(models.FridgeLog.id)
+        .all()
+    )
+
+
+def test_writer_batches_events():
+    async def run():
+        engine = create_async_engine("sqlite+aiosqlite:///./test.db")
+        writer = FridgeLogWriter(engine, batch_size=10, flush_interval=5)
+        for i in range(25):
+            await writer.log(1, 1, float(i), "g", "add")
+        await writer.stop()
+        await engine.dispose()
+        return writer.stats()
+
+    stats = asyncio.run(run())
+    assert (stats["written"], stats["batches"], stats["queue_depth"]) == (25, 3, 0)
+
+
+def test_writer_bounds_queue_and_drops_failing_batches():
+    async def run():
+        engine = create_async_engine("sqlite+aiosqlite:////nonexistent/fridge_log.db")
+        writer = FridgeLogWriter(
+            engine, batch_size=1, flush_interval=0.2, max_queue=1, enqueue_timeout=0.01, max_attempts=2
+        )
+        for i in range(3):
+            await writer.log(1, 1, float(i), "g", "add")
+            await asyncio.sleep(0)
+        await writer.stop()
+        await engine.dispose()
+        return writer.stats()
+
+    stats = asyncio.run(run())
+    # one event is being retried, one waits in the queue, the third finds no room
+    assert (stats["written"], stats["dropped"], stats["failed"]) == (0, 1, 2)
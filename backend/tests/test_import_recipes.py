@@ -0,0 +1,183 @@
+from pathlib import Path
+
+import pytest
+from sqlalchemy import Engine, create_engine, select
+
+from app import models
+from scripts import import_recipes
+from scripts.import_recipes import Importer, chunked, detect_format, long_records, planner_records, read_rows
+
+PLANNER_ROWS = [
+    ["Name", "Import Pancakes", "Import Omelette"],
+    ["YT", "https://video.example/pancakes", ""],
+    ["Recipe", "", "https://recipes.example/omelette"],
+    ["Ingredients", "Import Flour [g], 200", "Import Egg [piece], 3"],
+    ["", "import egg [piece], 2", "Import Milk [ml], 1/2"],
+    ["", "Import Milk [ml], 300", ""],
+]
+
+
+@pytest.fixture
+def engine(tmp_path: Path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'import.db'}")
+    models.Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def _write_csv(path: Path, rows: list[list[str]]) -> Path:
+    path.write_text("\n".join(",".join(f'"{cell}"' for cell in row) for row in rows) + "\n", encoding="utf-8")
+    return path
+
+
+def _import(engine: Engine, path: Path, chunk_size: int = 2) -> Importer:
+    parse = planner_records if detect_format(path) == "planner" else long_records
+    importer = Importer(engine)
+    for chunk in chunked(parse(read_rows(path)), chunk_size):
+        importer.write(chunk)
+    return importer
+
+
+def _lines(engine: Engine) -> set[tuple[str, str, float, str, bool]]:
+    with engine.connect() as connection:
+        return set(connection.execute(
+            select(
+                models.Recipe.name,
+                models.Ingredient.name,
+                models.RecipeIngredient.quantity,
+                models.RecipeIngredient.unit,
+                models.RecipeIngredient.optional,
+            )
+            .join(models.Recipe, models.RecipeIngredient.recipe_id == models.Recipe.id)
+            .join(models.Ingredient, models.RecipeIngredient.ingredient_id == models.Ingredient.id)
+        ).tuples())
+
+
+def test_import_planner_layout(engine: Engine, tmp_path: Path):
+    path = _write_csv(tmp_path / "planner.csv", PLANNER_ROWS)
+    assert detect_format(path) == "planner"
+    importer = _import(engine, path)
+
+    assert importer.counts == {"rows": 7, "ingredients": 3, "recipes": 2, "lines": 5, "skipped": 0, "unparsed": 0}
+    assert _lines(engine) == {
+        ("Import Pancakes", "Import Flour", 200.0, "g", False),
+        ("Import Pancakes", "Import Egg", 2.0, "piece", False),
+        ("Import Pancakes", "Import Milk", 300.0, "ml", False),
+        ("Import Omelette", "Import Egg", 3.0, "piece", False),
+        ("Import Omelette", "Import Milk", 0.5, "ml", False),
+    }
+    with engine.connect() as connection:
+        links = dict(connection.execute(select(models.Recipe.name, models.Recipe.instruction_link)).tuples().all())
+    assert links == {
+        "Import Pancakes": "https://video.example/pancakes",
+        "Import Omelette": "https://recipes.example/omelette",
+    }
+
+
+def test_import_planner_xlsx(engine: Engine, tmp_path: Path):
+    openpyxl = pytest.importorskip("openpyxl")
+    workbook = openpyxl.Workbook()
+    for row in PLANNER_ROWS:
+        workbook.active.append(row)
+    path = tmp_path / "planner.xlsx"
+    workbook.save(path)
+
+    assert _import(engine, path).counts["lines"] == 5
+
+
+def test_import_long_layout(engine: Engine, tmp_path: Path):
+    path = _write_csv(tmp_path / "long.csv", [
+        ["recipe", "ingredient", "quantity", "unit", "optional", "category", "servings", "description"],
+        ["Import Soup", "Import Leek", "2", "piece", "", "Vegetable", "4", "Green soup"],
+        ["Import Soup", "Import Cream", "1,5", "dl", "yes", "Dairy", "", ""],
+        # already on the recipe
+        ["Import Soup", "import leek", "1", "piece", "", "", "", ""],
+        ["Import Salad", "Import Leek", "0.25", "piece", "", "", "", ""],
+        ["Import Toast", "", "", "", "", "", "", ""],
+    ])
+    assert detect_format(path) == "long"
+    importer = _import(engine, path)
+
+    assert importer.counts == {"rows": 5, "ingredients": 2, "recipes": 3, "lines": 3, "skipped": 0, "unparsed": 0}
+    assert _lines(engine) == {
+        ("Import Soup", "Import Leek", 2.0, "piece", False),
+        ("Import Soup", "Import Cream", 1.5, "dl", True),
+        ("Import Salad", "Import Leek", 0.25, "piece", False),
+    }
+    with engine.connect() as connection:
+        soup = connection.execute(
+            select(models.Recipe.servings, models.Recipe.description).where(models.Recipe.name == "Import Soup")
+        ).one()
+        categories = dict(connection.execute(select(models.Ingredient.name, models.Ingredient.category)).tuples().all())
+    assert tuple(soup) == (4, "Green soup")
+    assert categories == {"Import Leek": "Vegetable", "Import Cream": "Dairy"}
+
+
+def test_import_skips_rows_without_a_positive_quantity(engine: Engine, tmp_path: Path):
+    path = _write_csv(tmp_path / "bad.csv", [
+        ["recipe", "ingredient", "quantity", "unit"],
+        ["Import Stew", "Import Beans", "400", "g"],
+        ["Import Stew", "Import Salt", "a pinch", "g"],
+        ["Import Stew", "Import Water", "", "ml"],
+        ["Import Stew", "Import Pepper", "0", "g"],
+        ["Import Curry", "Import Rice", "-1", "g"],
+    ])
+    importer = _import(engine, path)
+
+    assert importer.counts["skipped"] == 4
+    assert [(record.recipe, record.ingredient) for record in importer.skipped] == [
+        ("Import Stew", "Import Salt"),
+        ("Import Stew", "Import Water"),
+        ("Import Stew", "Import Pepper"),
+        ("Import Curry", "Import Rice"),
+    ]
+    assert _lines(engine) == {("Import Stew", "Import Beans", 400.0, "g", False)}
+    with engine.connect() as connection:
+        recipes = set(connection.execute(select(models.Recipe.name)).scalars())
+        ingredients = set(connection.execute(select(models.Ingredient.name)).scalars())
+    # the recipes are kept, the skipped ingredients are not created
+    assert recipes == {"Import Stew", "Import Curry"}
+    assert ingredients == {"Import Beans"}
+
+
+def test_import_stores_unparsable_recipe_numbers_as_null(engine: Engine, tmp_path: Path):
+    path = _write_csv(tmp_path / "numbers.csv", [
+        ["recipe", "ingredient", "quantity", "unit", "servings", "prep_time_min", "cook_time_min"],
+        ["Import Chili", "Import Beans", "400", "g", "2-3", "about 20", "30.0"],
+        ["Import Chili", "Import Onion", "1", "piece", "", "", ""],
+        ["Import Dal", "Import Lentils", "250", "g", "4", "10", "25"],
+    ])
+    importer = _import(engine, path)
+
+    assert importer.counts == {"rows": 3, "ingredients": 3, "recipes": 2, "lines": 3, "skipped": 0, "unparsed": 2}
+    assert importer.unparsed == [("Import Chili", "servings", "2-3"), ("Import Chili", "prep_time_min", "about 20")]
+    with engine.connect() as connection:
+        recipes = {
+            name: (servings, prep, cook)
+            for name, servings, prep, cook in connection.execute(
+                select(models.Recipe.name, models.Recipe.servings, models.Recipe.prep_time_min, models.Recipe.cook_time_min)
+            )
+        }
+    assert recipes == {"Import Chili": (None, None, 30), "Import Dal": (4, 10, 25)}
+    assert len(_lines(engine)) == 3
+
+
+def test_import_failed_chunk_leaves_no_stale_ids(engine: Engine, tmp_path: Path, monkeypatch):
+    path = _write_csv(tmp_path / "long.csv", [
+        ["recipe", "ingredient", "quantity", "unit"],
+        ["Import Bake", "Import Oats", "100", "g"],
+    ])
+    records = list(long_records(read_rows(path)))
+    importer = Importer(engine)
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("connection lost")
+
+    monkeypatch.setattr(import_recipes, "copy_rows", fail)
+    with pytest.raises(RuntimeError):
+        importer.write(records)
+    assert importer.ingredients == {} and importer.recipes == {} and importer.pairs == set()
+
+    monkeypatch.undo()
+    importer.write(records)
+    assert _lines(engine) == {("Import Bake", "Import Oats", 100.0, "g", False)}
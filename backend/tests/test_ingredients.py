@@ -85,3 +85,58 @@ def test_deleted_ingredient_returns_404():
 def test_get_nonexistent_ingredient_returns_404():
     res = client.get("/ingredients/999999")
     assert res.status_code == 404
+
+
+def test_list_ingredients_cursor_pages_without_overlap():
+    for i in range(5):
+        _create_ingredient(client, f"Paged {i}")
+    seen: list[int] = []
+    res = client.get("/ingredients/", params={"limit": 2})
+    while True:
+        assert res.status_code == 200
+        seen.extend(i["id"] for i in res.json())
+        cursor = res.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        res = client.get("/ingredients/", params={"limit": 2, "cursor": cursor})
+    assert seen == sorted(set(seen))
+    assert len(seen) >= 5
+
+
+def test_list_ingredients_invalid_cursor_returns_400():
+    res = client.get("/ingredients/", params={"cursor": "not-a-cursor"})
+    assert res.status_code == 400
+
+
+def test_list_ingredients_conditional_get():
+    res = client.get("/ingredients/")
+    etag = res.headers["ETag"]
+    assert "max-age" in res.headers["Cache-Control"]
+    again = client.get("/ingredients/", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    ingredient_id = _create_ingredient(client, "Conditional Leek").json()["id"]
+    changed = client.get("/ingredients/", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    etag = changed.headers["ETag"]
+    client.delete(f"/ingredients/{ingredient_id}")
+    assert client.get("/ingredients/", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_conditional_get_without_last_modified():
+    from datetime import datetime
+
+    from app.http_cache import conditional
+    from fastapi import Request, Response
+
+    since = (b"if-modified-since", b"Wed, 01 Jan 2031 00:00:00 GMT")
+    request = Request({"type": "http", "method": "GET", "path": "/", "query_string": b"", "headers": [since]})
+    # e.g. an empty table, whose latest updated_at is NULL
+    response = Response()
+    assert conditional(request, response, '"empty"') is None
+    assert response.headers["ETag"] == '"empty"' and "last-modified" not in response.headers
+    # naive timestamps are taken as UTC
+    not_modified = conditional(request, Response(), '"rows"', datetime(2030, 12, 31, 23, 59, 59, 999))
+    assert not_modified is not None and not_modified.status_code == 304
+    assert not_modified.headers["Last-Modified"] == "Tue, 31 Dec 2030 23:59:59 GMT"
@@ -17,4 +17,64 @@ def client():
 # Example test: check root endpoint
 def test_root(client: TestClient):
     response = client.get("/")
-    assert response.status_code == 200
\ No newline at end of file
+    assert response.status_code == 200
+
+def test_large_responses_are_gzipped(client: TestClient):
+    for i in range(30):
+        client.post("/ingredients/", json={"name": f"Gzip Ingredient {i}", "category": "Compression test"})
+    response = client.get("/ingredients/", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.json()) >= 30
+    small = client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+    plain = client.get("/ingredients/", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    # the encoded representation only shares a weak validator with the identity one
+    assert response.headers["etag"] == f"W/{plain.headers['etag']}"
+    revalidated = client.get("/ingredients/", headers={"Accept-Encoding": "gzip", "If-None-Match": response.headers["etag"]})
+    assert revalidated.status_code == 304 and revalidated.headers["etag"] == response.headers["etag"]
+
+
+def _compressing_client(media_type: str, chunks: list[bytes]) -> TestClient:
+    from app.compression import CompressionMiddleware
+    from starlette.applications import Starlette
+    from starlette.responses import Response, StreamingResponse
+    from starlette.routing import Route
+
+    async def full(request):
+        return Response(b"".join(chunks), media_type=media_type)
+
+    async def streamed(request):
+        async def body():
+            for chunk in chunks:
+                yield chunk
+        return StreamingResponse(body(), media_type=media_type)
+
+    return TestClient(CompressionMiddleware(Starlette(routes=[Route("/full", full), Route("/streamed", streamed)])))
+
+
+def test_compressed_media_types_are_sent_as_they_are():
+    chunks = [b"x" * 2000, b"y" * 2000]
+    for media_type in ("application/gzip", "application/vnd.apache.parquet", "image/png", "text/event-stream"):
+        compressing = _compressing_client(media_type, chunks)
+        for path in ("/full", "/streamed"):
+            response = compressing.get(path, headers={"Accept-Encoding": "gzip"})
+            assert "content-encoding" not in response.headers, (media_type, path)
+            assert response.content == b"".join(chunks)
+    for media_type in ("application/json", "image/svg+xml"):
+        compressing = _compressing_client(media_type, chunks)
+        for path in ("/full", "/streamed"):
+            response = compressing.get(path, headers={"Accept-Encoding": "gzip"})
+            assert response.headers["content-encoding"] == "gzip", (media_type, path)
+            assert response.content == b"".join(chunks)
+    full = compressing.get("/full", headers={"Accept-Encoding": "gzip"})
+    assert int(full.headers["content-length"]) < 4000 and full.headers["vary"] == "Accept-Encoding"
+
+
+def test_large_responses_are_brotli_compressed():
+    pytest.importorskip("brotli")
+    compressing = _compressing_client("application/x-ndjson", [b'{"row": 1}\n' * 200] * 3)
+    for path in ("/full", "/streamed"):
+        response = compressing.get(path, headers={"Accept-Encoding": "br, gzip"})
+        assert response.headers["content-encoding"] == "br"
+        assert response.content == b'{"row": 1}\n' * 600
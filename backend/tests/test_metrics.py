@@ -0,0 +1,16 @@
+from fastapi.testclient import TestClient
+
+
+def test_metrics_require_superuser(client: TestClient, auth_headers: dict):
+    assert client.get("/metrics/pool").status_code in (401, 403)
+    assert client.get("/metrics/pool", headers=auth_headers).status_code == 403
+
+
+def test_pool_metrics_reports_both_engines(client: TestClient, admin_headers: dict):
+    client.get("/ingredients/")
+    res = client.get("/metrics/pool", headers=admin_headers)
+    assert res.status_code == 200
+    body = res.json()
+    for name in ("sync", "async"):
+        assert {"size", "checked_out", "overflow", "wait_time_ms"} <= body[name].keys()
+    assert body["async"]["wait_time_ms"]["count"] >= 1
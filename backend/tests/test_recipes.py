@@ -1,5 +1,9 @@
+import json
 from typing import Any
 
+import pytest
+from app import serialization, streaming
+from app.api import recipes
 from app.main import app # ty: ignore
 from fastapi.testclient import TestClient
 
@@ -93,3 +97,184 @@ def test_deleted_recipe_returns_404():
 def test_get_nonexistent_recipe_returns_404():
     res = client.get("/recipes/999999/")
     assert res.status_code == 404
+
+
+def test_list_recipes_sparse_fields_returns_only_requested_keys():
+    _create_recipe(client, "Sparse Recipe")
+    res = client.get("/recipes/", params={"fields": "name"})
+    assert res.status_code == 200
+    body = res.json()
+    assert body
+    assert all(set(r) == {"id", "name"} for r in body)
+
+
+def test_list_recipes_sparse_fields_with_ingredients():
+    _create_recipe(client, "Sparse Recipe With Ingredients")
+    res = client.get("/recipes/", params={"fields": "id,name,recipe_ingredients", "limit": 1})
+    assert res.status_code == 200
+    assert set(res.json()[0]) == {"id", "name", "recipe_ingredients"}
+    assert "X-Next-Cursor" in res.headers
+
+
+def test_list_recipes_unknown_field_returns_400():
+    res = client.get("/recipes/", params={"fields": "id,secret"})
+    assert res.status_code == 400
+
+
+def test_cookable_ranks_recipes_by_fridge_coverage(client: TestClient, auth_headers: dict[str, str], db_session):
+    from app import models
+    from app.cookable import cookable_index
+
+    # tables are cleared behind the ORM's back between test modules
+    cookable_index.invalidate()
+    flour, eggs, milk = (
+        client.post("/ingredients/", json={"name": name, "default_unit": unit}).json()["id"]
+        for name, unit in (("Cookable Flour", "g"), ("Cookable Eggs", "pcs"), ("Cookable Milk", "ml"))
+    )
+    pancakes, omelette = (
+        client.post("/recipes/", json={"name": name, "ingredients": []}).json()["id"]
+        for name in ("Cookable Pancakes", "Cookable Omelette")
+    )
+    client.get("/recipes/cookable", headers=auth_headers)
+    # added after the index is built, so they must be picked up incrementally
+    db_session.add_all([
+        models.RecipeIngredient(recipe_id=pancakes, ingredient_id=flour, quantity=200.0, unit="g"),
+        models.RecipeIngredient(recipe_id=pancakes, ingredient_id=eggs, quantity=2.0, unit="pcs"),
+        models.RecipeIngredient(recipe_id=pancakes, ingredient_id=milk, quantity=300.0, unit="ml"),
+        models.RecipeIngredient(recipe_id=omelette, ingredient_id=eggs, quantity=3.0, unit="pcs"),
+        models.RecipeIngredient(recipe_id=omelette, ingredient_id=milk, quantity=50.0, unit="ml", optional=True),
+    ])
+    db_session.commit()
+    # flushed but rolled back: must not reach the index
+    db_session.add(models.RecipeIngredient(recipe_id=omelette, ingredient_id=flour, quantity=900.0, unit="g"))
+    db_session.add(models.Recipe(name="Cookable Phantom"))
+    db_session.flush()
+    db_session.rollback()
+    for ingredient_id, quantity, unit in ((flour, 0.5, "kg"), (eggs, 4.0, "pcs"), (milk, 100.0, "ml")):
+        client.post(
+            "/fridge_items/",
+            json={"ingredient_id": ingredient_id, "quantity": quantity, "unit": unit},
+            headers=auth_headers,
+        )
+
+    res = client.get("/recipes/cookable", headers=auth_headers)
+    assert res.status_code == 200
+    body = res.json()
+    assert [r["id"] for r in body[:2]] == [omelette, pancakes]
+    assert body[0]["coverage"] == 1.0 and body[0]["missing"] == []
+    assert body[1]["coverage"] == 2 / 3
+    assert body[1]["missing"] == [{"ingredient_id": milk, "name": "Cookable Milk", "quantity": 200.0, "unit": "ml"}]
+    everything = client.get("/recipes/cookable", params={"limit": 1000}, headers=auth_headers).json()
+    assert "Cookable Phantom" not in {r["name"] for r in everything}
+
+
+def test_cookable_index_uses_dense_bit_positions():
+    from types import SimpleNamespace
+
+    from app.cookable import CookableIndex, Requirement, Stock
+
+    index = CookableIndex()
+    flour, eggs, milk = 10**9, 10**9 + 7, 2 * 10**9
+    index.rebuild(
+        [(1, "Pancakes"), (2, "Omelette")],
+        [
+            (1, 1, flour, 200.0, "g", False),
+            (2, 1, eggs, 2.0, "pcs", False),
+            (3, 2, eggs, 3.0, "pcs", False),
+            (4, 2, milk, 50.0, "ml", True),
+        ],
+    )
+    index.upsert_line(5, 2, Requirement(milk, 50.0, "ml"), False)
+    # masks stay as wide as the number of indexed ingredients, whatever their ids
+    assert all(entry.mask.bit_length() <= 3 for entry in index._recipes.values())
+    assert index.stats()["ingredients"] == 3
+
+    stock = Stock(
+        SimpleNamespace(
+            ingredient_id=ingredient_id, quantity=quantity, unit=unit,
+            default_unit=unit, density_g_per_ml=None, grams_per_piece=None,
+        )
+        for ingredient_id, quantity, unit in ((eggs, 3.0, "pcs"), (milk, 100.0, "ml"), (5, 1.0, "pcs"))
+    )
+    ranked = index.rank(stock)
+    assert [(recipe.id, recipe.coverage) for recipe in ranked] == [(2, 1.0), (1, 0.5)]
+    assert ranked[1].missing == [{"ingredient_id": flour, "quantity": 200.0, "unit": "g"}]
+
+
+def test_cookable_requires_auth():
+    res = client.get("/recipes/cookable")
+    assert res.status_code in (401, 403)
+
+
+def test_create_recipe_persists_ingredients():
+    existing = client.post("/ingredients/", json={"name": "Persisted Basil"}).json()["id"]
+    payload = _make_payload("Persisted Pesto")
+    payload["ingredients"] = [
+        {"name": "persisted basil", "quantity": 50.0, "unit": "g"},
+        {"name": "Persisted Pine Nuts", "quantity": 2.0, "unit": "tbsp"},
+    ]
+    body = client.post("/recipes/", json=payload).json()
+    lines = {line["ingredient"]["name"]: line for line in body["recipe_ingredients"]}
+    assert lines["Persisted Basil"]["ingredient_id"] == existing
+    assert lines["Persisted Pine Nuts"]["quantity"] == 2.0
+    fetched = client.get(f"/recipes/{body['id']}/").json()
+    assert len(fetched["recipe_ingredients"]) == 2
+
+
+def test_bulk_create_recipes_shares_new_ingredients():
+    payloads = [_make_payload(f"Bulk Recipe {i}") for i in range(3)]
+    for payload in payloads:
+        payload["ingredients"] = [{"name": "Bulk Saffron", "quantity": 0.1, "unit": "g"}]
+    res = client.post("/recipes/bulk", json=payloads)
+    assert res.status_code == 200
+    body = res.json()
+    assert [r["name"] for r in body] == ["Bulk Recipe 0", "Bulk Recipe 1", "Bulk Recipe 2"]
+    assert len({r["recipe_ingredients"][0]["ingredient_id"] for r in body}) == 1
+
+
+def test_list_recipes_conditional_get():
+    res = client.get("/recipes/", params={"fields": "id,name"})
+    etag = res.headers["ETag"]
+    assert client.get("/recipes/", params={"fields": "id,name"}, headers={"If-None-Match": etag}).status_code == 304
+    # another page or fieldset has its own ETag
+    assert client.get("/recipes/", headers={"If-None-Match": etag}).status_code == 200
+    _create_recipe(client, "Conditional Stew")
+    assert client.get("/recipes/", params={"fields": "id,name"}, headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_fast_json_recipe_list_matches_response_model(monkeypatch: pytest.MonkeyPatch):
+    pytest.importorskip("orjson")
+    _create_recipe(client, "Fast Json Pie")
+    expected = client.get("/recipes/", params={"limit": 1000})
+    monkeypatch.setattr(recipes, "FAST_JSON_RESPONSES", True)
+    fast = client.get("/recipes/", params={"limit": 1000})
+    assert fast.json() == expected.json()
+    assert fast.headers["ETag"] == expected.headers["ETag"]
+    # the published schema still describes the response model
+    schema = client.get("/openapi.json").json()["paths"]["/recipes/"]["get"]["responses"]["200"]
+    assert schema["content"]["application/json"]["schema"]["items"]["$ref"].endswith("/Recipe")
+
+
+def test_fast_json_without_orjson_falls_back(monkeypatch: pytest.MonkeyPatch):
+    _create_recipe(client, "Fallback Json Pie")
+    expected = client.get("/recipes/", params={"limit": 1000})
+    monkeypatch.setattr(recipes, "FAST_JSON_RESPONSES", True)
+    monkeypatch.setattr(serialization, "orjson", None)
+    fallback = client.get("/recipes/", params={"limit": 1000})
+    assert fallback.status_code == 200
+    assert fallback.json() == expected.json()
+
+
+def test_list_recipes_ndjson_streams_every_recipe(monkeypatch):
+    # small batches so the stream spans several server-side cursor fetches
+    monkeypatch.setattr(streaming, "STREAM_BATCH_SIZE", 2)
+    for name in ("Streamed Stew", "Streamed Soup", "Streamed Salad"):
+        _create_recipe(client, name)
+    expected = client.get("/recipes/", params={"limit": 100000}).json()
+    ndjson = {"Accept": "application/x-ndjson"}
+    res = client.get("/recipes/", params={"limit": 1}, headers=ndjson)
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line) for line in res.text.splitlines()] == expected
+    sparse = client.get("/recipes/", params={"fields": "name,recipe_ingredients"}, headers=ndjson)
+    lines = [json.loads(line) for line in sparse.text.splitlines()]
+    assert lines == [{key: r[key] for key in ("name", "id", "recipe_ingredients")} for r in expected]
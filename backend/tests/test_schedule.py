@@ -1,7 +1,12 @@
+import json
 from datetime import date, timedelta
 from typing import Any
 
+import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app import models
 
 Json = dict[str, Any]
 
@@ -86,3 +91,232 @@ def test_delete_schedule_and_then_404(client: TestClient, auth_headers: dict[str
 
     res3 = client.get(f"/schedule/{schedule_id}")
     assert res3.status_code == 404
+
+
+def test_list_schedule_cursor_orders_by_date(client: TestClient, auth_headers: dict[str, str]):
+    recipe_id = _create_recipe(client)
+    meal_type_id = create_meal_type(client, "TestMealTypeCursor")
+    start = date.today() + timedelta(days=30)
+    for offset in (2, 0, 1, 0):
+        payload: Json = {
+            "recipe_id": recipe_id,
+            "date": (start + timedelta(days=offset)).isoformat(),
+            "meal_type": meal_type_id,
+        }
+        client.post("/schedule/", json=payload, headers=auth_headers)
+    params: Json = {"limit": 3, "start_date": start.isoformat()}
+    first = client.get("/schedule/", params=params, headers=auth_headers)
+    cursor = first.headers["X-Next-Cursor"]
+    second = client.get("/schedule/", params={**params, "cursor": cursor}, headers=auth_headers)
+    entries = first.json() + second.json()
+    assert [e["date"] for e in entries] == sorted(e["date"] for e in entries)
+    assert len({e["id"] for e in entries}) == 4
+
+
+def test_mark_cooked_takes_ingredients_first_expiring_first(
+    client: TestClient, auth_headers: dict[str, str], db_session: Session
+):
+    payload: Json = {
+        "name": "Cooked Pancakes",
+        "ingredients": [
+            {"name": "Cooked Flour", "quantity": 300.0, "unit": "g"},
+            {"name": "Cooked Eggs", "quantity": 3.0, "unit": "pcs"},
+        ],
+    }
+    recipe = client.post("/recipes/", json=payload).json()
+    flour, eggs = (line["ingredient_id"] for line in recipe["recipe_ingredients"])
+    today = date.today()
+
+    def stock(ingredient_id: int, quantity: float, unit: str, expires: Any = None) -> int:
+        item: Json = {"ingredient_id": ingredient_id, "quantity": quantity, "unit": unit}
+        if expires is not None:
+            item["expiration_date"] = str(expires)
+        return client.post("/fridge_items/", json=item, headers=auth_headers).json()["id"]
+
+    later = stock(flour, 500.0, "g", today + timedelta(days=10))
+    sooner = stock(flour, 0.2, "kg", today + timedelta(days=2))
+    expired = stock(flour, 1.0, "kg", today - timedelta(days=1))
+    egg_box = stock(eggs, 2.0, "pcs")
+
+    meal_type_id = create_meal_type(client, "CookedMealType")
+    entry = {"recipe_id": recipe["id"], "date": today.isoformat(), "meal_type": meal_type_id}
+    schedule_id = client.post("/schedule/", json=entry, headers=auth_headers).json()["id"]
+
+    res = client.post(f"/schedule/{schedule_id}/cooked", headers=auth_headers)
+    assert res.status_code == 200
+    body = res.json()
+    assert body["schedule"]["cooked_at"] is not None
+    deducted = {d["fridge_item_id"]: (d["quantity"], d["remaining"]) for d in body["deducted"]}
+    assert deducted == {sooner: (0.2, 0.0), later: (100.0, 400.0), egg_box: (2.0, 0.0)}
+    assert [(m["ingredient_id"], m["quantity"], m["unit"]) for m in body["missing"]] == [(eggs, 1.0, "pcs")]
+
+    remaining = {item["id"]: item["quantity"] for item in client.get("/fridge_items/", headers=auth_headers).json()}
+    assert remaining[later] == 400.0 and remaining[expired] == 1.0
+    assert sooner not in remaining and egg_box not in remaining
+
+    # logged in the request's transaction, without waiting for the log writer
+    logs = (
+        db_session.query(models.FridgeLog.ingredient_id, models.FridgeLog.change_amount, models.FridgeLog.unit)
+        .filter(models.FridgeLog.action_type == "cook", models.FridgeLog.ingredient_id.in_([flour, eggs]))
+        .all()
+    )
+    assert sorted(tuple(log) for log in logs) == sorted([(flour, -200.0, "g"), (flour, -100.0, "g"), (eggs, -2.0, "pcs")])
+    consumed = (
+        db_session.query(models.FridgeLogDaily.ingredient_id, models.FridgeLogDaily.consumed)
+        .filter(models.FridgeLogDaily.ingredient_id.in_([flour, eggs]))
+        .all()
+    )
+    assert sorted(tuple(row) for row in consumed) == sorted([(flour, 300.0), (eggs, 2.0)])
+
+    assert client.post(f"/schedule/{schedule_id}/cooked", headers=auth_headers).status_code == 409
+
+
+def test_bulk_plan_from_entries_and_template_then_delete_range(client: TestClient, auth_headers: dict[str, str]):
+    recipe_id = _create_recipe(client, "Bulk Porridge")
+    other_recipe_id = _create_recipe(client, "Bulk Curry")
+    breakfast = create_meal_type(client, "BulkBreakfast")
+    dinner = create_meal_type(client, "BulkDinner")
+    start = date(2031, 3, 3)  # a Monday
+    end = start + timedelta(days=13)
+    plan: Json = {
+        "start_date": start.isoformat(),
+        "end_date": end.isoformat(),
+        "entries": [{"recipe_id": other_recipe_id, "date": (start + timedelta(days=2)).isoformat(), "meal_type": dinner}],
+        "template": [
+            {"weekday": 0, "recipe_id": recipe_id, "meal_type": breakfast},
+            {"weekday": 5, "recipe_id": other_recipe_id, "meal_type": dinner},
+        ],
+    }
+    res = client.post("/schedule/bulk", json=plan, headers=auth_headers)
+    assert res.status_code == 200
+    created = res.json()
+    assert [(e["date"], e["recipe_id"]) for e in created] == [
+        (start.isoformat(), recipe_id),
+        ((start + timedelta(days=2)).isoformat(), other_recipe_id),
+        ((start + timedelta(days=5)).isoformat(), other_recipe_id),
+        ((start + timedelta(days=7)).isoformat(), recipe_id),
+        ((start + timedelta(days=12)).isoformat(), other_recipe_id),
+    ]
+    listed = client.get("/schedule/", params={"start_date": start.isoformat(), "end_date": end.isoformat()}, headers=auth_headers)
+    assert [e["id"] for e in listed.json()] == [e["id"] for e in created]
+
+    week = {"start_date": start.isoformat(), "end_date": (start + timedelta(days=6)).isoformat()}
+    res = client.delete("/schedule/", params={**week, "meal_type": dinner}, headers=auth_headers)
+    assert res.json() == {"deleted": 2}
+    res = client.delete("/schedule/", params={"start_date": start.isoformat(), "end_date": end.isoformat()}, headers=auth_headers)
+    assert res.json() == {"deleted": 3}
+
+
+def test_bulk_plan_rejects_unknown_ids_and_bad_ranges(client: TestClient, auth_headers: dict[str, str]):
+    recipe_id = _create_recipe(client, "Bulk Soup")
+    meal_type_id = create_meal_type(client, "BulkLunch")
+    start = date(2031, 5, 1)
+    entry: Json = {"recipe_id": recipe_id, "date": start.isoformat(), "meal_type": meal_type_id}
+
+    def plan(**changes: Any) -> Json:
+        return {"start_date": start.isoformat(), "end_date": start.isoformat(), "entries": [entry], **changes}
+
+    assert client.post("/schedule/bulk", json=plan(), headers=auth_headers).status_code == 200
+    unknown = plan(entries=[{**entry, "recipe_id": 10**9}])
+    res = client.post("/schedule/bulk", json=unknown, headers=auth_headers)
+    assert res.status_code == 400 and str(10**9) in res.json()["detail"]
+    outside = plan(entries=[{**entry, "date": (start + timedelta(days=1)).isoformat()}])
+    assert client.post("/schedule/bulk", json=outside, headers=auth_headers).status_code == 400
+    too_long = plan(end_date=(start + timedelta(days=400)).isoformat())
+    assert client.post("/schedule/bulk", json=too_long, headers=auth_headers).status_code == 400
+    daily = [{"weekday": day, "recipe_id": recipe_id, "meal_type": meal_type_id} for day in range(7)] * 3
+    crowded = plan(end_date=(start + timedelta(days=365)).isoformat(), template=daily)
+    assert client.post("/schedule/bulk", json=crowded, headers=auth_headers).status_code == 413
+
+
+def test_bulk_plan_sees_deleted_meal_type(client: TestClient, auth_headers: dict[str, str]):
+    recipe_id = _create_recipe(client, "Catalogue Soup")
+    meal_type_id = create_meal_type(client, "CatalogueBrunch")
+    day = date(2031, 6, 1).isoformat()
+    plan: Json = {
+        "start_date": day,
+        "end_date": day,
+        "entries": [{"recipe_id": 10**9, "date": day, "meal_type": meal_type_id}],
+    }
+    # loads the meal type catalogue, then fails on the recipe
+    res = client.post("/schedule/bulk", json=plan, headers=auth_headers)
+    assert res.status_code == 400 and "meal type ids []" in res.json()["detail"]
+    client.delete(f"/meal_types/{meal_type_id}")
+    plan["entries"][0]["recipe_id"] = recipe_id
+    res = client.post("/schedule/bulk", json=plan, headers=auth_headers)
+    assert res.status_code == 400 and str(meal_type_id) in res.json()["detail"]
+
+
+def test_bulk_plan_unknown_meal_types_do_not_reload_catalogue(
+    client: TestClient, auth_headers: dict[str, str], monkeypatch: pytest.MonkeyPatch
+):
+    from app.catalogue import catalogue
+
+    monkeypatch.setattr(catalogue, "miss_reload_interval", 60)
+    recipe_id = _create_recipe(client, "Catalogue Stew")
+    day = date(2031, 6, 2).isoformat()
+
+    def plan(meal_type_id: int) -> Json:
+        return {"start_date": day, "end_date": day, "entries": [{"recipe_id": recipe_id, "date": day, "meal_type": meal_type_id}]}
+
+    client.post("/schedule/bulk", json=plan(10**9), headers=auth_headers)
+    loads = catalogue.loads
+    for meal_type_id in range(10**9 + 1, 10**9 + 6):
+        res = client.post("/schedule/bulk", json=plan(meal_type_id), headers=auth_headers)
+        assert res.status_code == 400 and str(meal_type_id) in res.json()["detail"]
+    assert catalogue.loads == loads
+
+
+def test_list_schedule_matches_orm_payload(client: TestClient, auth_headers: dict[str, str], db_session):
+    from app import models, schemas
+
+    recipe_id = _create_recipe(client, "Payload Porridge")
+    kept = create_meal_type(client, "PayloadBreakfast")
+    dropped = create_meal_type(client, "PayloadElevenses")
+    start = date(2033, 4, 4)
+    for offset, meal_type_id in ((0, kept), (0, dropped), (1, kept)):
+        entry = {"recipe_id": recipe_id, "date": (start + timedelta(days=offset)).isoformat(), "meal_type": meal_type_id}
+        client.post("/schedule/", json=entry, headers=auth_headers)
+    # leaves an entry whose meal type the catalogue no longer has
+    client.delete(f"/meal_types/{dropped}")
+    params = {"start_date": start.isoformat(), "end_date": (start + timedelta(days=1)).isoformat()}
+    cooked = client.get("/schedule/", params=params, headers=auth_headers).json()[0]["id"]
+    client.post(f"/schedule/{cooked}/cooked", headers=auth_headers)
+
+    db_session.expire_all()
+    # the list as built from Schedule entities joined to their recipe
+    fields = [field for field in schemas.ScheduleGet.model_fields if field != "recipe_name"]
+    expected = [
+        schemas.ScheduleGet.model_validate(
+            {**{field: getattr(schedule, field) for field in fields}, "recipe_name": recipe_name}
+        ).model_dump(mode="json")
+        for schedule, recipe_name in db_session.query(models.Schedule, models.Recipe.name)
+        .join(models.Recipe, models.Schedule.recipe_id == models.Recipe.id)
+        .filter(models.Schedule.date >= start, models.Schedule.date <= start + timedelta(days=1))
+        .order_by(models.Schedule.date, models.Schedule.id)
+    ]
+    assert len(expected) == 3
+    entries = client.get("/schedule/", params=params, headers=auth_headers).json()
+    streamed = client.get("/schedule/", params=params, headers={**auth_headers, "Accept": "application/x-ndjson"})
+    for payload in (entries, [json.loads(line) for line in streamed.text.splitlines()]):
+        assert [entry["id"] for entry in payload] == [entry["id"] for entry in expected]
+        for entry, old in zip(payload, expected):
+            assert list(entry) == list(old)
+            for field, value in old.items():
+                assert entry[field] == value, (entry["id"], field)
+    assert dropped in {entry["meal_type"] for entry in entries}
+    assert {entry["id"] for entry in entries if entry["cooked_at"] is not None} == {cooked}
+
+
+def test_list_schedule_ndjson_streams_range(client: TestClient, auth_headers: dict[str, str]):
+    recipe_id = _create_recipe(client, "Streamed Schedule Soup")
+    meal_type_id = create_meal_type(client, "StreamedSupper")
+    start = date(2032, 3, 1)
+    template = [{"weekday": day, "recipe_id": recipe_id, "meal_type": meal_type_id} for day in range(7)]
+    plan: Json = {"start_date": start.isoformat(), "end_date": (start + timedelta(days=13)).isoformat(), "template": template}
+    assert client.post("/schedule/bulk", json=plan, headers=auth_headers).status_code == 200
+    params = {"start_date": plan["start_date"], "end_date": plan["end_date"]}
+    expected = client.get("/schedule/", params={**params, "limit": 1000}, headers=auth_headers).json()
+    res = client.get("/schedule/", params={**params, "limit": 5}, headers={**auth_headers, "Accept": "application/x-ndjson"})
+    assert [json.loads(line) for line in res.text.splitlines()] == expected
+    assert len(expected) == 14
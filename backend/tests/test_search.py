@@ -0,0 +1,96 @@
+from typing import Any
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app import models
+from app.search import SearchIndex
+
+Json = dict[str, Any]
+
+
+def _create_recipe(client: TestClient, name: str, description: str = "") -> int:
+    payload: Json = {"name": name, "description": description, "ingredients": []}
+    return client.post("/recipes/", json=payload).json()["id"]
+
+
+def _create_ingredient(client: TestClient, name: str, category: str = "Vegetable") -> int:
+    return client.post("/ingredients/", json={"name": name, "category": category}).json()["id"]
+
+
+def _hits(res: Any) -> set[tuple[str, int]]:
+    assert res.status_code == 200
+    return {(hit["kind"], hit["id"]) for hit in res.json()}
+
+
+def test_search_matches_prefixes_across_recipes_and_ingredients(client: TestClient):
+    recipe_id = _create_recipe(client, "Roasted Pumpkin Soup", "Creamy and warming")
+    ingredient_id = _create_ingredient(client, "Pumpkin Seeds", "Nuts")
+    hits = _hits(client.get("/search/", params={"q": "pump"}))
+    assert ("recipe", recipe_id) in hits
+    assert ("ingredient", ingredient_id) in hits
+    assert ("recipe", recipe_id) in _hits(client.get("/search/", params={"q": "creamy pumpk"}))
+    assert ("ingredient", ingredient_id) not in _hits(client.get("/search/", params={"q": "pump", "kind": "recipe"}))
+
+
+def test_search_tolerates_typos(client: TestClient):
+    recipe_id = _create_recipe(client, "Shakshuka")
+    assert ("recipe", recipe_id) in _hits(client.get("/search/", params={"q": "shakshuak"}))
+
+
+def test_search_matches_tags(client: TestClient, db_session: Session):
+    recipe_id = _create_recipe(client, "Weeknight Curry")
+    client.get("/search/", params={"q": "curry"})
+    db_session.add(models.RecipeTag(recipe_id=recipe_id, tag="vegetarian"))
+    db_session.commit()
+    assert ("recipe", recipe_id) in _hits(client.get("/search/", params={"q": "vegetar"}))
+
+
+def test_autocomplete_only_matches_names(client: TestClient):
+    recipe_id = _create_recipe(client, "Lemon Tart", "Zesty dessert")
+    assert ("recipe", recipe_id) in _hits(client.get("/search/autocomplete", params={"q": "lem"}))
+    assert ("recipe", recipe_id) not in _hits(client.get("/search/autocomplete", params={"q": "zest"}))
+
+
+def test_search_sees_updates_and_deletes(client: TestClient):
+    ingredient_id = _create_ingredient(client, "Quinceberry")
+    assert ("ingredient", ingredient_id) in _hits(client.get("/search/", params={"q": "quince"}))
+    client.delete(f"/ingredients/{ingredient_id}")
+    assert ("ingredient", ingredient_id) not in _hits(client.get("/search/", params={"q": "quince"}))
+
+
+def test_search_ignores_rolled_back_changes(client: TestClient, db_session: Session):
+    _create_recipe(client, "Mangosteen Tart")
+    assert _hits(client.get("/search/", params={"q": "mangosteen"}))
+    phantom = models.Recipe(name="Mangosteen Phantom")
+    db_session.add(phantom)
+    db_session.flush()
+    db_session.rollback()
+    names = {hit["name"] for hit in client.get("/search/", params={"q": "mangosteen"}).json()}
+    assert names == {"Mangosteen Tart"}
+    db_session.add(models.Recipe(name="Mangosteen Jam"))
+    db_session.commit()
+    names = {hit["name"] for hit in client.get("/search/", params={"q": "mangosteen"}).json()}
+    assert names == {"Mangosteen Tart", "Mangosteen Jam"}
+
+
+def test_search_index_ranks_name_matches_first():
+    index = SearchIndex()
+    index.rebuild(
+        [(1, "Apple Pie", None, None), (2, "Crumble", "Made with apple", None)],
+        [(1, "Apple", "Fruit")],
+        [],
+    )
+    hits = index.search("apple")
+    assert [(hit.kind, hit.id) for hit in hits] == [("ingredient", 1), ("recipe", 1), ("recipe", 2)]
+    assert index.search("apple", kind="recipe", names_only=True)[0].id == 1
+
+
+def test_search_index_requires_every_token():
+    index = SearchIndex()
+    index.rebuild([(1, "Tomato Soup", None, None), (2, "Tomato Salad", None, None)], [], [])
+    assert [hit.id for hit in index.search("tom sou")] == [1]
+    index.upsert_recipe(2, "Tomato Soup With Basil", None, None)
+    assert [hit.id for hit in index.search("tom sou")] == [1, 2]
+    index.remove("recipe", 1)
+    assert [hit.id for hit in index.search("tom sou")] == [2]
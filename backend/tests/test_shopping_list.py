@@ -42,3 +42,104 @@ def test_shopping_list_returns_items_with_auth(client: TestClient, auth_headers:
     res = client.get(f"/shopping_list/?start_date={start}&end_date={end}", headers=auth_headers)
     assert res.status_code == 200
     assert isinstance(res.json(), list)
+
+
+def test_shopping_list_nets_fridge_stock_once(client: TestClient, auth_headers: dict[str,str], db_session):
+    from app import models
+
+    ingredient_id = client.post("/ingredients/", json={"name": "Netting Flour"}).json()["id"]
+    recipe_id = _create_recipe(client, name="Netting Bread")
+    db_session.add(models.RecipeIngredient(recipe_id=recipe_id, ingredient_id=ingredient_id, quantity=500.0, unit="g"))
+    db_session.commit()
+    meal_type_id = create_meal_type(client, name="NettingMealType")
+    d = (date.today() + timedelta(days=1)).isoformat()
+    for _ in range(2):
+        client.post("/schedule/", json={"recipe_id": recipe_id, "date": d, "meal_type": meal_type_id}, headers=auth_headers)
+    for quantity in (200.0, 100.0):
+        client.post("/fridge_items/", json={"ingredient_id": ingredient_id, "quantity": quantity, "unit": "g"}, headers=auth_headers)
+
+    start = date.today().isoformat()
+    end = (date.today() + timedelta(days=7)).isoformat()
+    res = client.get(f"/shopping_list/?start_date={start}&end_date={end}", headers=auth_headers)
+    rows = [row for row in res.json() if row["id"] == ingredient_id]
+    assert rows == [{"id": ingredient_id, "ingredient_name": "Netting Flour", "quantity": 700.0, "unit": "g"}]
+
+
+def test_cached_shopping_list_reflects_fridge_changes(client: TestClient, auth_headers: dict[str,str], db_session):
+    from app import models
+
+    ingredient_id = client.post("/ingredients/", json={"name": "Cached Rice"}).json()["id"]
+    recipe_id = _create_recipe(client, name="Cached Risotto")
+    db_session.add(models.RecipeIngredient(recipe_id=recipe_id, ingredient_id=ingredient_id, quantity=300.0, unit="g"))
+    db_session.commit()
+    meal_type_id = create_meal_type(client, name="CachedMealType")
+    d = (date.today() + timedelta(days=2)).isoformat()
+    client.post("/schedule/", json={"recipe_id": recipe_id, "date": d, "meal_type": meal_type_id}, headers=auth_headers)
+
+    url = f"/shopping_list/?start_date={date.today().isoformat()}&end_date={(date.today() + timedelta(days=7)).isoformat()}"
+
+    def rice_quantity() -> float | None:
+        rows = client.get(url, headers=auth_headers).json()
+        return next((row["quantity"] for row in rows if row["id"] == ingredient_id), None)
+
+    assert rice_quantity() == 300.0
+    assert rice_quantity() == 300.0  # served from cache
+    item = client.post("/fridge_items/", json={"ingredient_id": ingredient_id, "quantity": 100.0, "unit": "g"}, headers=auth_headers).json()
+    assert rice_quantity() == 200.0
+    client.delete(f"/fridge_items/{item['id']}", headers=auth_headers)
+    assert rice_quantity() == 300.0
+
+
+def test_shopping_list_nets_across_units(client: TestClient, auth_headers: dict[str,str], db_session):
+    from app import models
+
+    ingredient_id = client.post("/ingredients/", json={"name": "Unit Sugar", "default_unit": "kg"}).json()["id"]
+    recipe_id = _create_recipe(client, name="Unit Cake")
+    db_session.add(models.RecipeIngredient(recipe_id=recipe_id, ingredient_id=ingredient_id, quantity=1500.0, unit="g"))
+    db_session.commit()
+    meal_type_id = create_meal_type(client, name="UnitMealType")
+    d = (date.today() + timedelta(days=1)).isoformat()
+    client.post("/schedule/", json={"recipe_id": recipe_id, "date": d, "meal_type": meal_type_id}, headers=auth_headers)
+    client.post("/fridge_items/", json={"ingredient_id": ingredient_id, "quantity": 1.0, "unit": "kg"}, headers=auth_headers)
+
+    start = date.today().isoformat()
+    end = (date.today() + timedelta(days=7)).isoformat()
+    res = client.get(f"/shopping_list/?start_date={start}&end_date={end}", headers=auth_headers)
+    rows = [row for row in res.json() if row["id"] == ingredient_id]
+    assert rows == [{"id": ingredient_id, "ingredient_name": "Unit Sugar", "quantity": 0.5, "unit": "kg"}]
+
+
+def test_cooked_meals_are_not_shopped_for(client: TestClient, auth_headers: dict[str,str], db_session):
+    from app import models
+
+    barley = client.post("/ingredients/", json={"name": "Cooked Barley"}).json()["id"]
+    saffron = client.post("/ingredients/", json={"name": "Cooked Saffron"}).json()["id"]
+    stew = _create_recipe(client, name="Cooked Stew")
+    paella = _create_recipe(client, name="Cooked Paella")
+    db_session.add_all([
+        models.RecipeIngredient(recipe_id=stew, ingredient_id=barley, quantity=300.0, unit="g"),
+        models.RecipeIngredient(recipe_id=paella, ingredient_id=saffron, quantity=1.0, unit="g"),
+    ])
+    db_session.commit()
+    client.post("/fridge_items/", json={"ingredient_id": barley, "quantity": 100.0, "unit": "g"}, headers=auth_headers)
+    meal_type_id = create_meal_type(client, name="CookedShoppingMealType")
+    today = date.today()
+
+    def schedule(recipe_id: int, day: date) -> int:
+        entry = {"recipe_id": recipe_id, "date": day.isoformat(), "meal_type": meal_type_id}
+        return client.post("/schedule/", json=entry, headers=auth_headers).json()["id"]
+
+    stew_id, paella_id = schedule(stew, today), schedule(paella, today + timedelta(days=1))
+    url = f"/shopping_list/?start_date={today.isoformat()}&end_date={(today + timedelta(days=7)).isoformat()}"
+
+    def to_buy() -> dict[int, float]:
+        rows = client.get(url, headers=auth_headers).json()
+        return {row["id"]: row["quantity"] for row in rows if row["id"] in (barley, saffron)}
+
+    assert to_buy() == {barley: 200.0, saffron: 1.0}
+    # the fridge barley is used up; the stew needs no more of it
+    assert client.post(f"/schedule/{stew_id}/cooked", headers=auth_headers).status_code == 200
+    assert to_buy() == {saffron: 1.0}
+    # nothing is taken from the fridge, the cached list still drops the paella
+    assert client.post(f"/schedule/{paella_id}/cooked", headers=auth_headers).json()["deducted"] == []
+    assert to_buy() == {}
@@ -0,0 +1,50 @@
+from types import SimpleNamespace
+
+from app.units import Conversion, convert, net_quantities, normalize_unit
+
+
+def _row(unit: str, demand: float = 0.0, stock: float = 0.0, **ingredient):
+    return SimpleNamespace(
+        id=ingredient.get("id", 1),
+        ingredient_name=ingredient.get("name", "Milk"),
+        unit=unit,
+        demand=demand,
+        stock=stock,
+        default_unit=ingredient.get("default_unit"),
+        density_g_per_ml=ingredient.get("density_g_per_ml"),
+        grams_per_piece=ingredient.get("grams_per_piece"),
+    )
+
+
+def test_normalize_unit_handles_aliases_and_unknowns():
+    assert normalize_unit(" Kilograms ") == "kg"
+    assert normalize_unit("tbsp.") == "tbsp"
+    assert normalize_unit("pinch") is None
+
+
+def test_convert_within_and_across_dimensions():
+    assert convert(1.5, "kg", "g") == 1500.0
+    assert convert(250, "ml", "g", Conversion(density_g_per_ml=1.03)) == 257.5
+    assert convert(2, "pcs", "g", Conversion(grams_per_piece=60)) == 120.0
+    assert convert(2, "pcs", "g") is None
+
+
+def test_net_quantities_merges_units_and_renders_default_unit():
+    rows = [
+        _row("ml", demand=1500.0, default_unit="l"),
+        _row("l", stock=0.5, default_unit="l"),
+        _row("g", demand=103.0, default_unit="l", density_g_per_ml=1.03),
+    ]
+    assert net_quantities(rows) == [{"id": 1, "ingredient_name": "Milk", "quantity": 1.1, "unit": "l"}]
+
+
+def test_net_quantities_keeps_unconvertible_units_separate():
+    rows = [
+        _row("g", demand=200.0, name="Garlic"),
+        _row("clove", demand=3.0, name="Garlic"),
+        _row("clove", stock=1.0, name="Garlic"),
+    ]
+    assert net_quantities(rows) == [
+        {"id": 1, "ingredient_name": "Garlic", "quantity": 2.0, "unit": "clove"},
+        {"id": 1, "ingredient_name": "Garlic", "quantity": 200.0, "unit": "g"},
+    ]
@@ -38,6 +38,8 @@ app.all('/api/*', async (req, res) => {
       headers,
       data: ['GET', 'HEAD'].includes(req.method) ? undefined : req.body,
       responseType: 'stream',
+      // pass 304 Not Modified (and backend errors) through instead of throwing
+      validateStatus: () => true,
     };
 
     const backendRes = await client.request(opts);